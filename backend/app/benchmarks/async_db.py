@@ -0,0 +1,82 @@
+"""Compare per-worker throughput of a blocking Session vs an AsyncSession.
+
+Both endpoints run the same slow query inside an ``async def`` handler, which is
+how every route used to look. Requests are driven in-process through a single
+event loop, the same as one uvicorn worker.
+
+    cd backend/app
+    python -m benchmarks.async_db --requests 200 --concurrency 20 --query-ms 20
+"""
+import argparse
+import asyncio
+import time
+from fastapi import FastAPI,Depends
+from httpx import AsyncClient,ASGITransport
+from sqlalchemy import create_engine,text
+from sqlalchemy.orm import sessionmaker,Session
+from sqlalchemy.ext.asyncio import create_async_engine,async_sessionmaker,AsyncSession
+from db.database import DATABASE_URL,ASYNC_DATABASE_URL
+
+
+def build_app(query_ms:int,pool_size:int) -> FastAPI:
+  sync_engine = create_engine(DATABASE_URL,pool_size=pool_size,max_overflow=0)
+  SyncSession = sessionmaker(bind=sync_engine)
+  async_engine = create_async_engine(ASYNC_DATABASE_URL,pool_size=pool_size,max_overflow=0)
+  AsyncSessionFactory = async_sessionmaker(bind=async_engine)
+  query = text("SELECT pg_sleep(:s)").bindparams(s=query_ms / 1000)
+
+  def get_sync_db():
+    db = SyncSession()
+    try:
+      yield db
+    finally:
+      db.close()
+
+  async def get_async_db():
+    async with AsyncSessionFactory() as db:
+      yield db
+
+  app = FastAPI()
+
+  @app.get("/sync")
+  async def sync_route(db:Session = Depends(get_sync_db)):
+    db.execute(query)
+    return {"ok":True}
+
+  @app.get("/async")
+  async def async_route(db:AsyncSession = Depends(get_async_db)):
+    await db.execute(query)
+    return {"ok":True}
+
+  return app
+
+
+async def run(app:FastAPI,path:str,requests:int,concurrency:int) -> float:
+  semaphore = asyncio.Semaphore(concurrency)
+  async with AsyncClient(transport=ASGITransport(app=app),base_url="http://bench") as client:
+    async def one():
+      async with semaphore:
+        response = await client.get(path)
+        response.raise_for_status()
+
+    await client.get(path)
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - start)
+
+
+async def main(args):
+  app = build_app(args.query_ms,args.concurrency)
+  results = {}
+  for path in ("/sync","/async"):
+    results[path] = await run(app,path,args.requests,args.concurrency)
+    print(f"{path:<8} {results[path]:8.1f} req/s")
+  print(f"speedup  {results['/async'] / results['/sync']:8.1f}x")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--requests",type=int,default=200)
+  parser.add_argument("--concurrency",type=int,default=20)
+  parser.add_argument("--query-ms",type=int,default=20)
+  asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""Checkout latency against the local Stripe stub, fully offline.
+
+Starts ``benchmarks.stripe_stub`` on a background thread, points the Stripe
+client at it and creates checkout sessions for a batch of fresh users, twice:
+the first round has to create each Stripe customer, the second reuses the
+cached customer id. A probe on ``/api/profile`` runs alongside to show the
+Stripe round trips no longer stall the event loop.
+
+    cd backend/app
+    python -m benchmarks.checkout_latency --users 50 --latency-ms 300
+"""
+import argparse
+import asyncio
+import threading
+import time
+import uvicorn
+from httpx import AsyncClient,ASGITransport
+from sqlalchemy import delete,insert,select
+from main import app
+from db.database import async_engine
+from db.models import StripeSubscription,User
+from config.security import create_access_token
+from services.stripe_client import stripe_api
+from benchmarks.stripe_stub import build_app
+from benchmarks.report import Recorder,print_report
+
+EMAIL_PATTERN = "checkout-bench-{}@example.com"
+
+
+def start_stub(port:int,latency_ms:float) -> uvicorn.Server:
+  server = uvicorn.Server(uvicorn.Config(build_app(latency_ms),host="127.0.0.1",port=port,log_level="warning"))
+  threading.Thread(target=server.run,daemon=True).start()
+  while not server.started:
+    time.sleep(0.05)
+  return server
+
+
+async def main(args):
+  stub = start_stub(args.port,args.latency_ms)
+  stripe_api.api_base = f"http://127.0.0.1:{args.port}"
+
+  emails = [EMAIL_PATTERN.format(index) for index in range(args.users)]
+  async with async_engine.begin() as conn:
+    await conn.execute(insert(User),[{"email":email,"first_name":"Checkout","last_name":"Bench","password":"-"} for email in emails])
+
+  recorder = Recorder()
+  probe_ms = []
+  done = asyncio.Event()
+  try:
+    async with AsyncClient(transport=ASGITransport(app=app),base_url="http://bench",timeout=60) as client:
+      async def checkout(email:str,label:str):
+        headers = {"Authorization":f"Bearer {create_access_token({'sub':email})}"}
+        start = time.perf_counter()
+        response = await client.post("/api/create-checkout-session",json={"price_id":"price_stub0"},headers=headers)
+        recorder.record(label,(time.perf_counter() - start) * 1000,response.status_code)
+
+      async def probe():
+        headers = {"Authorization":f"Bearer {create_access_token({'sub':emails[0]})}"}
+        while not done.is_set():
+          start = time.perf_counter()
+          await client.get("/api/profile",headers=headers)
+          probe_ms.append((time.perf_counter() - start) * 1000)
+          await asyncio.sleep(0.01)
+
+      probe_task = asyncio.create_task(probe())
+      start = time.perf_counter()
+      await asyncio.gather(*(checkout(email,"checkout (new customer)") for email in emails))
+      await asyncio.gather(*(checkout(email,"checkout (cached customer)") for email in emails))
+      elapsed = time.perf_counter() - start
+      done.set()
+      await probe_task
+  finally:
+    async with async_engine.begin() as conn:
+      users = (await conn.scalars(select(User.id).filter(User.email.in_(emails)))).all()
+      await conn.execute(delete(StripeSubscription).filter(StripeSubscription.user_id.in_(users)))
+      await conn.execute(delete(User).filter(User.id.in_(users)))
+    await async_engine.dispose()
+    stub.should_exit = True
+
+  for latency in probe_ms:
+    recorder.record("GET /api/profile (probe)",latency,200)
+  print_report(recorder.build(elapsed,{"stub_latency_ms":args.latency_ms,"users":args.users}))
+  print(f"\nstub calls: {stub.config.app.state.calls}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--users",type=int,default=50)
+  parser.add_argument("--latency-ms",type=float,default=300)
+  parser.add_argument("--port",type=int,default=12111)
+  asyncio.run(main(parser.parse_args()))
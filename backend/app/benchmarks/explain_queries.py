@@ -0,0 +1,95 @@
+"""Print the EXPLAIN plan of every SQL statement the read routes run.
+
+The routes are called in-process against DATABASE_URL as the admin of an
+existing project, with the principal and membership caches switched off so
+every lookup shows up. Each captured statement is then explained with its
+real bind parameters, so the output never drifts from the route code.
+
+    cd backend/app
+    python -m benchmarks.explain_queries [--analyze]
+"""
+import argparse
+import asyncio
+from httpx import AsyncClient,ASGITransport
+from sqlalchemy import event,select
+from main import app
+from db.database import async_engine,AsyncSessionLocal
+from db.models import ProjectUser,Task,User,UserRole
+from config.security import create_access_token,principal_cache
+from config.permissions import membership_cache
+
+ROUTES = [
+  "/api/profile",
+  "/api/projects",
+  "/api/projects/{project_id}",
+  "/api/projects/{project_id}/tasks",
+  "/api/projects/{project_id}/tasks/changes",
+  "/api/projects/{project_id}/stats",
+  "/api/me/tasks",
+  "/api/search?q=task+1234",
+  "/api/projects/{project_id}/tasks/{task_id}",
+  "/api/projects/{project_id}/members",
+  "/api/users",
+  "/api/users/search?email={email}",
+  "/api/users/lookup?q=b",
+  "/api/users/lookup?q=bench12+us",
+  "/api/subscription-status",
+]
+
+
+async def find_sample() -> dict:
+  async with AsyncSessionLocal() as db:
+    row = (await db.execute(
+      select(ProjectUser.project_id,User.email).join(User).filter(ProjectUser.role == UserRole.admin.value).limit(1)
+    )).first()
+    if row is None:
+      return None
+    task_id = await db.scalar(select(Task.id).filter(Task.project_id == row.project_id).limit(1))
+    return {"project_id":row.project_id,"email":row.email,"task_id":task_id}
+
+
+async def explain(statement:str,parameters,analyze:bool) -> list:
+  options = "(ANALYZE, BUFFERS) " if analyze else ""
+  async with async_engine.connect() as conn:
+    raw = await conn.get_raw_connection()
+    rows = await raw.driver_connection.fetch(f"EXPLAIN {options}{statement}",*(parameters or ()))
+  return [row[0] for row in rows]
+
+
+async def main(args):
+  async_engine.echo = False
+  principal_cache.enabled = False
+  membership_cache.enabled = False
+
+  sample = await find_sample()
+  if sample is None:
+    print("No project with an admin found; seed the database first")
+    return
+
+  captured = []
+  def record(conn,cursor,statement,parameters,context,executemany):
+    captured.append((statement,parameters))
+  event.listen(async_engine.sync_engine,"before_cursor_execute",record)
+
+  headers = {"Authorization":f"Bearer {create_access_token({'sub':sample['email']})}"}
+  async with AsyncClient(transport=ASGITransport(app=app),base_url="http://explain") as client:
+    for route in ROUTES:
+      if "{task_id}" in route and sample["task_id"] is None:
+        continue
+      path = route.format(**sample)
+      captured.clear()
+      response = await client.get(path,headers=headers)
+      print(f"\n=== GET {route} -> {response.status_code}")
+      for statement,parameters in list(captured):
+        print(f"\n{statement}\n-- params: {parameters}")
+        for line in await explain(statement,parameters,args.analyze):
+          print(f"   {line}")
+
+  event.remove(async_engine.sync_engine,"before_cursor_execute",record)
+  await async_engine.dispose()
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--analyze",action="store_true",help="run EXPLAIN (ANALYZE, BUFFERS); the routes are read-only")
+  asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""Login throughput under concurrent load, with bcrypt running in the hashing pool.
+
+Logins are fired through the app in-process while a second task keeps calling
+``/api/profile``, whose latency shows whether bcrypt still stalls the event
+loop. Rejected logins (429) are counted separately; raise
+PASSWORD_HASH_MAX_PENDING or PASSWORD_HASH_WORKERS to trade latency for them.
+
+    cd backend/app
+    python -m benchmarks.login_throughput --requests 200 --concurrency 32
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from uuid import uuid4
+from httpx import AsyncClient,ASGITransport
+from sqlalchemy import delete
+from main import app
+from db.database import AsyncSessionLocal,async_engine
+from db.models import User
+from config.hashing import password_hasher,hash_password
+from config.security import create_access_token
+from benchmarks.report import percentile
+
+PASSWORD = "Benchmark123"
+
+
+async def main(args):
+  email = f"bench-{uuid4().hex[:8]}@example.com"
+  async with AsyncSessionLocal() as db:
+    db.add(User(email=email,first_name="Bench",last_name="User",password=hash_password(PASSWORD,password_hasher.rounds)))
+    await db.commit()
+
+  statuses = Counter()
+  login_ms = []
+  profile_ms = []
+  done = asyncio.Event()
+  semaphore = asyncio.Semaphore(args.concurrency)
+  headers = {"Authorization":f"Bearer {create_access_token({'sub':email})}"}
+
+  try:
+    async with AsyncClient(transport=ASGITransport(app=app),base_url="http://bench") as client:
+      # warm up the worker processes and the connection pool
+      await client.post("/login",data={"username":email,"password":PASSWORD})
+
+      async def login():
+        async with semaphore:
+          start = time.perf_counter()
+          response = await client.post("/login",data={"username":email,"password":PASSWORD})
+          statuses[response.status_code] += 1
+          if response.status_code == 200:
+            login_ms.append((time.perf_counter() - start) * 1000)
+
+      async def probe():
+        while not done.is_set():
+          start = time.perf_counter()
+          await client.get("/api/profile",headers=headers)
+          profile_ms.append((time.perf_counter() - start) * 1000)
+          await asyncio.sleep(0.01)
+
+      probe_task = asyncio.create_task(probe())
+      start = time.perf_counter()
+      await asyncio.gather(*(login() for _ in range(args.requests)))
+      elapsed = time.perf_counter() - start
+      done.set()
+      await probe_task
+  finally:
+    async with AsyncSessionLocal() as db:
+      await db.execute(delete(User).filter(User.email == email))
+      await db.commit()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+  print(f"workers={password_hasher.workers} max_pending={password_hasher.max_pending} rounds={password_hasher.rounds}")
+  print(f"logins      {statuses[200] / elapsed:8.1f} /s   statuses {dict(statuses)}")
+  if login_ms:
+    print(f"login ms    p50 {percentile(login_ms,50):7.1f}   p95 {percentile(login_ms,95):7.1f}   p99 {percentile(login_ms,99):7.1f}")
+  print(f"profile ms  p50 {percentile(profile_ms,50):7.1f}   p95 {percentile(profile_ms,95):7.1f}   max {max(profile_ms):7.1f}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--requests",type=int,default=200)
+  parser.add_argument("--concurrency",type=int,default=32)
+  asyncio.run(main(parser.parse_args()))
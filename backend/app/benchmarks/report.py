@@ -0,0 +1,112 @@
+"""Latency/throughput reports for benchmark runs, stored as JSON so runs can be diffed.
+
+    cd backend/app
+    python -m benchmarks.report compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import statistics
+from collections import defaultdict
+from datetime import datetime,timezone
+
+
+def percentile(values:list,q:int) -> float:
+  if len(values) == 1:
+    return values[0]
+  return statistics.quantiles(values,n=100,method="inclusive")[q - 1]
+
+
+class Recorder:
+  """Collects (latency, status) samples per endpoint key such as ``GET /api/projects``."""
+
+  def __init__(self):
+    self.samples = defaultdict(list)
+
+  def record(self,endpoint:str,latency_ms:float,status_code:int) -> None:
+    self.samples[endpoint].append((latency_ms,status_code))
+
+  def build(self,elapsed:float,meta:dict) -> dict:
+    endpoints = {}
+    for endpoint,samples in sorted(self.samples.items()):
+      latencies = [latency for latency,_ in samples]
+      statuses = defaultdict(int)
+      for _,status_code in samples:
+        statuses[str(status_code)] += 1
+      endpoints[endpoint] = summarize(latencies,elapsed) | {
+        "errors":sum(count for code,count in statuses.items() if int(code) >= 400),
+        "statuses":dict(statuses),
+      }
+    latencies = [latency for samples in self.samples.values() for latency,_ in samples]
+    return {
+      "meta":meta | {
+        "created_at":datetime.now(timezone.utc).isoformat(),
+        "python":platform.python_version(),
+        "elapsed_s":round(elapsed,3),
+      },
+      "total":summarize(latencies,elapsed) if latencies else {},
+      "endpoints":endpoints,
+    }
+
+
+def summarize(latencies:list,elapsed:float) -> dict:
+  return {
+    "count":len(latencies),
+    "rps":round(len(latencies) / elapsed,2),
+    "mean_ms":round(statistics.fmean(latencies),3),
+    "p50_ms":round(percentile(latencies,50),3),
+    "p95_ms":round(percentile(latencies,95),3),
+    "p99_ms":round(percentile(latencies,99),3),
+    "max_ms":round(max(latencies),3),
+  }
+
+
+def save(report:dict,path:str) -> None:
+  with open(path,"w") as f:
+    json.dump(report,f,indent=2)
+
+def load(path:str) -> dict:
+  with open(path) as f:
+    return json.load(f)
+
+
+def print_report(report:dict) -> None:
+  print(f"{'endpoint':<52} {'count':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+  for endpoint,stats in list(report["endpoints"].items()) + [("TOTAL",report["total"])]:
+    print(
+      f"{endpoint:<52} {stats['count']:>7} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} "
+      f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats.get('errors',''):>5}"
+    )
+
+
+def compare(before:dict,after:dict) -> dict:
+  """Relative change (after/before - 1) of rps and latency percentiles per endpoint present in both runs."""
+  changes = {}
+  rows = [(endpoint,before["endpoints"][endpoint],stats) for endpoint,stats in after["endpoints"].items() if endpoint in before["endpoints"]]
+  for endpoint,old,new in rows + [("TOTAL",before["total"],after["total"])]:
+    changes[endpoint] = {
+      key:round(new[key] / old[key] - 1,4) if old[key] else None
+      for key in ("rps","p50_ms","p95_ms","p99_ms")
+    }
+  return changes
+
+def print_comparison(changes:dict) -> None:
+  print(f"{'endpoint':<52} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+  for endpoint,change in changes.items():
+    cells = " ".join(f"{'n/a':>8}" if value is None else f"{value:>+8.1%}" for value in change.values())
+    print(f"{endpoint:<52} {cells}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  subparsers = parser.add_subparsers(dest="command",required=True)
+  show = subparsers.add_parser("show")
+  show.add_argument("report")
+  diff = subparsers.add_parser("compare")
+  diff.add_argument("before")
+  diff.add_argument("after")
+  args = parser.parse_args()
+  if args.command == "show":
+    print_report(load(args.report))
+  else:
+    print_comparison(compare(load(args.before),load(args.after)))
@@ -0,0 +1,140 @@
+"""Deterministic synthetic dataset for the benchmarks.
+
+The same ``--seed`` always produces the same ids, emails and task layout, so
+two benchmark runs against freshly seeded databases are comparable. Task
+counts per project follow a Zipf-like curve: a few projects hold most of the
+tasks, which is what makes the list endpoints interesting.
+
+Benchmark users are ``bench-user-<n>@example.com`` with password
+``Benchmark123`` and an active subscription; ``--reset`` removes a previous
+dataset (and only that) before seeding.
+
+    cd backend/app
+    python -m benchmarks.seed --users 500 --projects 100 --members 8 --tasks 20000
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime,timedelta
+from sqlalchemy import delete,insert,select,update
+from db.database import async_engine
+from db.models import Project,ProjectUser,StripeSubscription,Task,TaskStatus,User,UserRole,SubscriptionStatus
+from config.hashing import hash_password
+
+PASSWORD = "Benchmark123"
+EMAIL_PATTERN = "bench-user-{}@example.com"
+BASE_DATE = datetime(2026,1,1)
+CHUNK_SIZE = 5000
+STATUS_WEIGHTS = {TaskStatus.pending.value:5,TaskStatus.in_progress.value:3,TaskStatus.completed.value:2}
+
+
+def bench_email(index:int) -> str:
+  return EMAIL_PATTERN.format(index)
+
+def make_uuid(rng:random.Random) -> uuid.UUID:
+  return uuid.UUID(int=rng.getrandbits(128),version=4)
+
+def skewed_counts(rng:random.Random,total:int,buckets:int,skew:float) -> list:
+  """Split ``total`` across ``buckets`` with weights 1/rank**skew, in shuffled order."""
+  weights = [1 / (rank ** skew) for rank in range(1,buckets + 1)]
+  scale = total / sum(weights)
+  counts = [int(weight * scale) for weight in weights]
+  for index in range(total - sum(counts)):
+    counts[index % buckets] += 1
+  rng.shuffle(counts)
+  return counts
+
+
+def generate(users:int,projects:int,members:int,tasks:int,skew:float = 1.1,seed:int = 42) -> dict:
+  rng = random.Random(seed)
+  password = hash_password(PASSWORD)
+  user_rows = [
+    {"id":make_uuid(rng),"first_name":f"Bench{index}","last_name":"User","email":bench_email(index),"password":password}
+    for index in range(users)
+  ]
+  subscription_rows = [
+    {"id":make_uuid(rng),"user_id":user["id"],"subscription_id":f"cus_bench{index}","status":SubscriptionStatus.active.value}
+    for index,user in enumerate(user_rows)
+  ]
+
+  project_rows = []
+  membership_rows = []
+  project_members = []
+  for index in range(projects):
+    project_id = make_uuid(rng)
+    project_rows.append({"id":project_id,"title":f"Project {index}","description":f"Synthetic project {index}"})
+    team = rng.sample(user_rows,min(members,users))
+    project_members.append([user["id"] for user in team])
+    for position,user in enumerate(team):
+      role = UserRole.admin.value if position == 0 else UserRole.user.value
+      membership_rows.append({"project_id":project_id,"user_id":user["id"],"role":role})
+
+  task_rows = []
+  statuses,status_weights = zip(*STATUS_WEIGHTS.items())
+  for project,team,count in zip(project_rows,project_members,skewed_counts(rng,tasks,projects,skew)):
+    for index in range(count):
+      task_rows.append({
+        "id":make_uuid(rng),
+        "title":f"Task {index} of {project['title']}",
+        "description":"Synthetic task",
+        "status":rng.choices(statuses,status_weights)[0],
+        # one task in ten has no due date, which sorts last in the task list
+        "due_date":None if rng.random() < 0.1 else BASE_DATE + timedelta(minutes=rng.randrange(365 * 24 * 60)),
+        "project_id":project["id"],
+        "assignee_id":rng.choice(team) if rng.random() < 0.8 else None,
+      })
+
+  return {
+    User:user_rows,
+    StripeSubscription:subscription_rows,
+    Project:project_rows,
+    ProjectUser:membership_rows,
+    Task:task_rows,
+  }
+
+
+async def reset(conn) -> None:
+  bench_users = select(User.id).filter(User.email.like(EMAIL_PATTERN.format("%")))
+  bench_projects = select(ProjectUser.project_id).filter(ProjectUser.user_id.in_(bench_users),ProjectUser.role == UserRole.admin.value)
+  await conn.execute(delete(Task).filter(Task.project_id.in_(bench_projects)))
+  project_ids = (await conn.scalars(bench_projects)).all()
+  await conn.execute(delete(ProjectUser).filter((ProjectUser.project_id.in_(project_ids)) | (ProjectUser.user_id.in_(bench_users))))
+  await conn.execute(delete(Project).filter(Project.id.in_(project_ids)))
+  await conn.execute(update(Task).filter(Task.assignee_id.in_(bench_users)).values(assignee_id=None))
+  await conn.execute(delete(StripeSubscription).filter(StripeSubscription.user_id.in_(bench_users)))
+  await conn.execute(delete(User).filter(User.email.like(EMAIL_PATTERN.format("%"))))
+
+
+async def load(dataset:dict,replace:bool) -> None:
+  async with async_engine.begin() as conn:
+    existing = await conn.scalar(select(User.id).filter(User.email.like(EMAIL_PATTERN.format("%"))).limit(1))
+    if existing is not None:
+      if not replace:
+        raise SystemExit("Benchmark data already present; pass --reset to replace it")
+      await reset(conn)
+    for model,rows in dataset.items():
+      for start in range(0,len(rows),CHUNK_SIZE):
+        await conn.execute(insert(model),rows[start:start + CHUNK_SIZE])
+
+
+async def main(args):
+  start = time.perf_counter()
+  dataset = generate(args.users,args.projects,args.members,args.tasks,args.skew,args.seed)
+  await load(dataset,args.reset)
+  await async_engine.dispose()
+  sizes = ", ".join(f"{len(rows)} {model.__tablename__}" for model,rows in dataset.items())
+  print(f"seeded {sizes} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--users",type=int,default=500)
+  parser.add_argument("--projects",type=int,default=100)
+  parser.add_argument("--members",type=int,default=8,help="members per project, the first one is its admin")
+  parser.add_argument("--tasks",type=int,default=20000)
+  parser.add_argument("--skew",type=float,default=1.1,help="Zipf exponent of tasks per project")
+  parser.add_argument("--seed",type=int,default=42)
+  parser.add_argument("--reset",action="store_true",help="delete an existing benchmark dataset first")
+  asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+"""Minimal local stand-in for the Stripe API endpoints the backend calls.
+
+Each response waits ``--latency-ms`` to imitate the real round trip, so the
+checkout and catalog paths can be benchmarked offline. Point the backend at
+it with STRIPE_API_BASE:
+
+    cd backend/app
+    python -m benchmarks.stripe_stub --port 12111 --latency-ms 300
+    STRIPE_API_BASE=http://127.0.0.1:12111 uvicorn main:app
+"""
+import argparse
+import asyncio
+import itertools
+from fastapi import FastAPI,Request
+import uvicorn
+
+
+def build_app(latency_ms:float) -> FastAPI:
+  app = FastAPI()
+  ids = itertools.count(1)
+  app.state.calls = {"customers":0,"checkout_sessions":0,"products":0}
+
+  @app.middleware("http")
+  async def simulate_latency(request:Request,call_next):
+    await asyncio.sleep(latency_ms / 1000)
+    return await call_next(request)
+
+  @app.post("/v1/customers")
+  async def create_customer(request:Request):
+    form = await request.form()
+    app.state.calls["customers"] += 1
+    return {"id":f"cus_stub{next(ids)}","object":"customer","email":form.get("email"),"name":form.get("name")}
+
+  @app.post("/v1/checkout/sessions")
+  async def create_checkout_session(request:Request):
+    form = await request.form()
+    app.state.calls["checkout_sessions"] += 1
+    session_id = f"cs_stub{next(ids)}"
+    return {
+      "id":session_id,
+      "object":"checkout.session",
+      "customer":form.get("customer"),
+      "mode":form.get("mode"),
+      "url":f"http://stripe-stub.invalid/pay/{session_id}",
+    }
+
+  @app.get("/v1/products")
+  async def list_products():
+    app.state.calls["products"] += 1
+    products = [
+      {
+        "id":f"prod_stub{index}",
+        "object":"product",
+        "active":True,
+        "name":name,
+        "description":f"{name} plan",
+        "default_price":{"id":f"price_stub{index}","object":"price","unit_amount":amount,"currency":"usd"},
+      }
+      for index,(name,amount) in enumerate([("Basic",900),("Pro",2900)])
+    ]
+    return {"object":"list","url":"/v1/products","has_more":False,"data":products}
+
+  return app
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--host",default="127.0.0.1")
+  parser.add_argument("--port",type=int,default=12111)
+  parser.add_argument("--latency-ms",type=float,default=300)
+  args = parser.parse_args()
+  uvicorn.run(build_app(args.latency_ms),host=args.host,port=args.port,log_level="warning")
@@ -0,0 +1,228 @@
+"""Scripted workload mix against a dataset created by ``benchmarks.seed``.
+
+Every virtual user logs in as a different project admin, then loops over a
+weighted mix of project, task CRUD and member management calls until
+``--duration`` runs out. Latencies are recorded per route template and
+written as a JSON report (see ``benchmarks.report``).
+
+By default the app runs in-process, like one uvicorn worker; ``--base-url``
+points the workload at a running server instead. Stripe is never contacted:
+the seeded users already have subscriptions, and in-process runs point the
+Stripe client at a closed local port so a stray call fails fast.
+
+    cd backend/app
+    python -m benchmarks.seed --reset
+    python -m benchmarks.workload --duration 30 --concurrency 20 --output before.json
+    # change something, then
+    python -m benchmarks.workload --duration 30 --concurrency 20 --output after.json
+    python -m benchmarks.report compare before.json after.json
+"""
+import argparse
+import asyncio
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from httpx import AsyncClient,ASGITransport
+from sqlalchemy import select
+from db.database import AsyncSessionLocal,async_engine
+from db.models import ProjectUser,User,UserRole
+from benchmarks.seed import EMAIL_PATTERN,PASSWORD,BASE_DATE
+from benchmarks.report import Recorder,save,print_report
+
+WEIGHTS = {
+  "list_projects":20,
+  "list_tasks":30,
+  "get_task":15,
+  "create_task":10,
+  "update_task":10,
+  "delete_task":5,
+  "list_members":5,
+  "add_member":2,
+  "remove_member":2,
+  "login":1,
+}
+
+
+class VirtualUser:
+
+  def __init__(self,client:AsyncClient,recorder:Recorder,rng:random.Random,email:str,project_ids:list,user_ids:list):
+    self.client = client
+    self.recorder = recorder
+    self.rng = rng
+    self.email = email
+    self.project_ids = project_ids
+    self.user_ids = user_ids
+    self.headers = {}
+    self.tasks = defaultdict(list)
+    self.created_tasks = defaultdict(list)
+    self.members = {}
+    self.added_members = defaultdict(list)
+
+  async def call(self,method:str,template:str,expected:int = 200,**kwargs):
+    path = template.format(**kwargs.pop("params",{}))
+    start = time.perf_counter()
+    response = await self.client.request(method,path,headers=self.headers,**kwargs)
+    self.recorder.record(f"{method} {template}",(time.perf_counter() - start) * 1000,response.status_code)
+    return response.json() if response.status_code == expected else None
+
+  def project(self) -> dict:
+    return {"project_id":self.rng.choice(self.project_ids)}
+
+  async def login(self):
+    data = await self.call("POST","/login",data={"username":self.email,"password":PASSWORD})
+    if data:
+      self.headers = {"Authorization":f"Bearer {data['access_token']}"}
+
+  async def list_projects(self):
+    await self.call("GET","/api/projects")
+
+  async def list_tasks(self):
+    params = self.project()
+    page = await self.call("GET","/api/projects/{project_id}/tasks",params=params)
+    if page:
+      self.tasks[params["project_id"]] = [task["id"] for task in page["items"]]
+
+  async def get_task(self):
+    params = self.project()
+    if not self.tasks[params["project_id"]]:
+      return await self.list_tasks()
+    params["task_id"] = self.rng.choice(self.tasks[params["project_id"]])
+    await self.call("GET","/api/projects/{project_id}/tasks/{task_id}",params=params)
+
+  async def create_task(self):
+    params = self.project()
+    due_date = BASE_DATE + timedelta(minutes=self.rng.randrange(365 * 24 * 60))
+    task = await self.call(
+      "POST","/api/projects/{project_id}/tasks",params=params,
+      json={"title":"Workload task","description":"Created by the workload","due_date":due_date.isoformat()}
+    )
+    if task:
+      self.created_tasks[params["project_id"]].append(task["id"])
+
+  async def update_task(self):
+    params = self.project()
+    if not self.tasks[params["project_id"]]:
+      return await self.list_tasks()
+    params["task_id"] = self.rng.choice(self.tasks[params["project_id"]])
+    await self.call("PUT","/api/projects/{project_id}/tasks/{task_id}",params=params,json={"status":self.rng.choice(["pending","in_progress","completed"])})
+
+  async def delete_task(self):
+    params = self.project()
+    if not self.created_tasks[params["project_id"]]:
+      return await self.create_task()
+    params["task_id"] = self.created_tasks[params["project_id"]].pop()
+    if params["task_id"] in self.tasks[params["project_id"]]:
+      self.tasks[params["project_id"]].remove(params["task_id"])
+    await self.call("DELETE","/api/projects/{project_id}/tasks/{task_id}",params=params)
+
+  async def list_members(self):
+    params = self.project()
+    page = await self.call("GET","/api/projects/{project_id}/members",params=params)
+    if page:
+      self.members[params["project_id"]] = {user["id"] for user in page["items"]}
+
+  async def add_member(self):
+    params = self.project()
+    if params["project_id"] not in self.members:
+      return await self.list_members()
+    candidates = [user_id for user_id in self.rng.sample(self.user_ids,min(10,len(self.user_ids))) if user_id not in self.members[params["project_id"]]]
+    if not candidates:
+      return
+    params["user_id"] = candidates[0]
+    if await self.call("POST","/api/projects/{project_id}/members/{user_id}",params=params) is not None:
+      self.members[params["project_id"]].add(params["user_id"])
+      self.added_members[params["project_id"]].append(params["user_id"])
+
+  async def remove_member(self):
+    params = self.project()
+    if not self.added_members[params["project_id"]]:
+      return await self.add_member()
+    params["user_id"] = self.added_members[params["project_id"]].pop()
+    self.members[params["project_id"]].discard(params["user_id"])
+    await self.call("DELETE","/api/projects/{project_id}/members/{user_id}",params=params)
+
+  async def run(self,deadline:float):
+    operations,weights = zip(*WEIGHTS.items())
+    while time.perf_counter() < deadline:
+      if not self.headers:
+        # un login rechazado (429 del pool de bcrypt) se reintenta en vez de generar 401 en cadena
+        await self.login()
+        if not self.headers:
+          await asyncio.sleep(0.1)
+        continue
+      await getattr(self,self.rng.choices(operations,weights)[0])()
+
+  async def cleanup(self):
+    # deja el dataset como estaba para que la siguiente corrida sea comparable
+    for project_id,task_ids in self.created_tasks.items():
+      for task_id in task_ids:
+        await self.client.delete(f"/api/projects/{project_id}/tasks/{task_id}",headers=self.headers)
+    for project_id,user_ids in self.added_members.items():
+      for user_id in user_ids:
+        await self.client.delete(f"/api/projects/{project_id}/members/{user_id}",headers=self.headers)
+
+
+async def load_actors() -> tuple:
+  async with AsyncSessionLocal() as db:
+    rows = (await db.execute(
+      select(User.email,ProjectUser.project_id).join(ProjectUser,ProjectUser.user_id == User.id)
+      .filter(User.email.like(EMAIL_PATTERN.format("%")),ProjectUser.role == UserRole.admin.value)
+      .order_by(User.email,ProjectUser.project_id)
+    )).all()
+    user_ids = (await db.scalars(select(User.id).filter(User.email.like(EMAIL_PATTERN.format("%"))).order_by(User.id))).all()
+  admins = defaultdict(list)
+  for email,project_id in rows:
+    admins[email].append(str(project_id))
+  return sorted(admins.items()),[str(user_id) for user_id in user_ids]
+
+
+async def main(args):
+  admins,user_ids = await load_actors()
+  if not admins:
+    raise SystemExit("No benchmark data found; run python -m benchmarks.seed first")
+
+  if args.base_url:
+    client = AsyncClient(base_url=args.base_url,timeout=30)
+  else:
+    from main import app
+    from config.hashing import password_hasher
+    from services.stripe_client import stripe_api
+    stripe_api.api_base = "http://127.0.0.1:9"
+    client = AsyncClient(transport=ASGITransport(app=app),base_url="http://bench",timeout=30)
+
+  recorder = Recorder()
+  virtual_users = [
+    VirtualUser(client,recorder,random.Random(args.seed + index),*admins[index % len(admins)],user_ids)
+    for index in range(args.concurrency)
+  ]
+  async with client:
+    start = time.perf_counter()
+    await asyncio.gather(*(user.run(start + args.duration) for user in virtual_users))
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(user.cleanup() for user in virtual_users))
+  await async_engine.dispose()
+  if not args.base_url:
+    password_hasher.shutdown()
+
+  report = recorder.build(elapsed,{
+    "target":args.base_url or "in-process",
+    "concurrency":args.concurrency,
+    "duration_s":args.duration,
+    "seed":args.seed,
+    "weights":WEIGHTS,
+  })
+  print_report(report)
+  if args.output:
+    save(report,args.output)
+    print(f"\nreport written to {args.output}")
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--duration",type=float,default=30,help="seconds")
+  parser.add_argument("--concurrency",type=int,default=20,help="virtual users, each one a different project admin")
+  parser.add_argument("--seed",type=int,default=42)
+  parser.add_argument("--base-url",help="benchmark a running server instead of the in-process app")
+  parser.add_argument("--output",help="write the JSON report to this path")
+  asyncio.run(main(parser.parse_args()))
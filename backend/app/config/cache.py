@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any,Callable,Hashable
+import time
+
+
+class TTLCache:
+  """Bounded in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+  The cache is per worker process, so invalidation only reaches the process
+  that performed the write; other workers catch up once the TTL runs out.
+  """
+
+  def __init__(self,max_size:int,ttl:float,enabled:bool = True):
+    self.max_size = max_size
+    self.ttl = ttl
+    self.enabled = enabled
+    self.hits = 0
+    self.misses = 0
+    self._entries:OrderedDict = OrderedDict()
+    self._lock = Lock()
+
+  def get(self,key:Hashable,default:Any = None) -> Any:
+    if not self.enabled:
+      return default
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[0] < time.monotonic():
+        if entry is not None:
+          del self._entries[key]
+        self.misses += 1
+        return default
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return entry[1]
+
+  def set(self,key:Hashable,value:Any) -> None:
+    if not self.enabled:
+      return
+    with self._lock:
+      self._entries[key] = (time.monotonic() + self.ttl,value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_size:
+        self._entries.popitem(last=False)
+
+  def invalidate(self,key:Hashable) -> None:
+    with self._lock:
+      self._entries.pop(key,None)
+
+  def invalidate_matching(self,predicate:Callable[[Hashable],bool]) -> None:
+    with self._lock:
+      for key in [key for key in self._entries if predicate(key)]:
+        del self._entries[key]
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+      self.hits = 0
+      self.misses = 0
+
+  def stats(self) -> dict:
+    return {
+      "enabled":self.enabled,
+      "size":len(self._entries),
+      "max_size":self.max_size,
+      "hits":self.hits,
+      "misses":self.misses,
+    }
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from fastapi import HTTPException,status,Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+import os
+from db.database import get_db
+from db.models import StripeSubscription,SubscriptionStatus
+from config.cache import TTLCache
+from monitoring.prometheus import register_cache
+from config.security import get_current_user,CurrentUser
+
+ENTITLEMENT_CACHE_ENABLED = os.getenv("ENTITLEMENT_CACHE_ENABLED","true").lower() == "true"
+ENTITLEMENT_CACHE_TTL_SECONDS = float(os.getenv("ENTITLEMENT_CACHE_TTL_SECONDS","60"))
+ENTITLEMENT_CACHE_MAX_SIZE = int(os.getenv("ENTITLEMENT_CACHE_MAX_SIZE","10000"))
+
+# user_id -> Entitlement; the Stripe webhooks invalidate it once they commit a change
+entitlement_cache = TTLCache(ENTITLEMENT_CACHE_MAX_SIZE,ENTITLEMENT_CACHE_TTL_SECONDS,enabled=ENTITLEMENT_CACHE_ENABLED)
+register_cache("entitlement",entitlement_cache)
+
+
+@dataclass(frozen=True)
+class Entitlement:
+  status: str
+  subscription_id: Optional[str] = None
+
+  @property
+  def is_active(self) -> bool:
+    return self.status == SubscriptionStatus.active.value
+
+NO_SUBSCRIPTION = Entitlement(status=SubscriptionStatus.inactive.value)
+
+
+async def get_entitlement(user_id:UUID,db:AsyncSession) -> Entitlement:
+  entitlement = entitlement_cache.get(user_id)
+  if entitlement is None:
+    row = (await db.execute(
+      select(StripeSubscription.status,StripeSubscription.subscription_id).filter(StripeSubscription.user_id == user_id).limit(1)
+    )).first()
+    entitlement = Entitlement(status=row.status,subscription_id=row.subscription_id) if row else NO_SUBSCRIPTION
+    entitlement_cache.set(user_id,entitlement)
+  return entitlement
+
+def invalidate_entitlement(user_id:UUID) -> None:
+  entitlement_cache.invalidate(user_id)
+
+
+async def require_active_subscription(
+  current_user:CurrentUser = Depends(get_current_user),
+  db:AsyncSession = Depends(get_db)
+) -> CurrentUser:
+  if not (await get_entitlement(current_user.id,db)).is_active:
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="User is not subscribed")
+  return current_user
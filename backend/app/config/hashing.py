@@ -0,0 +1,91 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from threading import Lock
+from typing import Optional,Tuple
+from fastapi import HTTPException,status
+from passlib.context import CryptContext
+from monitoring.prometheus import PASSWORD_HASH_TIME,PASSWORD_HASH_PENDING,PASSWORD_HASH_REJECTED
+
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS","12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS",str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING",str(PASSWORD_HASH_WORKERS * 4)))
+
+
+@lru_cache
+def get_context(rounds:int) -> CryptContext:
+  # Hashes made with a different cost report needs_update, which drives the rehash on login
+  return CryptContext(schemes=["bcrypt"],deprecated="auto",bcrypt__rounds=rounds)
+
+def hash_password(password:str,rounds:int = PASSWORD_HASH_ROUNDS) -> str:
+  return get_context(rounds).hash(password)
+
+def verify_and_update(password:str,hashed_password:str,rounds:int = PASSWORD_HASH_ROUNDS) -> Tuple[bool,Optional[str]]:
+  return get_context(rounds).verify_and_update(password,hashed_password)
+
+
+class PasswordHasher:
+  """Runs bcrypt in worker processes so it neither blocks the event loop nor holds the GIL.
+
+  At most ``max_pending`` operations may be queued or running; beyond that
+  callers get a 429 instead of piling up behind a saturated pool.
+  """
+
+  def __init__(self,workers:int,max_pending:int,rounds:int):
+    self.workers = workers
+    self.max_pending = max_pending
+    self.rounds = rounds
+    self.pending = 0
+    self._executor:Optional[ProcessPoolExecutor] = None
+    self._lock = Lock()
+
+  def _get_executor(self) -> ProcessPoolExecutor:
+    with self._lock:
+      if self._executor is None:
+        # spawn: forking a process that already runs an event loop and thread pools is unsafe
+        self._executor = ProcessPoolExecutor(self.workers,mp_context=multiprocessing.get_context("spawn"))
+      return self._executor
+
+  def _release(self,_future) -> None:
+    with self._lock:
+      self.pending -= 1
+    PASSWORD_HASH_PENDING.dec()
+
+  async def _submit(self,operation:str,fn,*args):
+    executor = self._get_executor()
+    with self._lock:
+      if self.pending >= self.max_pending:
+        PASSWORD_HASH_REJECTED.labels(operation).inc()
+        raise HTTPException(
+          status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+          detail="Too many password operations in progress, retry shortly",
+          headers={"Retry-After":"1"}
+        )
+      self.pending += 1
+    PASSWORD_HASH_PENDING.inc()
+    start = time.perf_counter()
+    future = executor.submit(fn,*args)
+    future.add_done_callback(self._release)
+    try:
+      return await asyncio.wrap_future(future)
+    finally:
+      PASSWORD_HASH_TIME.labels(operation).observe(time.perf_counter() - start)
+
+  async def hash(self,password:str) -> str:
+    return await self._submit("hash",hash_password,password,self.rounds)
+
+  async def verify(self,password:str,hashed_password:str) -> Tuple[bool,Optional[str]]:
+    """Returns whether the password matches and, if the stored hash uses another cost, its replacement."""
+    return await self._submit("verify",verify_and_update,password,hashed_password,self.rounds)
+
+  def shutdown(self) -> None:
+    with self._lock:
+      executor,self._executor = self._executor,None
+    if executor is not None:
+      executor.shutdown(wait=False,cancel_futures=True)
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS,PASSWORD_HASH_MAX_PENDING,PASSWORD_HASH_ROUNDS)
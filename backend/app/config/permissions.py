@@ -0,0 +1,54 @@
+from fastapi import HTTPException,status,Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from uuid import UUID
+import os
+from db.database import get_db
+from db.models import ProjectUser,UserRole
+from config.cache import TTLCache
+from monitoring.prometheus import register_cache
+from config.security import get_current_user,CurrentUser
+
+MEMBERSHIP_CACHE_ENABLED = os.getenv("MEMBERSHIP_CACHE_ENABLED","true").lower() == "true"
+MEMBERSHIP_CACHE_TTL_SECONDS = float(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS","30"))
+MEMBERSHIP_CACHE_MAX_SIZE = int(os.getenv("MEMBERSHIP_CACHE_MAX_SIZE","50000"))
+
+# (project_id, user_id) -> role, or None when the user is not a member
+membership_cache = TTLCache(MEMBERSHIP_CACHE_MAX_SIZE,MEMBERSHIP_CACHE_TTL_SECONDS,enabled=MEMBERSHIP_CACHE_ENABLED)
+register_cache("membership",membership_cache)
+_MISSING = object()
+
+
+async def get_project_role(project_id:UUID,user_id:UUID,db:AsyncSession) -> Optional[str]:
+  key = (project_id,user_id)
+  role = membership_cache.get(key,_MISSING)
+  if role is _MISSING:
+    role = await db.scalar(select(ProjectUser.role).filter(
+      ProjectUser.project_id == project_id,
+      ProjectUser.user_id == user_id
+    ))
+    membership_cache.set(key,role)
+  return role
+
+def set_project_role(project_id:UUID,user_id:UUID,role:Optional[str]) -> None:
+  membership_cache.set((project_id,user_id),role)
+
+def invalidate_membership(project_id:UUID,user_id:UUID) -> None:
+  membership_cache.invalidate((project_id,user_id))
+
+def invalidate_project_memberships(project_id:UUID) -> None:
+  membership_cache.invalidate_matching(lambda key: key[0] == project_id)
+
+
+def require_project_member(role:Optional[UserRole] = None,detail:str = "Not authorized to access this project"):
+  async def dependency(
+    project_id:UUID,
+    current_user:CurrentUser = Depends(get_current_user),
+    db:AsyncSession = Depends(get_db)
+  ) -> CurrentUser:
+    member_role = await get_project_role(project_id,current_user.id,db)
+    if member_role is None or (role is not None and member_role != role.value):
+      raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail=detail)
+    return current_user
+  return dependency
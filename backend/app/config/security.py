@@ -1,25 +1,53 @@
-from passlib.context import CryptContext
 from dotenv import load_dotenv
 from jose import JWTError,jwt
 import os
 from typing import Optional
+from dataclasses import dataclass
+from uuid import UUID
 from datetime import timedelta,datetime,timezone
 from fastapi import HTTPException,status,Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.database import get_db
 from db.models import User
+from config.cache import TTLCache
+from config.hashing import get_context,PASSWORD_HASH_ROUNDS
+from monitoring.prometheus import register_cache
 
 load_dotenv()
 
 ACCESS_TOKEN_EXPIRES_MINUTES=int(os.getenv("ACCESS_TOKEN_EXPIRES_MINUTES"))
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
 JWT_ALGORITHM=os.getenv("JWT_ALGORITHM")
+PRINCIPAL_CACHE_ENABLED = os.getenv("PRINCIPAL_CACHE_ENABLED","true").lower() == "true"
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS","60"))
+PRINCIPAL_CACHE_MAX_SIZE = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE","10000"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto",bcrypt__rounds=12)
+pwd_context = get_context(PASSWORD_HASH_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# Authenticated users keyed by token subject (email), so most requests skip the users lookup
+principal_cache = TTLCache(PRINCIPAL_CACHE_MAX_SIZE,PRINCIPAL_CACHE_TTL_SECONDS,enabled=PRINCIPAL_CACHE_ENABLED)
+register_cache("principal",principal_cache)
 
+
+@dataclass(frozen=True)
+class CurrentUser:
+  id: UUID
+  email: str
+  first_name: str
+  last_name: str
+
+  @classmethod
+  def from_user(cls,user:User) -> "CurrentUser":
+    return cls(id=user.id,email=user.email,first_name=user.first_name,last_name=user.last_name)
+
+def invalidate_principal(email:str) -> None:
+  principal_cache.invalidate(email)
+
+
+# Bloqueantes: las rutas usan config.hashing.password_hasher, estas quedan para scripts y tests
 def hash_password(password:str) -> str :
   return pwd_context.hash(password)
 
@@ -55,13 +83,18 @@ def create_refresh_token(data: dict) -> str:
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> CurrentUser:
     payload = verify_token(token)
     email: str = payload.get("sub")
-    user = db.query(User).filter(User.email == email).first()
+    current_user = principal_cache.get(email)
+    if current_user is not None:
+        return current_user
+    user = await db.scalar(select(User).filter(User.email == email))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-    return user
\ No newline at end of file
+    current_user = CurrentUser.from_user(user)
+    principal_cache.set(email,current_user)
+    return current_user
\ No newline at end of file
@@ -1,22 +1,43 @@
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine,async_sessionmaker,AsyncSession
 import os
+from monitoring.query_metrics import instrument_engine
+from monitoring.prometheus import InstrumentedAsyncPool,register_pool
 
 load_dotenv()
 
 DATABASE_URL = os.getenv('DATABASE_URL')
+SQL_ECHO = os.getenv('SQL_ECHO','false').lower() == 'true'
 
-engine = create_engine(DATABASE_URL,echo=True,pool_pre_ping=True,pool_size=20,max_overflow=0)
+def get_async_url(url:str) -> str:
+  return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = get_async_url(DATABASE_URL)
+
+engine = create_engine(DATABASE_URL,echo=SQL_ECHO,pool_pre_ping=True,pool_size=20,max_overflow=0)
 
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL,echo=SQL_ECHO,pool_pre_ping=True,pool_size=20,max_overflow=0,poolclass=InstrumentedAsyncPool)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+register_pool("sync",engine.pool)
+register_pool("async",async_engine.pool)
+
+# expire_on_commit=False: an AsyncSession cannot lazy load, so objects must stay readable after commit
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-  db = SessionLocal()
-  try:
+async def get_db():
+  async with AsyncSessionLocal() as db:
     yield db
-  finally:
-    db.close()
\ No newline at end of file
+
+def get_session_factory() -> async_sessionmaker:
+  # sessions for work that outlives the request, such as streamed responses; overridable like get_db
+  return AsyncSessionLocal
@@ -1,7 +1,7 @@
 import uuid
-from sqlalchemy import Column,String,ForeignKey,DateTime,Table
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column,Computed,String,ForeignKey,DateTime,Table,Index,Integer,Text,func,literal_column
+from sqlalchemy.orm import relationship,deferred
+from sqlalchemy.dialects.postgresql import UUID,JSONB,TSVECTOR
 from db.database import Base
 from enum import Enum as PyEnum
 
@@ -18,6 +18,24 @@ class SubscriptionStatus(PyEnum):
   active = "active"
   inactive = "expired"
 
+class WebhookEventStatus(PyEnum):
+  pending = "pending"
+  processing = "processing"
+  processed = "processed"
+  dead = "dead"
+
+# 'simple' only lowercases, so search works the same for any language the users write in
+SEARCH_CONFIG = "simple"
+
+def search_vector_column():
+  # titles rank above descriptions; deferred so normal queries don't load it
+  return deferred(Column(TSVECTOR,Computed(
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+    persisted=True
+  )))
+
+
 class User(Base):
   __tablename__ = "users"
   id = Column(UUID(as_uuid=True),primary_key=True,default=uuid.uuid4)
@@ -26,6 +44,19 @@ class User(Base):
   email = Column(String,unique=True,index=True)
   password = Column(String)
   stripe_subscription = relationship("StripeSubscription",back_populates="user")
+  # GET /api/users/lookup: LIKE 'prefix%' on the lowercased email, first and last name;
+  # "first last" prefixes are an equality on first_name plus a prefix on last_name.
+  # With the "C" collation the same btree serves both the prefix LIKE and the ORDER BY; it goes
+  # through postgresql_ops because reflection doesn't report expression collations to alembic.
+  __table_args__ = (
+    Index("ix_users_email_pattern",func.lower(email).label("email"),postgresql_ops={"email":'COLLATE "C"'}),
+    Index(
+      "ix_users_full_name_pattern",
+      func.lower(first_name).label("first_name"),func.lower(last_name).label("last_name"),
+      postgresql_ops={"first_name":'COLLATE "C"',"last_name":'COLLATE "C"'}
+    ),
+    Index("ix_users_last_name_pattern",func.lower(last_name).label("last_name"),postgresql_ops={"last_name":'COLLATE "C"'}),
+  )
 
 
 class ProjectUser(Base):
@@ -33,15 +64,26 @@ class ProjectUser(Base):
   project_id = Column(UUID(as_uuid=True),ForeignKey("projects.id"),primary_key=True)
   user_id = Column(UUID(as_uuid=True),ForeignKey("users.id"),primary_key=True)
   role = Column(String,default=UserRole.user.value)
+  # Project.version when the row was last written
+  version = Column(Integer,nullable=False,default=0,server_default="0")
   user = relationship("User")
   project = relationship("Project")
+  __table_args__ = (
+    Index("ix_project_user_user_id_project_id",user_id,project_id),
+  )
 
 class Project(Base):
   __tablename__= "projects"
   id = Column(UUID(as_uuid=True),primary_key=True,default=uuid.uuid4)
   title = Column(String)
   description = Column(String)
+  # bumped on every change to the project, its tasks or its members (db/versioning.py)
+  version = Column(Integer,nullable=False,default=0,server_default="0")
+  search_vector = search_vector_column()
   tasks = relationship("Task",back_populates="project")
+  __table_args__ = (
+    Index("ix_projects_search_vector","search_vector",postgresql_using="gin"),
+  )
   
 
 
@@ -56,6 +98,19 @@ class Task(Base):
   project = relationship("Project",back_populates="tasks") 
   assignee_id = Column(UUID(as_uuid=True),ForeignKey("users.id")) 
   assignee = relationship("User")
+  # Project.version when the row was last written
+  version = Column(Integer,nullable=False,default=0,server_default="0")
+  # soft delete: the row stays as a tombstone for routes/tasks.get_task_changes
+  deleted_at = Column(DateTime,nullable=True)
+  search_vector = search_vector_column()
+  __table_args__ = (
+    # matches the keyset ORDER BY in routes/tasks.get_tasks
+    Index("ix_tasks_project_id_due_date_id",project_id,func.coalesce(due_date,literal_column("'infinity'::timestamp")),id),
+    # GET /api/me/tasks: same order, per assignee
+    Index("ix_tasks_assignee_id_due_date_id",assignee_id,func.coalesce(due_date,literal_column("'infinity'::timestamp")),id),
+    Index("ix_tasks_project_id_version_id",project_id,version,id),
+    Index("ix_tasks_search_vector","search_vector",postgresql_using="gin"),
+  )
 
 
 class StripeSubscription(Base):
@@ -64,5 +119,27 @@ class StripeSubscription(Base):
   user_id = Column(UUID(as_uuid=True),ForeignKey("users.id"))
   user = relationship("User",back_populates="stripe_subscription")
   subscription_id = Column(String)
+  customer_id = Column(String,nullable=True)
   status = Column(String,default=SubscriptionStatus.inactive.value)
-  current_period_start = Column(DateTime,nullable=True)
\ No newline at end of file
+  current_period_start = Column(DateTime,nullable=True)
+  __table_args__ = (
+    Index("ix_stripe_subscriptions_user_id",user_id),
+  )
+
+
+class StripeWebhookEvent(Base):
+  __tablename__ = "stripe_webhook_events"
+  # Stripe event id, so a redelivered event is a no-op insert
+  id = Column(String,primary_key=True)
+  type = Column(String,nullable=False)
+  payload = Column(JSONB,nullable=False)
+  status = Column(String,nullable=False,default=WebhookEventStatus.pending.value)
+  attempts = Column(Integer,nullable=False,default=0)
+  last_error = Column(Text,nullable=True)
+  received_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now())
+  # pending: earliest retry time; processing: lease expiry, after which another worker may take it over
+  next_attempt_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now())
+  processed_at = Column(DateTime(timezone=True),nullable=True)
+  __table_args__ = (
+    Index("ix_stripe_webhook_events_status_next_attempt_at",status,next_attempt_at),
+  )
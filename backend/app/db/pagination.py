@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Any,Callable,Optional,Sequence
+from fastapi import HTTPException,status
+from sqlalchemy import Select,tuple_,literal
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(*values:Any) -> str:
+  payload = json.dumps([None if value is None else str(value) for value in values])
+  return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor:str,*parsers:Callable[[str],Any]) -> list:
+  try:
+    values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    if not isinstance(values,list) or len(values) != len(parsers):
+      raise ValueError(cursor)
+    return [None if value is None else parse(value) for parse,value in zip(parsers,values)]
+  except (ValueError,TypeError):
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Invalid cursor")
+
+
+async def paginate(
+  db:AsyncSession,
+  query:Select,
+  order_by:Sequence[ColumnElement],
+  after:Optional[Sequence[Any]],
+  limit:int,
+  cursor_key:Callable[[Any],Sequence[Any]]
+) -> dict:
+  """Keyset pagination: rows strictly after ``after`` in ``order_by`` order.
+
+  ``after`` holds the decoded cursor values, either plain Python values or SQL
+  expressions, one per ``order_by`` column. ``cursor_key`` maps the last row
+  of a page back to the raw values stored in ``next_cursor``.
+  """
+  if after is not None:
+    bound = [value if isinstance(value,ColumnElement) else literal(value,column.type) for column,value in zip(order_by,after)]
+    query = query.filter(tuple_(*order_by) > tuple_(*bound))
+  rows = (await db.scalars(query.order_by(*order_by).limit(limit + 1))).unique().all()
+  items = rows[:limit]
+  next_cursor = encode_cursor(*cursor_key(items[-1])) if len(rows) > limit else None
+  return {"items":items,"next_cursor":next_cursor}
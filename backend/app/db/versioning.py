@@ -0,0 +1,59 @@
+import hashlib
+from typing import Any,Optional
+from uuid import UUID
+from fastapi import Request,Response,status
+from sqlalchemy import select,update
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import Project,ProjectUser
+
+
+# Project.version counts every change to a project, its tasks and its members.
+# Writers bump it in their own transaction; the row lock that takes orders
+# concurrent writers of a project, so versions follow commit order.
+
+async def bump_project_version(db:AsyncSession,project_id:UUID) -> Optional[int]:
+  return await db.scalar(
+    update(Project).filter(Project.id == project_id)
+    .values(version=Project.version + 1)
+    .returning(Project.version)
+  )
+
+async def bump_user_project_versions(db:AsyncSession,user_id:UUID) -> None:
+  """A user's name or email is part of the member lists of every project they belong to."""
+  await db.execute(
+    update(Project)
+    .filter(Project.id.in_(select(ProjectUser.project_id).filter(ProjectUser.user_id == user_id)))
+    .values(version=Project.version + 1)
+    .execution_options(synchronize_session=False)
+  )
+
+async def get_project_version(db:AsyncSession,project_id:UUID) -> Optional[int]:
+  return await db.scalar(select(Project.version).filter(Project.id == project_id))
+
+
+def weak_etag(*parts:Any) -> str:
+  digest = hashlib.blake2b(":".join(map(str,parts)).encode(),digest_size=8).hexdigest()
+  return f'W/"{digest}"'
+
+def etag_matches(request:Request,etag:str) -> bool:
+  header = request.headers.get("if-none-match")
+  if not header:
+    return False
+  if header.strip() == "*":
+    return True
+  # If-None-Match uses weak comparison
+  return etag.removeprefix("W/") in {tag.strip().removeprefix("W/") for tag in header.split(",")}
+
+def conditional(request:Request,response:Response,*parts:Any) -> Optional[Response]:
+  """Sets the ETag for ``parts`` on ``response``; returns a 304 to send instead when the client already has it."""
+  etag = weak_etag(*parts)
+  headers = {"ETag":etag,"Cache-Control":"private, no-cache"}
+  if etag_matches(request,etag):
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED,headers=headers)
+  response.headers.update(headers)
+  return None
+
+async def conditional_project_read(request:Request,response:Response,db:AsyncSession,project_id:UUID,resource:str) -> Optional[Response]:
+  """Conditional GET for a collection of the project: one primary key lookup decides the 304, the collection is never loaded."""
+  version = await get_project_version(db,project_id)
+  return conditional(request,response,resource,project_id,version,request.url.query)
@@ -1,8 +1,13 @@
 from fastapi import FastAPI,Depends
-from db import models
-from db.database import engine,get_db
-from sqlalchemy.orm import Session
-from routes import auth,users,projects,tasks,stripe_subscription
+from db.database import get_db
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from routes import auth,users,projects,tasks,search,stripe_subscription,metrics,events
+from monitoring.query_metrics import QueryMetricsMiddleware
+from monitoring.prometheus import PrometheusMiddleware
+from config.hashing import password_hasher
+from services.webhook_inbox import webhook_workers
+from services.project_events import broker
 from fastapi.middleware.cors import CORSMiddleware
 
 
@@ -14,23 +19,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*", "stripe-signature"],  
 )
+app.add_middleware(QueryMetricsMiddleware)
+app.add_middleware(PrometheusMiddleware)
 app.include_router(auth.router)
 app.include_router(users.router,prefix="/api")
 app.include_router(projects.router,prefix="/api")
 app.include_router(tasks.router,prefix="/api")
+app.include_router(search.router,prefix="/api")
 app.include_router(stripe_subscription.router,prefix="/api")
-
-def get_db_session(db:Session = Depends(get_db)):
-  return db
+app.include_router(metrics.router)
+app.include_router(events.router)
 
 @app.on_event("startup")
-async def startup():
-  models.Base.metadata.create_all(bind=engine)
+async def start_background_workers():
+  webhook_workers.start()
+  await broker.start()
+
+@app.on_event("shutdown")
+async def shutdown_background_workers():
+  await webhook_workers.stop()
+  await broker.stop()
+  password_hasher.shutdown()
+
+def get_db_session(db:AsyncSession = Depends(get_db)):
+  return db
 
 @app.get("/test-db")
-def test_db(session: Session = Depends(get_db)):
+async def test_db(session: AsyncSession = Depends(get_db)):
     try:
-        session.execute("SELECT 1")
+        await session.execute(text("SELECT 1"))
         return {"status": "Database connected successfully"}
     except Exception as e:
         return {"status": "Error", "details": str(e)}
\ No newline at end of file
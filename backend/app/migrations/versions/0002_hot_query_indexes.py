@@ -0,0 +1,35 @@
+"""hot query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:12.481902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /api/projects: project_user filtered by user_id, paged by project_id
+    op.create_index('ix_project_user_user_id_project_id', 'project_user', ['user_id', 'project_id'], unique=False)
+    # GET /api/projects/{id}/tasks: filtered by project_id, paged by (due_date, id) with NULL due dates last
+    op.create_index('ix_tasks_project_id_due_date_id', 'tasks', ['project_id', sa.text("coalesce(due_date, 'infinity'::timestamp)"), 'id'], unique=False)
+    op.create_index('ix_tasks_assignee_id', 'tasks', ['assignee_id'], unique=False)
+    # subscription checks in create_project, /subscription-status and the Stripe webhooks
+    op.create_index('ix_stripe_subscriptions_user_id', 'stripe_subscriptions', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_stripe_subscriptions_user_id', table_name='stripe_subscriptions')
+    op.drop_index('ix_tasks_assignee_id', table_name='tasks')
+    op.drop_index('ix_tasks_project_id_due_date_id', table_name='tasks')
+    op.drop_index('ix_project_user_user_id_project_id', table_name='project_user')
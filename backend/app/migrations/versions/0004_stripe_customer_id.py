@@ -0,0 +1,27 @@
+"""stripe customer id
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:14:05.602391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # existing users get their customer id stored on their next checkout
+    op.add_column('stripe_subscriptions', sa.Column('customer_id', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stripe_subscriptions', 'customer_id')
@@ -0,0 +1,31 @@
+"""project versions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:02:41.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # constant default, so existing rows are not rewritten
+    op.add_column('projects', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('project_user', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('project_user', 'version')
+    op.drop_column('tasks', 'version')
+    op.drop_column('projects', 'version')
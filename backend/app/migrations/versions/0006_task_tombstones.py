@@ -0,0 +1,31 @@
+"""task tombstones
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 13:47:09.530216
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tasks', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    # GET /api/projects/{id}/tasks/changes: filtered by project_id, paged by (version, id)
+    op.create_index('ix_tasks_project_id_version_id', 'tasks', ['project_id', 'version', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    # tombstones are removed outright, as deletes did before
+    op.execute('DELETE FROM tasks WHERE deleted_at IS NOT NULL')
+    op.drop_index('ix_tasks_project_id_version_id', table_name='tasks')
+    op.drop_column('tasks', 'deleted_at')
@@ -0,0 +1,30 @@
+"""assignee task order index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:21:33.870412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /api/me/tasks: filtered by assignee_id, paged by (due_date, id) with NULL due dates last.
+    # Its leading column also serves every lookup the plain assignee_id index did.
+    op.create_index('ix_tasks_assignee_id_due_date_id', 'tasks', ['assignee_id', sa.text("coalesce(due_date, 'infinity'::timestamp)"), 'id'], unique=False)
+    op.drop_index('ix_tasks_assignee_id', table_name='tasks')
+
+
+def downgrade() -> None:
+    op.create_index('ix_tasks_assignee_id', 'tasks', ['assignee_id'], unique=False)
+    op.drop_index('ix_tasks_assignee_id_due_date_id', table_name='tasks')
@@ -0,0 +1,31 @@
+"""user lookup indexes
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 16:02:47.215903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # GET /api/users/lookup: prefix LIKE on lowercased email / names, ordered by the same key.
+    # Under the "C" collation one btree answers both; text_pattern_ops would not serve the ORDER BY.
+    op.create_index('ix_users_email_pattern', 'users', [sa.text('lower(email) COLLATE "C"')], unique=False)
+    op.create_index('ix_users_full_name_pattern', 'users', [sa.text('lower(first_name) COLLATE "C"'), sa.text('lower(last_name) COLLATE "C"')], unique=False)
+    op.create_index('ix_users_last_name_pattern', 'users', [sa.text('lower(last_name) COLLATE "C"')], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_users_last_name_pattern', table_name='users')
+    op.drop_index('ix_users_full_name_pattern', table_name='users')
+    op.drop_index('ix_users_email_pattern', table_name='users')
@@ -0,0 +1,117 @@
+import time
+from prometheus_client import Counter,Gauge,Histogram,REGISTRY
+from prometheus_client.core import CounterMetricFamily,GaugeMetricFamily
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.routing import Match
+
+LATENCY_BUCKETS = (0.005,0.01,0.025,0.05,0.075,0.1,0.25,0.5,0.75,1.0,2.5,5.0,10.0)
+
+HTTP_REQUESTS = Counter("http_requests_total","HTTP requests handled",["method","route","status"])
+HTTP_LATENCY = Histogram("http_request_duration_seconds","HTTP request latency",["method","route"],buckets=LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight","HTTP requests currently being handled",["method","route"])
+DB_QUERIES = Counter("db_queries","SQL statements executed",["method","route"])
+DB_QUERY_TIME = Counter("db_query_duration_seconds","Time spent executing SQL statements",["method","route"])
+DB_POOL_CHECKOUT = Histogram("db_pool_checkout_duration_seconds","Time to get a connection from the pool, including waits and connects",buckets=LATENCY_BUCKETS)
+DB_POOL_WAITS = Counter("db_pool_checkout_waits","Checkouts that found no idle connection and no overflow headroom")
+PASSWORD_HASH_TIME = Histogram(
+  "password_hash_duration_seconds",
+  "bcrypt hashing and verification time, including time queued for a worker",
+  ["operation"],
+  buckets=(0.05,0.1,0.15,0.2,0.25,0.3,0.4,0.5,0.75,1.0,2.0)
+)
+PASSWORD_HASH_PENDING = Gauge("password_hash_pending","Password operations queued or running in the hashing pool")
+PASSWORD_HASH_REJECTED = Counter("password_hash_rejected","Password operations refused because the hashing pool was saturated",["operation"])
+WEBHOOK_EVENTS = Counter("stripe_webhook_events","Stripe webhook events by outcome (received, duplicate, processed, ignored, retry, dead)",["type","outcome"])
+
+
+def resolve_route(scope) -> str:
+  """Route template (``/api/projects/{project_id}``) so labels stay low cardinality."""
+  app = scope.get("app")
+  for route in getattr(getattr(app,"router",None),"routes",[]):
+    match,_ = route.matches(scope)
+    if match == Match.FULL:
+      return route.path
+  return "unmatched"
+
+
+class PrometheusMiddleware:
+
+  def __init__(self,app):
+    self.app = app
+
+  async def __call__(self,scope,receive,send):
+    if scope["type"] != "http":
+      await self.app(scope,receive,send)
+      return
+    method = scope["method"]
+    route = resolve_route(scope)
+    status_code = 500
+
+    async def send_with_status(message):
+      nonlocal status_code
+      if message["type"] == "http.response.start":
+        status_code = message["status"]
+      await send(message)
+
+    in_flight = HTTP_IN_FLIGHT.labels(method,route)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+      await self.app(scope,receive,send_with_status)
+    finally:
+      HTTP_LATENCY.labels(method,route).observe(time.perf_counter() - start)
+      HTTP_REQUESTS.labels(method,route,str(status_code)).inc()
+      in_flight.dec()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+  """AsyncAdaptedQueuePool that records checkout latency and how often checkouts had to wait."""
+
+  def _do_get(self):
+    if self._max_overflow > -1 and self.checkedin() == 0 and self.overflow() >= self._max_overflow:
+      DB_POOL_WAITS.inc()
+    start = time.perf_counter()
+    try:
+      return super()._do_get()
+    finally:
+      DB_POOL_CHECKOUT.observe(time.perf_counter() - start)
+
+
+class StatsCollector:
+  """Reads pool and cache state at scrape time instead of tracking it on every call."""
+
+  def __init__(self):
+    self.pools = {}
+    self.caches = {}
+
+  def collect(self):
+    size = GaugeMetricFamily("db_pool_size","Configured pool size",labels=["engine"])
+    checked_out = GaugeMetricFamily("db_pool_checked_out","Connections currently checked out",labels=["engine"])
+    checked_in = GaugeMetricFamily("db_pool_checked_in","Idle connections in the pool",labels=["engine"])
+    overflow = GaugeMetricFamily("db_pool_overflow","Connections opened beyond pool_size (negative while below it)",labels=["engine"])
+    for name,pool in self.pools.items():
+      size.add_metric([name],pool.size())
+      checked_out.add_metric([name],pool.checkedout())
+      checked_in.add_metric([name],pool.checkedin())
+      overflow.add_metric([name],pool.overflow())
+    yield from (size,checked_out,checked_in,overflow)
+
+    hits = CounterMetricFamily("cache_hits","Cache hits",labels=["cache"])
+    misses = CounterMetricFamily("cache_misses","Cache misses",labels=["cache"])
+    entries = GaugeMetricFamily("cache_entries","Entries currently cached",labels=["cache"])
+    for name,cache in self.caches.items():
+      stats = cache.stats()
+      hits.add_metric([name],stats["hits"])
+      misses.add_metric([name],stats["misses"])
+      entries.add_metric([name],stats["size"])
+    yield from (hits,misses,entries)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+def register_pool(name:str,pool) -> None:
+  stats_collector.pools[name] = pool
+
+def register_cache(name:str,cache) -> None:
+  stats_collector.caches[name] = cache
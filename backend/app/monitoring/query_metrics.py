@@ -0,0 +1,126 @@
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from monitoring import prometheus
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS","200"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_SAMPLE_RATE","1.0"))
+
+logger = logging.getLogger("slow_query")
+
+
+@dataclass
+class QueryStats:
+  queries: int = 0
+  db_time_ms: float = 0.0
+
+@dataclass
+class RouteQueryStats:
+  requests: int = 0
+  queries: int = 0
+  db_time_ms: float = 0.0
+  max_queries: int = 0
+
+
+# Stats of the request currently running; SQLAlchemy's greenlets inherit the caller's context
+_request_stats:ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats",default=None)
+route_stats:dict[str,RouteQueryStats] = {}
+totals = QueryStats()
+slow_queries = 0
+
+
+def redact(parameters) -> str:
+  if parameters is None:
+    return "[]"
+  if isinstance(parameters,dict):
+    return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key,value in parameters.items()) + "}"
+  if isinstance(parameters,(list,tuple)):
+    return "[" + ", ".join(f"<{type(value).__name__}>" for value in parameters) + "]"
+  return f"<{type(parameters).__name__}>"
+
+
+def _before_cursor_execute(conn,cursor,statement,parameters,context,executemany):
+  conn.info.setdefault("query_start",[]).append(time.perf_counter())
+
+def _after_cursor_execute(conn,cursor,statement,parameters,context,executemany):
+  global slow_queries
+  elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+  totals.queries += 1
+  totals.db_time_ms += elapsed_ms
+  stats = _request_stats.get()
+  if stats is not None:
+    stats.queries += 1
+    stats.db_time_ms += elapsed_ms
+  if elapsed_ms >= SLOW_QUERY_THRESHOLD_MS:
+    slow_queries += 1
+    if random.random() < SLOW_QUERY_SAMPLE_RATE:
+      logger.warning("slow query (%.1f ms): %s params=%s",elapsed_ms," ".join(statement.split()),redact(parameters))
+
+def _handle_error(exception_context):
+  if exception_context.connection is not None and exception_context.connection.info.get("query_start"):
+    exception_context.connection.info["query_start"].pop()
+
+def instrument_engine(engine:Engine) -> None:
+  event.listen(engine,"before_cursor_execute",_before_cursor_execute)
+  event.listen(engine,"after_cursor_execute",_after_cursor_execute)
+  event.listen(engine,"handle_error",_handle_error)
+
+
+class QueryMetricsMiddleware:
+  """Counts queries and DB time per request and folds them into per-route totals."""
+
+  def __init__(self,app):
+    self.app = app
+
+  async def __call__(self,scope,receive,send):
+    if scope["type"] != "http":
+      await self.app(scope,receive,send)
+      return
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+      await self.app(scope,receive,send)
+    finally:
+      _request_stats.reset(token)
+      route = scope.get("route")
+      key = f"{scope['method']} {route.path if route else 'unmatched'}"
+      totals_for_route = route_stats.setdefault(key,RouteQueryStats())
+      totals_for_route.requests += 1
+      totals_for_route.queries += stats.queries
+      totals_for_route.db_time_ms += stats.db_time_ms
+      totals_for_route.max_queries = max(totals_for_route.max_queries,stats.queries)
+      prometheus.DB_QUERIES.labels(scope['method'],route.path if route else 'unmatched').inc(stats.queries)
+      prometheus.DB_QUERY_TIME.labels(scope['method'],route.path if route else 'unmatched').inc(stats.db_time_ms / 1000)
+
+
+def snapshot() -> dict:
+  return {
+    "slow_query_threshold_ms":SLOW_QUERY_THRESHOLD_MS,
+    "slow_queries":slow_queries,
+    "queries":totals.queries,
+    "db_time_ms":round(totals.db_time_ms,3),
+    "routes":{
+      key:{
+        "requests":stats.requests,
+        "queries":stats.queries,
+        "db_time_ms":round(stats.db_time_ms,3),
+        "avg_queries":round(stats.queries / stats.requests,2),
+        "avg_db_time_ms":round(stats.db_time_ms / stats.requests,3),
+        "max_queries":stats.max_queries,
+      }
+      for key,stats in route_stats.items()
+    },
+  }
+
+def reset() -> None:
+  global slow_queries
+  route_stats.clear()
+  totals.queries = 0
+  totals.db_time_ms = 0.0
+  slow_queries = 0
@@ -1,9 +1,12 @@
 from fastapi import APIRouter,Depends,HTTPException,status
 from schemas.user_schema import UserOut,UserCreate
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.database import get_db
 from db.models import User
-from config.security import hash_password,verify_password,create_access_token,verify_token,create_refresh_token,oauth2_scheme
+from config.hashing import password_hasher
+from config.security import create_access_token,verify_token,create_refresh_token,oauth2_scheme
+from routes.users import invalidate_user_lookup
 from fastapi.security import OAuth2PasswordRequestForm
 from jose import JWTError
 
@@ -14,29 +17,37 @@ router = APIRouter()
 
 
 @router.post('/register',response_model=UserOut,tags=['authentication'])
-def register_user(user:UserCreate, db:Session= Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user.email).first()
+async def register_user(user:UserCreate, db:AsyncSession= Depends(get_db)):
+    existing_user = await db.scalar(select(User).filter(User.email == user.email))
     if existing_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Email already exists")
-    password = hash_password(user.password)
+    password = await password_hasher.hash(user.password)
     db_user = User(email=user.email,password=password,first_name=user.first_name,last_name=user.last_name)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    invalidate_user_lookup(db_user)
 
     return db_user
 
 
 @router.post('/login',tags=['authentication'])
-def login_user(form_data:OAuth2PasswordRequestForm = Depends(),db:Session=Depends(get_db)):
+async def login_user(form_data:OAuth2PasswordRequestForm = Depends(),db:AsyncSession=Depends(get_db)):
     if not form_data.username or not form_data.password:
         raise HTTPException(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         detail="Username and password cannot be empty"
     )
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password,user.password):
+    user = await db.scalar(select(User).filter(User.email == form_data.username))
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid credentials")
+    valid,new_hash = await password_hasher.verify(form_data.password,user.password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid credentials")
+    if new_hash:
+        # El hash se genero con otro costo de bcrypt; se reemplaza ahora que tenemos la contraseña en claro
+        user.password = new_hash
+        await db.commit()
     access_token = create_access_token(data={"sub":user.email})
     refresh_token = create_refresh_token(data={"sub": user.email})
     return {
@@ -53,7 +64,7 @@ def login_user(form_data:OAuth2PasswordRequestForm = Depends(),db:Session=Depend
 @router.post('/refresh', tags=['authentication'])
 async def refresh_token_endpoint(
     current_token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         payload = verify_token(current_token)
@@ -64,7 +75,7 @@ async def refresh_token_endpoint(
             )
         
         email = payload.get('sub')
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).filter(User.email == email))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,82 @@
+import asyncio
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter,Depends,HTTPException,WebSocket,WebSocketDisconnect,status
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_db
+from db.pagination import encode_cursor
+from db.versioning import get_project_version
+from config.security import get_current_user
+from config.permissions import get_project_role
+from services.project_events import broker
+
+router = APIRouter()
+
+
+def websocket_token(websocket:WebSocket) -> Optional[str]:
+  # browsers cannot set headers on a WebSocket, so the token may also come as ?token=
+  authorization = websocket.headers.get("authorization","")
+  if authorization.lower().startswith("bearer "):
+    return authorization[7:]
+  return websocket.query_params.get("token")
+
+async def wait_for_disconnect(websocket:WebSocket) -> None:
+  # nothing is expected from the client, but reading is how a disconnect is noticed
+  while (await websocket.receive())["type"] != "websocket.disconnect":
+    pass
+
+
+@router.websocket("/ws/projects/{project_id}")
+async def project_events_socket(websocket:WebSocket,project_id:UUID,db:AsyncSession=Depends(get_db)):
+  """Pushes task.* and member.* events of the project as JSON messages.
+
+  The first message carries the project version and a /tasks/changes cursor;
+  a ``resync`` message means events were dropped for this client and it should
+  catch up through /tasks/changes. The socket is closed with 1008 after a
+  ``member.removed`` for the connected user or a ``project.deleted``.
+  """
+  token = websocket_token(websocket)
+  try:
+    if not token:
+      raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+    current_user = await get_current_user(token,db)
+    if await get_project_role(project_id,current_user.id,db) is None:
+      raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
+    # subscribe before reading the version, so nothing committed after it is missed
+    subscription = broker.subscribe(project_id,current_user.id)
+    version = await get_project_version(db,project_id)
+  except HTTPException:
+    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+    return
+  finally:
+    # the socket may stay open for hours; don't hold a pooled connection meanwhile
+    await db.close()
+
+  disconnect = None
+  try:
+    await websocket.accept()
+    await websocket.send_json({
+      "type":"subscribed",
+      "project_id":str(project_id),
+      "version":version,
+      "cursor":encode_cursor(version,None),
+    })
+    disconnect = asyncio.create_task(wait_for_disconnect(websocket))
+    while True:
+      events = asyncio.create_task(subscription.get())
+      await asyncio.wait({events,disconnect},return_when=asyncio.FIRST_COMPLETED)
+      if disconnect.done():
+        events.cancel()
+        return
+      # while this client is slow to read, new events pile up coalesced in the subscription
+      for event in events.result():
+        await websocket.send_json(event)
+        if subscription.closes(event):
+          await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+          return
+  except WebSocketDisconnect:
+    pass
+  finally:
+    broker.unsubscribe(subscription)
+    if disconnect is not None:
+      disconnect.cancel()
@@ -0,0 +1,15 @@
+from fastapi import APIRouter,Response
+from prometheus_client import generate_latest,CONTENT_TYPE_LATEST
+from monitoring import query_metrics
+
+
+router = APIRouter()
+
+@router.get('/metrics/db',tags=['metrics'])
+async def get_db_metrics():
+  return query_metrics.snapshot()
+
+# Formato de exposicion de texto de Prometheus; los contadores son por proceso
+@router.get('/metrics',include_in_schema=False)
+async def get_prometheus_metrics():
+  return Response(generate_latest(),media_type=CONTENT_TYPE_LATEST)
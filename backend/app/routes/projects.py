@@ -1,91 +1,94 @@
-from fastapi import APIRouter, HTTPException,status, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException,status, Depends, Query, UploadFile, Request, Response
+from sqlalchemy import select,delete,update,and_
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
 from db.database import get_db
-from config.security import get_current_user
+from config.security import get_current_user,CurrentUser
+from config.entitlements import require_active_subscription
+from config.permissions import require_project_member,get_project_role,set_project_role,invalidate_membership,invalidate_project_memberships
 from db.models import User
 from schemas.project_schema import ProjectCreate,ProjectOut,ProjectUpdate
 from schemas.user_schema import UserOut
 from schemas.project_user_schema import ProjectUserCreate
 from db.models import Project,ProjectUser,UserRole
-from typing import List
+from db.pagination import paginate,decode_cursor,DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
+from db.versioning import bump_project_version,conditional,conditional_project_read
+from schemas.page_schema import Page
+from services import project_events
+from services.bulk_import import import_members as run_member_import,read_rows,text_stream,detect_format
+from typing import Literal,Optional
 from uuid import UUID
 
 #Comentarios
 # No estaba definido en los requerimientos pero se considera que se debe manejar
 # los delete como un soft delete, es decir, no se elimina el registro de la base de datos sino que se marca como eliminado cambiando el campo is_active a False
 
-# Para proyectos se considera que se podria agregar una paginacion para manejar gran cantidad y optimizar la busqueda y performance de base de datos.
 # Se piensas que mas adelante se podrian agregar categorias de proyectos y establecer filtros de busqueda, por categorias, usuarios, o completados.
 
 router = APIRouter()
 
 @router.post('/projects',response_model = ProjectOut,tags=['projects'])
-async def create_project(project:ProjectCreate, current_user:User=Depends(get_current_user),db:Session=Depends(get_db)):
-    if not current_user.stripe_subscription:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="User is not subscribed")
+async def create_project(project:ProjectCreate, current_user:CurrentUser=Depends(require_active_subscription),db:AsyncSession=Depends(get_db)):
     new_project = Project(**project.model_dump())
     db.add(new_project)
-    db.commit()
-    db.refresh(new_project)
+    await db.commit()
+    await db.refresh(new_project)
     new_project_user = ProjectUser(project_id=new_project.id,user_id=current_user.id,role= UserRole.admin.value)
     db.add(new_project_user)
-    db.commit()
-    db.refresh(new_project_user)
+    await db.commit()
+    await db.refresh(new_project_user)
+    set_project_role(new_project.id,current_user.id,UserRole.admin.value)
     return new_project
 
 
-@router.get('/projects',response_model = List[ProjectOut], tags=['projects'])
-async def get_projects(current_user: User= Depends(get_current_user),db:Session=Depends(get_db)):
-    project_users = db.query(ProjectUser).filter((ProjectUser.user_id == current_user.id)).all()
-    projects = [pu.project for pu in project_users]
-    return projects
+@router.get('/projects',response_model = Page[ProjectOut], tags=['projects'])
+async def get_projects(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser= Depends(get_current_user),
+    db:AsyncSession=Depends(get_db)
+):
+    return await paginate(
+        db,
+        select(Project).join(ProjectUser).filter(ProjectUser.user_id == current_user.id),
+        (ProjectUser.project_id,),
+        decode_cursor(cursor, UUID) if cursor else None,
+        limit,
+        lambda project: (project.id,)
+    )
 
 @router.get('/projects/{project_id}', response_model=ProjectOut, tags=['projects'])
-async def get_project(project_id: UUID, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
+async def get_project(project_id: UUID, request: Request, response: Response, current_user: CurrentUser = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    project = await db.scalar(select(Project).filter(Project.id == project_id))
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Project not found"
         )
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id
-    ).first()
-    
-    if not project_user:
+    if not await get_project_role(project_id,current_user.id,db):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to access this project"
         )
-    
-    return project_user.project
+    if not_modified := conditional(request, response, "project", project.id, project.version):
+        return not_modified
+    return project
 
 @router.put('/projects/{project_id}', response_model=ProjectOut, tags=["projects"])
 async def update_project(
     project_id: UUID,
     project_update: ProjectUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_project_member(UserRole.admin,'Only project admin can update the project')),
+    db: AsyncSession = Depends(get_db)
 ):
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id,
-        ProjectUser.role == UserRole.admin.value
-    ).first()
-    
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Only project admin can update the project'
-        )
+    update_data = project_update.model_dump(exclude_unset=True)
+    if not update_data:
+        return await db.get(Project,project_id)
 
-    project = project_user.project
-    for key, value in project_update.model_dump(exclude_unset=True).items():
-        setattr(project, key, value)
-    
-    db.commit()
-    db.refresh(project)
+    project = await db.scalar(
+        update(Project).filter(Project.id == project_id).values(**update_data, version=Project.version + 1).returning(Project)
+    )
+    await db.commit()
     return project
 
 
@@ -93,34 +96,24 @@ async def update_project(
 @router.delete('/projects/{project_id}', tags=["projects"])
 async def delete_project(
     project_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_project_member(UserRole.admin,'Only project admin can delete the project')),
+    db: AsyncSession = Depends(get_db)
 ):
-
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id,
-        ProjectUser.role == UserRole.admin.value
-    ).first()
-    
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail='Only project admin can delete the project'
-        )
     try:
-        db.query(ProjectUser).filter(
+        await db.execute(delete(ProjectUser).filter(
             ProjectUser.project_id == project_id
-        ).delete()
+        ))
 
-        project = db.query(Project).filter(Project.id == project_id).first()
+        project = await db.scalar(select(Project).filter(Project.id == project_id))
         if project:
-            db.delete(project) 
-            db.commit()
+            await db.delete(project) 
+            await db.commit()
+            invalidate_project_memberships(project_id)
+            await project_events.publish(project_id,"project.deleted")
             return {"message": "Project deleted successfully"}
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Project not found")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,detail=str(e))
     
 
@@ -129,37 +122,23 @@ async def delete_project(
 async def add_team_member(
     project_id: UUID,
     user_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_project_member(UserRole.admin,"Only project admin can add team members")),
+    db: AsyncSession = Depends(get_db)
 ):
 
-    admin_check = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id,
-        ProjectUser.role == UserRole.admin.value
-    ).first()
-    
-    if not admin_check:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only project admin can add team members"
-        )
-
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    user_row = (await db.execute(
+        select(User.id,ProjectUser.user_id.label("member_id")).outerjoin(ProjectUser,and_(
+            ProjectUser.user_id == User.id,
+            ProjectUser.project_id == project_id
+        )).filter(User.id == user_id)
+    )).first()
+    if not user_row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail='User not found'
         )
     
-
-    existing_member = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == user_id
-    ).first()
-    
-    if existing_member:
+    if user_row.member_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is already a member of this project"
@@ -169,39 +148,47 @@ async def add_team_member(
     new_member = ProjectUser(
         project_id=project_id,
         user_id=user_id,
-        role=UserRole.user.value
+        role=UserRole.user.value,
+        version=await bump_project_version(db, project_id)
     )
     db.add(new_member)
-    db.commit()
+    await db.commit()
+    set_project_role(project_id,user_id,UserRole.user.value)
+    await project_events.publish(project_id,"member.added",user_id,new_member.version,role=new_member.role)
     
-    return admin_check.project
+    return await db.get(Project,project_id)
+
+
+@router.post('/projects/{project_id}/members:import', tags=["projects"])
+async def import_team_members(
+    project_id: UUID,
+    file: UploadFile,
+    format: Optional[Literal["csv","ndjson"]] = Query(None, description="Defaults to the file extension"),
+    current_user: CurrentUser = Depends(require_project_member(UserRole.admin,"Only project admin can add team members")),
+    db: AsyncSession = Depends(get_db)
+):
+    rows = read_rows(text_stream(file.file),format or detect_format(file.filename))
+    try:
+        report = await run_member_import(db,project_id,rows)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="File must be UTF-8 encoded")
+    if report.imported:
+        await project_events.publish(project_id,"members.imported",count=report.imported)
+    return report.as_dict()
 
 
 @router.delete('/projects/{project_id}/members/{user_id}', response_model=ProjectOut, tags=["projects"])
 async def remove_team_member(
     project_id: UUID,
     user_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(require_project_member(UserRole.admin,"Only project admin can remove team members")),
+    db: AsyncSession = Depends(get_db)
 ):
- 
-    admin_check = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id,
-        ProjectUser.role == UserRole.admin.value
-    ).first()
-    
-    if not admin_check:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only project admin can remove team members"
-        )
-
 
-    member = db.query(ProjectUser).filter(
+    member = await db.scalar(select(ProjectUser).options(joinedload(ProjectUser.project)).filter(
         ProjectUser.project_id == project_id,
         ProjectUser.user_id == user_id
-    ).first()
+    ))
     
     if not member:
         raise HTTPException(
@@ -216,32 +203,32 @@ async def remove_team_member(
             detail="Cannot remove the project admin"
         )
 
-    db.delete(member)
-    db.commit()
+    await db.delete(member)
+    version = await bump_project_version(db, project_id)
+    await db.commit()
+    invalidate_membership(project_id,user_id)
+    await project_events.publish(project_id,"member.removed",user_id,version)
     
-    return admin_check.project
+    return member.project
 
 
-@router.get('/projects/{project_id}/members', response_model=List[UserOut], tags=["projects"])
+@router.get('/projects/{project_id}/members', response_model=Page[UserOut], tags=["projects"])
 async def get_project_members(
     project_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(require_project_member()),
+    db: AsyncSession = Depends(get_db)
 ):
-
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id
-    ).first()
-    
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this project"
-        )
-
-    members = db.query(User).join(ProjectUser).filter(
-        ProjectUser.project_id == project_id
-    ).all()
-    
-    return members
\ No newline at end of file
+    if not_modified := await conditional_project_read(request, response, db, project_id, "members"):
+        return not_modified
+    return await paginate(
+        db,
+        select(User).join(ProjectUser).filter(ProjectUser.project_id == project_id),
+        (ProjectUser.user_id,),
+        decode_cursor(cursor, UUID) if cursor else None,
+        limit,
+        lambda user: (user.id,)
+    )
\ No newline at end of file
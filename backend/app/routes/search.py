@@ -0,0 +1,91 @@
+import html
+import re
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter,Depends,HTTPException,Query,status
+from sqlalchemy import select,func,literal,literal_column,union_all,or_,and_,tuple_
+from sqlalchemy.types import REAL,String
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import get_db
+from db.models import Project,ProjectUser,Task,SEARCH_CONFIG
+from db.pagination import encode_cursor,decode_cursor,DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
+from config.security import get_current_user,CurrentUser
+from schemas.search_schema import SearchHit
+from schemas.page_schema import Page
+
+router = APIRouter()
+
+MAX_SEARCH_TERMS = 8
+# control characters can't come from user text, so they mark matches safely until the text is escaped
+START_MATCH,STOP_MATCH = "\x02","\x03"
+HEADLINE_OPTIONS = f"StartSel={START_MATCH}, StopSel={STOP_MATCH}, MaxFragments=2, MaxWords=20, MinWords=8"
+SEARCH_CONFIG_SQL = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+def prefix_tsquery(q:str) -> Optional[str]:
+  """Every word of ``q`` must match the start of a word: "desi rev" finds "design review"."""
+  terms = re.findall(r"\w+",q.lower())[:MAX_SEARCH_TERMS]
+  return " & ".join(f"'{term}':*" for term in terms) or None
+
+def highlight(text:str) -> str:
+  return html.escape(text).replace(START_MATCH,"<mark>").replace(STOP_MATCH,"</mark>")
+
+
+@router.get('/search',response_model=Page[SearchHit],tags=['search'])
+async def search(
+  q:str = Query(...,min_length=1,max_length=200),
+  cursor:Optional[str] = None,
+  limit:int = Query(DEFAULT_PAGE_SIZE,ge=1,le=MAX_PAGE_SIZE),
+  current_user:CurrentUser = Depends(get_current_user),
+  db:AsyncSession = Depends(get_db)
+):
+  terms = prefix_tsquery(q)
+  if terms is None:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Search needs at least one letter or digit")
+  tsquery = func.to_tsquery(SEARCH_CONFIG_SQL,terms)
+  my_projects = select(ProjectUser.project_id).filter(ProjectUser.user_id == current_user.id)
+
+  # Los indices GIN resuelven el @@; la pertenencia al proyecto se comprueba despues
+  hits = union_all(
+    select(
+      literal("task",String).label("type"),Task.id,Task.project_id,Task.title,Task.description,
+      func.ts_rank_cd(Task.search_vector,tsquery).label("rank")
+    ).filter(Task.search_vector.op("@@")(tsquery),Task.project_id.in_(my_projects),Task.deleted_at.is_(None)),
+    select(
+      literal("project",String).label("type"),Project.id,Project.id.label("project_id"),Project.title,Project.description,
+      func.ts_rank_cd(Project.search_vector,tsquery).label("rank")
+    ).filter(Project.search_vector.op("@@")(tsquery),Project.id.in_(my_projects)),
+  ).subquery()
+
+  page = select(hits)
+  if cursor:
+    rank,type,id = decode_cursor(cursor,float,str,UUID)
+    page = page.filter(or_(
+      hits.c.rank < literal(rank,REAL),
+      and_(hits.c.rank == literal(rank,REAL),tuple_(hits.c.type,hits.c.id) > tuple_(literal(type,String),literal(id,hits.c.id.type)))
+    ))
+  page = page.order_by(hits.c.rank.desc(),hits.c.type,hits.c.id).limit(limit + 1).subquery()
+
+  # ts_headline is the expensive part, so it only runs on the rows of the page
+  rows = (await db.execute(
+    select(
+      page.c.type,page.c.id,page.c.project_id,page.c.title,page.c.rank,
+      func.ts_headline(SEARCH_CONFIG_SQL,func.coalesce(page.c.title,""),tsquery,HEADLINE_OPTIONS).label("title_highlight"),
+      func.ts_headline(SEARCH_CONFIG_SQL,func.coalesce(page.c.description,""),tsquery,HEADLINE_OPTIONS).label("snippet"),
+    ).order_by(page.c.rank.desc(),page.c.type,page.c.id)
+  )).all()
+
+  items = [
+    SearchHit(
+      type=row.type,
+      id=row.id,
+      project_id=row.project_id,
+      title=row.title or "",
+      title_highlight=highlight(row.title_highlight),
+      snippet=highlight(row.snippet),
+      rank=row.rank
+    )
+    for row in rows[:limit]
+  ]
+  next_cursor = encode_cursor(rows[limit - 1].rank,rows[limit - 1].type,rows[limit - 1].id) if len(rows) > limit else None
+  return {"items":items,"next_cursor":next_cursor}
@@ -2,44 +2,62 @@ import datetime
 from time import timezone
 from fastapi import APIRouter, Request, Depends, HTTPException
 from schemas.stripe_schema import CreateStripeSubscription
-from config.security import get_current_user
+from config.security import get_current_user,CurrentUser
 from db.database import get_db
-from sqlalchemy.orm import Session
-from db.models import StripeSubscription, SubscriptionStatus, User
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import StripeSubscription, SubscriptionStatus
 import stripe
 import os
-from stripe.error import InvalidRequestError, StripeError
+from stripe.error import InvalidRequestError, SignatureVerificationError, StripeError
+from services.stripe_catalog import product_catalog
+from services.stripe_client import create_customer, create_checkout_session as create_checkout_session_on_stripe
+from config.cache import TTLCache
+from monitoring.prometheus import register_cache
+from services.webhook_inbox import store_event,webhook_workers
 
 
 router = APIRouter()
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
-def register_user_on_stripe(user: User, db: Session) -> User:
-    
-    subscription = db.query(StripeSubscription).filter(
+STRIPE_CUSTOMER_CACHE_TTL_SECONDS = float(os.getenv("STRIPE_CUSTOMER_CACHE_TTL_SECONDS","3600"))
+STRIPE_CUSTOMER_CACHE_MAX_SIZE = int(os.getenv("STRIPE_CUSTOMER_CACHE_MAX_SIZE","10000"))
+
+# Stripe customer id por usuario; nunca cambia una vez creado
+customer_cache = TTLCache(STRIPE_CUSTOMER_CACHE_MAX_SIZE, STRIPE_CUSTOMER_CACHE_TTL_SECONDS)
+register_cache("stripe_customer", customer_cache)
+
+async def get_stripe_customer_id(user: CurrentUser, db: AsyncSession) -> str:
+    customer_id = customer_cache.get(user.id)
+    if customer_id:
+        return customer_id
+
+    subscription = await db.scalar(select(StripeSubscription).filter(
         StripeSubscription.user_id == user.id
-    ).first()
-    
-    if subscription and subscription.subscription_id:
-        return user
+    ))
+
+    if subscription and subscription.customer_id:
+        customer_cache.set(user.id, subscription.customer_id)
+        return subscription.customer_id
+
+    # Se cierra la transaccion de lectura para no retener una conexion del pool mientras se espera a Stripe
+    await db.commit()
+    # La clave de idempotencia evita crear dos clientes si el usuario reintenta el checkout
+    customer_id = await create_customer(user.first_name, user.email, idempotency_key=f"customer-{user.id}")
 
-    
-    stripe_customer = stripe.Customer.create(name=user.first_name, email=user.email)
-    
-    
     if subscription:
-        subscription.subscription_id = stripe_customer["id"]
+        subscription.customer_id = customer_id
     else:
-        subscription = StripeSubscription(
+        db.add(StripeSubscription(
             user_id=user.id,
-            subscription_id=stripe_customer["id"],
+            customer_id=customer_id,
             status=SubscriptionStatus.inactive.value
-        )
-        db.add(subscription)
-    
-    db.commit()
-    db.refresh(subscription)
-    return user
+        ))
+
+    # transaccion corta, solo para guardar el cliente
+    await db.commit()
+    customer_cache.set(user.id, customer_id)
+    return customer_id
 
 def create_datetime_from_stripe_timestamp(timestamp: float) -> datetime:
     datetime_with_stripe_timezone = datetime.fromtimestamp(
@@ -49,53 +67,38 @@ def create_datetime_from_stripe_timestamp(timestamp: float) -> datetime:
 
 
 @router.get("/products", tags=["stripe"])
-async def get_products(_: User= Depends(get_current_user)):
+async def get_products(_: CurrentUser= Depends(get_current_user)):
     try:
-        products = stripe.Product.list(
-            active=True,
-            expand=['data.default_price']
-        )
-
-        formatted_products = [{
-            'id': product.id,
-            'name': product.name,
-            'description': product.description,
-            'price': product.default_price.unit_amount / 100 if product.default_price else None,
-            'price_id': product.default_price.id
-        } for product in products.data]
-
-        return formatted_products
-
+        return await product_catalog.get()
     except StripeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/create-checkout-session", tags=["stripe"])
 async def create_checkout_session(
     request: CreateStripeSubscription,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     try:
-      
-        user = register_user_on_stripe(current_user, db)
-        checkout_session = stripe.checkout.Session.create(
-            customer_email=user.email,
-            payment_method_types=["card"],
-            line_items=[{"price": request.price_id, "quantity": 1}],
-            mode="subscription",
-            success_url="http://front-team-management.s3-website-us-east-1.amazonaws.com/dashboard/projects",
-            cancel_url="http://front-team-management.s3-website-us-east-1.amazonaws.com/dashboard/subscription",
-            metadata={
+        customer_id = await get_stripe_customer_id(current_user, db)
+        return await create_checkout_session_on_stripe({
+            "customer": customer_id,
+            "payment_method_types": ["card"],
+            "line_items": [{"price": request.price_id, "quantity": 1}],
+            "mode": "subscription",
+            "success_url": "http://front-team-management.s3-website-us-east-1.amazonaws.com/dashboard/projects",
+            "cancel_url": "http://front-team-management.s3-website-us-east-1.amazonaws.com/dashboard/subscription",
+            "metadata": {
                 "user_id": str(current_user.id)
             }
-        )
-        print(checkout_session,'this is checkout')
-        return checkout_session
+        })
     except InvalidRequestError as e:
         raise HTTPException(status_code=500, detail=str(e))
+    except StripeError:
+        raise HTTPException(status_code=502, detail="Payment provider unavailable")
 
 @router.post("/webhook", tags=["stripe"])
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     payload = await request.body()
     sig_header = request.headers.get("stripe-signature")
     
@@ -111,78 +114,11 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
             sig_header=sig_header,
             secret=os.getenv("STRIPE_WEBHOOK_SECRET")
         )
-        
-        print(f"Event type received: {event.type}")
-        
-        match event.type:
-            case "checkout.session.completed":
-                subscription_id = event.data.object.get("subscription")
-                user_id = event.data.object.get("metadata", {}).get("user_id")
-                
-                if user_id:
-                    existing_subscription = db.query(StripeSubscription).filter(
-                        StripeSubscription.user_id == user_id
-                    ).first()
-                    
-                    if existing_subscription:
-                        existing_subscription.subscription_id = subscription_id
-                        existing_subscription.status = SubscriptionStatus.active.value
-                        existing_subscription.current_period_start = datetime.datetime.now()
-                        db.commit()
-                    else:
-                        subscription = StripeSubscription(
-                            user_id=user_id,
-                            subscription_id=subscription_id,
-                            status=SubscriptionStatus.active.value,
-                            current_period_start=datetime.datetime.now()
-                        )
-                        db.add(subscription)
-                        db.commit()
-                    print(f"Subscription updated for user {user_id}")
-            
-            case "charge.updated":
-                # Just log the event and return success
-                print(f"Charge updated event received: {event.data.object.id}")
-            case "invoice.payment_succeeded":
-                subscription_id = event.data.object.get("subscription")
-                customer_email = event.data.object.get("customer_email")
-               
-                if customer_email:
-
-                    user = db.query(User).filter(
-                        User.email == customer_email
-                    ).first()
-                   
-                    if user:
-                        existing_subscription = db.query(StripeSubscription).filter(
-                            StripeSubscription.user_id == user.id
-                        ).first()
-                       
-                        if existing_subscription:
-                            existing_subscription.status = SubscriptionStatus.active.value
-                            existing_subscription.current_period_start = datetime.datetime.now()
-                            existing_subscription.subscription_id = subscription_id
-                        else:
-                            subscription = StripeSubscription(
-                                user_id=user.id,
-                                subscription_id=subscription_id,
-                                status=SubscriptionStatus.active.value,
-                                current_period_start=datetime.datetime.now()
-                            )
-                            db.add(subscription)
-                        db.commit()
-                        print(f"Subscription payment processed for user {user.id}")
-                else:
-                    print("No customer email found in the event")
-            
-            case _:
-                # Handle any other event type gracefully
-                print(f"Unhandled event type: {event.type}")
-                
-        return {"status": "success", "type": event.type}
-        
-    except Exception as e:
-        print(f"Error processing webhook: {str(e)}")
-        # Return 200 for events we don't need to handle
-        # This prevents Stripe from retrying webhooks unnecessarily
-        return {"status": "success", "message": "Event acknowledged"}
\ No newline at end of file
+    except (ValueError, SignatureVerificationError):
+        raise HTTPException(status_code=400, detail="Invalid Stripe webhook")
+
+    # Se guarda el evento y se responde de inmediato; los workers de services.webhook_inbox lo procesan
+    stored = await store_event(db, event, payload)
+    if stored:
+        webhook_workers.notify()
+    return {"status": "received", "type": event.type, "duplicate": not stored}
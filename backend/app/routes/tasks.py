@@ -1,78 +1,405 @@
-from fastapi import APIRouter,HTTPException,status,Depends
-from sqlalchemy.orm import Session
-from db.database import get_db
-from config.security import get_current_user
-from db.models import User,Task,TaskStatus,ProjectUser,UserRole
-from schemas.task_schema import TaskCreate,TaskOut,TaskUpdate
-from typing import List
-from uuid import UUID
+from fastapi import APIRouter,HTTPException,status,Depends,Query,UploadFile,Request,Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select,insert,update,func,literal,literal_column,tuple_,and_
+from sqlalchemy.orm import aliased,joinedload
+from sqlalchemy.ext.asyncio import AsyncSession,async_sessionmaker
+from db.database import get_db,get_session_factory
+from config.security import CurrentUser,get_current_user
+from config.permissions import require_project_member,get_project_role
+from db.models import Project,ProjectUser,Task,TaskStatus,User,UserRole
+from db.pagination import paginate,encode_cursor,decode_cursor,DEFAULT_PAGE_SIZE,MAX_PAGE_SIZE
+from db.versioning import bump_project_version,get_project_version,conditional_project_read
+from schemas.task_schema import TaskCreate,TaskOut,TaskUpdate,TaskBatchRequest,TaskBatchResult,TaskBatchItemResult,TaskChange,TaskChanges,ProjectStats,AssigneeWorkload,to_naive_utc
+from schemas.page_schema import Page
+from services import project_events
+from services.bulk_import import import_tasks as run_task_import,read_rows,text_stream,detect_format
+from typing import List,Literal,Optional
+from datetime import datetime,timedelta
+from uuid import UUID,uuid4
+from collections import defaultdict
+import csv
+import io
+import json
 
 
 #Comentarios
 # No estaba definido en los requerimientos pero se considera que se debe manejar
 # los delete como un soft delete, es decir, no se elimina el registro de la base de datos sino que se marca como eliminado cambiando el campo is_active a False
-# Para manejar un alto volumen de task y de performance con la base de datos se consideraria agregar un paginacion e ir trayendo tareas de 25 en 25 segun se especifique
 # Tambien se penso que se podria agregar un historial de tareas.
 
 router = APIRouter()
 
-@router.post('/projects/{project_id}/tasks',response_model=TaskOut,tags=["tasks"])
-async def create_task(project_id:UUID,task:TaskCreate,current_user:User=Depends(get_current_user),db:Session=Depends(get_db)):
-  project_user = db.query(ProjectUser).filter(ProjectUser.project_id == project_id, ProjectUser.user_id == current_user.id).first()
-  if not project_user:
-    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="Not authorized to access this project")
+# Tasks without a due date sort last; coalescing keeps the keyset a NOT NULL tuple
+NO_DUE_DATE = literal_column("'infinity'::timestamp")
+# deleted tasks stay behind as tombstones for /tasks/changes
+LIVE_TASK = Task.deleted_at.is_(None)
+TASK_ORDER = (func.coalesce(Task.due_date,NO_DUE_DATE),Task.id)
+# the search vector is never read back from writes
+TASK_RETURNING = [column for column in Task.__table__.c if column.key != "search_vector"]
+
+# Export: server-side cursor read in batches of EXPORT_BATCH_SIZE rows, one chunk per batch
+CHANGES_PAGE_SIZE = 200
+MAX_CHANGES_PAGE_SIZE = 1000
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = (
+  Task.id,Task.title,Task.description,Task.status,Task.due_date,Task.project_id,Task.assignee_id,
+  User.email.label("assignee_email"),
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+def encode_csv_header() -> str:
+  buffer = io.StringIO()
+  csv.writer(buffer).writerow(EXPORT_FIELDS)
+  return buffer.getvalue()
+
+def encode_csv(rows) -> str:
+  buffer = io.StringIO()
+  csv.writer(buffer).writerows(["" if value is None else value.isoformat() if isinstance(value,datetime) else value for value in row] for row in rows)
+  return buffer.getvalue()
+
+def encode_ndjson(rows) -> str:
+  return "".join(json.dumps(dict(row._mapping),default=lambda value: value.isoformat() if isinstance(value,datetime) else str(value)) + "\n" for row in rows)
+
+def decode_task_cursor(cursor:str) -> tuple:
+  due_date,task_id = decode_cursor(cursor,datetime.fromisoformat,UUID)
+  return (due_date if due_date is not None else NO_DUE_DATE,task_id)
+
+def task_event_data(task:Task) -> dict:
+  return TaskOut.model_validate(task).model_dump(mode="json")
+
+def live_task(project_id:UUID,task_id:UUID):
+  return and_(Task.id == task_id,Task.project_id == project_id,LIVE_TASK)
 
-  db_task = Task(**task.model_dump(),project_id=project_id,status=TaskStatus.pending.value)
+def project_member(project_id:UUID,user_id:UUID,role:Optional[UserRole] = None):
+  query = select(ProjectUser.user_id).filter(ProjectUser.project_id == project_id,ProjectUser.user_id == user_id)
+  if role is not None:
+    query = query.filter(ProjectUser.role == role.value)
+  return query.exists()
+
+async def change_task(db:AsyncSession,project_id:UUID,task_id:UUID,values:dict,*guards) -> Optional[Task]:
+  """Bumps the project version and writes `values` to the live task in a single statement.
+
+  Nothing is written unless the task exists and every guard holds; returns the
+  changed task with its assignee loaded, or None.
+  """
+  bump = (
+    update(Project)
+    .filter(Project.id == project_id,select(Task.id).filter(live_task(project_id,task_id)).exists(),*guards)
+    .values(version=Project.version + 1)
+    .returning(Project.version)
+    .cte("bump")
+  )
+  version = select(bump.c.version)
+  changed = (
+    update(Task)
+    .filter(live_task(project_id,task_id),version.exists())
+    .values({**values,"version":version.scalar_subquery()})
+    .returning(*TASK_RETURNING)
+    .cte("changed")
+  )
+  # the outer SELECT must read the task from the CTE: the tasks table still shows it as it was
+  task = aliased(Task,changed)
+  return await db.scalar(select(task).options(joinedload(task.assignee)))
+
+async def task_access(db:AsyncSession,project_id:UUID,task_id:UUID,user_id:UUID,assignee_id:Optional[UUID] = None) -> tuple:
+  """(caller role, task exists, assignee is a member): why a guarded read or write found nothing."""
+  return (await db.execute(select(
+    select(ProjectUser.role).filter(ProjectUser.project_id == project_id,ProjectUser.user_id == user_id).scalar_subquery(),
+    select(Task.id).filter(live_task(project_id,task_id)).exists(),
+    project_member(project_id,assignee_id) if assignee_id is not None else literal(True),
+  ))).one()
+
+@router.post('/projects/{project_id}/tasks',response_model=TaskOut,tags=["tasks"])
+async def create_task(project_id:UUID,task:TaskCreate,current_user:CurrentUser=Depends(require_project_member()),db:AsyncSession=Depends(get_db)):
+  version = await bump_project_version(db,project_id)
+  db_task = Task(**task.model_dump(),project_id=project_id,status=TaskStatus.pending.value,version=version)
   db.add(db_task)
-  db.commit()
-  db.refresh(db_task)
+  await db.commit()
+  await db.refresh(db_task,["assignee"])
+  await project_events.publish(project_id,"task.created",db_task.id,version,task=task_event_data(db_task))
   return db_task
 
-@router.get('/projects/{project_id}/tasks', response_model=List[TaskOut], tags=['tasks'])
+@router.post('/projects/{project_id}/tasks:batch',response_model=TaskBatchResult,tags=["tasks"])
+async def batch_tasks(project_id:UUID,batch:TaskBatchRequest,current_user:CurrentUser=Depends(require_project_member()),db:AsyncSession=Depends(get_db)):
+  operations = batch.operations
+  role = await get_project_role(project_id,current_user.id,db)
+
+  # Una consulta para todos los responsables y otra para todas las tareas referenciadas
+  assignee_ids = {op.assignee_id for op in operations if op.op != "delete" and op.assignee_id is not None}
+  members = set((await db.scalars(select(ProjectUser.user_id).filter(
+    ProjectUser.project_id == project_id,
+    ProjectUser.user_id.in_(assignee_ids)
+  ))).all()) if assignee_ids else set()
+  task_ids = [op.id for op in operations if op.op != "create"]
+  existing = set((await db.scalars(select(Task.id).filter(
+    Task.project_id == project_id,
+    Task.id.in_(task_ids),
+    LIVE_TASK
+  ))).all()) if task_ids else set()
+
+  valid_statuses = {task_status.value for task_status in TaskStatus}
+  results = []
+  seen = set()
+  creates,updates,deletes = [],defaultdict(list),[]
+  for index,op in enumerate(operations):
+    task_id = uuid4() if op.op == "create" else op.id
+    values = op.model_dump(exclude_unset=True,exclude={"op","id"}) if op.op != "delete" else {}
+    error = None
+    if op.op != "create" and task_id in seen:
+      error = (status.HTTP_409_CONFLICT,"Task appears more than once in the batch")
+    elif op.op != "create" and task_id not in existing:
+      error = (status.HTTP_404_NOT_FOUND,"Task not found")
+    elif op.op == "delete" and role != UserRole.admin.value:
+      error = (status.HTTP_403_FORBIDDEN,"Only project admin can delete tasks")
+    elif "status" in values and values["status"] not in valid_statuses:
+      error = (status.HTTP_400_BAD_REQUEST,"Invalid status")
+    elif values.get("assignee_id") is not None and values["assignee_id"] not in members:
+      error = (status.HTTP_400_BAD_REQUEST,"Assignee must be a project member")
+    seen.add(task_id)
+
+    if error:
+      results.append(TaskBatchItemResult(index=index,op=op.op,id=None if op.op == "create" else task_id,status=error[0],error=error[1]))
+      continue
+    if op.op == "create":
+      creates.append({**values,"id":task_id,"project_id":project_id,"status":TaskStatus.pending.value})
+      results.append(TaskBatchItemResult(index=index,op=op.op,id=task_id,status=status.HTTP_201_CREATED))
+    elif op.op == "update":
+      if values:
+        # las actualizaciones con los mismos valores se aplican en un solo UPDATE ... WHERE id IN (...)
+        updates[tuple(sorted(values.items()))].append(task_id)
+      results.append(TaskBatchItemResult(index=index,op=op.op,id=task_id,status=status.HTTP_200_OK))
+    else:
+      deletes.append(task_id)
+      results.append(TaskBatchItemResult(index=index,op=op.op,id=task_id,status=status.HTTP_200_OK))
+
+  failed = any(result.error for result in results)
+  if batch.atomic and failed:
+    for result in results:
+      if result.error is None:
+        result.status,result.error = status.HTTP_424_FAILED_DEPENDENCY,"Not applied, another operation in the batch failed"
+        if result.op == "create":
+          result.id = None
+    return TaskBatchResult(applied=False,results=results)
+
+  if not (creates or updates or deletes):
+    return TaskBatchResult(applied=False,results=results)
+  version = await bump_project_version(db,project_id)
+  if creates:
+    await db.execute(insert(Task),[{**values,"version":version} for values in creates])
+  for values,ids in updates.items():
+    await db.execute(update(Task).filter(Task.project_id == project_id,Task.id.in_(ids)).values({**dict(values),"version":version}).execution_options(synchronize_session=False))
+  if deletes:
+    await db.execute(update(Task).filter(Task.project_id == project_id,Task.id.in_(deletes)).values(deleted_at=func.now(),version=version).execution_options(synchronize_session=False))
+  await db.commit()
+  # los cambios del lote se notifican sin el cuerpo de la tarea, que aqui no se carga
+  for result in results:
+    if result.error is None:
+      event_type = {"create":"task.created","update":"task.updated","delete":"task.deleted"}[result.op]
+      await project_events.publish(project_id,event_type,result.id,version)
+  return TaskBatchResult(applied=True,results=results)
+
+@router.post('/projects/{project_id}/tasks:import',tags=["tasks"])
+async def import_tasks(
+  project_id:UUID,
+  file:UploadFile,
+  format:Optional[Literal["csv","ndjson"]] = Query(None,description="Defaults to the file extension"),
+  current_user:CurrentUser=Depends(require_project_member(UserRole.admin,"Only project admin can import tasks")),
+  db:AsyncSession=Depends(get_db)
+):
+  rows = read_rows(text_stream(file.file),format or detect_format(file.filename))
+  try:
+    report = await run_task_import(db,project_id,rows)
+  except UnicodeDecodeError:
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="File must be UTF-8 encoded")
+  if report.imported:
+    await project_events.publish(project_id,"tasks.imported",count=report.imported)
+  return report.as_dict()
+
+@router.get('/projects/{project_id}/tasks', response_model=Page[TaskOut], tags=['tasks'])
 async def get_tasks(
     project_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(require_project_member()),
+    db: AsyncSession = Depends(get_db)
 ):
+    if not_modified := await conditional_project_read(request, response, db, project_id, "tasks"):
+        return not_modified
+    return await paginate(
+        db,
+        select(Task).options(joinedload(Task.assignee)).filter(Task.project_id == project_id, LIVE_TASK),
+        TASK_ORDER,
+        decode_task_cursor(cursor) if cursor else None,
+        limit,
+        lambda task: (task.due_date, task.id)
+    )
 
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id
-    ).first()
+@router.get('/me/tasks', response_model=Page[TaskOut], tags=['tasks'])
+async def get_my_tasks(
+    status: Optional[List[TaskStatus]] = Query(None),
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = Query(None, description="Exclusive"),
+    project_id: Optional[List[UUID]] = Query(None),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Recorre ix_tasks_assignee_id_due_date_id en el orden de la pagina; el join
+    # descarta las tareas de proyectos de los que el usuario ya no es miembro
+    query = (
+        select(Task)
+        .options(joinedload(Task.assignee))
+        .join(ProjectUser, and_(ProjectUser.project_id == Task.project_id, ProjectUser.user_id == current_user.id))
+        .filter(Task.assignee_id == current_user.id, LIVE_TASK)
+    )
+    if status:
+        query = query.filter(Task.status.in_([task_status.value for task_status in status]))
+    if due_from:
+        query = query.filter(Task.due_date >= to_naive_utc(due_from))
+    if due_to:
+        query = query.filter(Task.due_date < to_naive_utc(due_to))
+    if project_id:
+        query = query.filter(Task.project_id.in_(project_id))
+    return await paginate(
+        db,
+        query,
+        TASK_ORDER,
+        decode_task_cursor(cursor) if cursor else None,
+        limit,
+        lambda task: (task.due_date, task.id)
+    )
 
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this project"
+@router.get('/projects/{project_id}/stats', response_model=ProjectStats, tags=['tasks'])
+async def get_project_stats(
+    project_id: UUID,
+    current_user: CurrentUser = Depends(require_project_member()),
+    db: AsyncSession = Depends(get_db)
+):
+    # Un solo GROUP BY por responsable; los totales del proyecto se suman aqui
+    now = datetime.utcnow()
+    open_task = Task.status != TaskStatus.completed.value
+    rows = (await db.execute(
+        select(
+            User,
+            func.count().label("total"),
+            *[func.count().filter(Task.status == task_status.value).label(task_status.value) for task_status in TaskStatus],
+            func.count().filter(open_task, Task.due_date < now).label("overdue"),
+            func.count().filter(open_task, Task.due_date >= now, Task.due_date < now + timedelta(days=7)).label("due_this_week"),
         )
+        .select_from(Task)
+        .outerjoin(User, User.id == Task.assignee_id)
+        .filter(Task.project_id == project_id, LIVE_TASK)
+        .group_by(User.id)
+    )).all()
+
+    workload = sorted(
+        (AssigneeWorkload(
+            assignee=row.User,
+            total=row.total,
+            open=row.total - row.completed,
+            overdue=row.overdue
+        ) for row in rows),
+        key=lambda load: (-load.open, load.assignee is None)
+    )
+    return ProjectStats(
+        total=sum(row.total for row in rows),
+        by_status={task_status.value: sum(getattr(row, task_status.value) for row in rows) for task_status in TaskStatus},
+        overdue=sum(row.overdue for row in rows),
+        due_this_week=sum(row.due_this_week for row in rows),
+        workload=workload
+    )
+
+@router.get('/projects/{project_id}/tasks/changes', response_model=TaskChanges, tags=['tasks'])
+async def get_task_changes(
+    project_id: UUID,
+    since: Optional[str] = Query(None, description="Cursor returned by the previous call; omit it for a full sync"),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE),
+    current_user: CurrentUser = Depends(require_project_member()),
+    db: AsyncSession = Depends(get_db)
+):
+    # Cada escritura deja en la tarea la version del proyecto que genero, y esas
+    # versiones siguen el orden de commit, asi que (version, id) sirve de cursor
+    query = select(Task).options(joinedload(Task.assignee)).filter(Task.project_id == project_id)
+    if since:
+        version, task_id = decode_cursor(since, int, UUID)
+        if task_id is None:
+            query = query.filter(Task.version > version)
+        else:
+            query = query.filter(tuple_(Task.version, Task.id) > tuple_(literal(version), literal(task_id, Task.id.type)))
+    else:
+        # a full sync has nothing to delete yet
+        query = query.filter(LIVE_TASK)
+    tasks = (await db.scalars(query.order_by(Task.version, Task.id).limit(limit + 1))).unique().all()
+
+    page = tasks[:limit]
+    if page:
+        cursor = encode_cursor(page[-1].version, page[-1].id)
+    else:
+        cursor = since or encode_cursor(await get_project_version(db, project_id), None)
+    return TaskChanges(
+        changes=[
+            TaskChange(id=task.id, deleted=task.deleted_at is not None, task=None if task.deleted_at is not None else task)
+            for task in page
+        ],
+        cursor=cursor,
+        has_more=len(tasks) > limit
+    )
 
-    return db.query(Task).filter(Task.project_id == project_id).all()
+@router.get('/projects/{project_id}/tasks/export', tags=['tasks'])
+async def export_tasks(
+    project_id: UUID,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    current_user: CurrentUser = Depends(require_project_member()),
+    session_factory: async_sessionmaker = Depends(get_session_factory)
+):
+    query = (
+        select(*EXPORT_COLUMNS)
+        .outerjoin(User, User.id == Task.assignee_id)
+        .filter(Task.project_id == project_id, LIVE_TASK)
+        .order_by(*TASK_ORDER)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    encode = encode_csv if format == "csv" else encode_ndjson
+
+    async def stream():
+        # la respuesta empieza despues de cerrar la sesion de get_db, asi que el stream abre la suya y la cierra al terminar
+        async with session_factory() as db:
+            result = await db.stream(query)
+            if format == "csv":
+                yield encode_csv_header()
+            async for rows in result.partitions():
+                yield encode(rows)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="tasks-{project_id}.{format}"'}
+    return StreamingResponse(stream(), media_type=media_type, headers=headers)
 
 @router.get('/projects/{project_id}/tasks/{task_id}', response_model=TaskOut, tags=['tasks'])
 async def get_task_by_id(
     project_id: UUID,
     task_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
 
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id
-    ).first()
-
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this project"
-        )
+    # la membresia se comprueba en la misma consulta que carga la tarea
+    task = await db.scalar(
+        select(Task)
+        .join(ProjectUser, and_(ProjectUser.project_id == Task.project_id, ProjectUser.user_id == current_user.id))
+        .options(joinedload(Task.assignee))
+        .filter(live_task(project_id, task_id))
+    )
 
-    task = db.query(Task).filter(
-        Task.id == task_id,
-        Task.project_id == project_id
-    ).first()
-    
     if not task:
+        role, _, _ = await task_access(db, project_id, task_id, current_user.id)
+        if role is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this project"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
@@ -84,94 +411,74 @@ async def update_task(
     project_id: UUID,
     task_id: UUID,
     task_update: TaskUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
 
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id
-    ).first()
+    update_data = task_update.model_dump(exclude_unset=True)
+    valid_status = not ('status' in update_data and update_data['status'] not in [status.value for status in TaskStatus])
+    assignee_id = update_data.get('assignee_id')
 
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this project"
-        )
+    task = None
+    if valid_status:
+        guards = [project_member(project_id, current_user.id)]
+        if assignee_id is not None:
+            guards.append(project_member(project_id, assignee_id))
+        task = await change_task(db, project_id, task_id, update_data, *guards)
 
-    task = db.query(Task).filter(
-        Task.id == task_id,
-        Task.project_id == project_id
-    ).first()
-    
     if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Task not found"
-        )
-
-    update_data = task_update.model_dump(exclude_unset=True)
-
-    if 'status' in update_data:
-        if update_data['status'] not in [status.value for status in TaskStatus]:
+        role, task_exists, assignee_is_member = await task_access(db, project_id, task_id, current_user.id, assignee_id)
+        if role is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to access this project"
+            )
+        if not task_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        if not valid_status:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid status"
             )
+        if not assignee_is_member:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Assignee must be a project member"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task changed concurrently, retry"
+        )
 
-    
-    if 'assignee_id' in update_data:
-
-        if update_data['assignee_id'] is not None:
-            assignee_membership = db.query(ProjectUser).filter(
-                ProjectUser.project_id == project_id,
-                ProjectUser.user_id == update_data['assignee_id']
-            ).first()
-            
-            if not assignee_membership:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Assignee must be a project member"
-                )
-
-    for field, value in update_data.items():
-        setattr(task, field, value)
-
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await project_events.publish(project_id, "task.updated", task.id, task.version, task=task_event_data(task))
     return task
 
 @router.delete('/projects/{project_id}/tasks/{task_id}', tags=['tasks'])
 async def delete_task(
     project_id: UUID,
     task_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
 
-    project_user = db.query(ProjectUser).filter(
-        ProjectUser.project_id == project_id,
-        ProjectUser.user_id == current_user.id,
-        ProjectUser.role == UserRole.admin.value
-    ).first()
+    task = await change_task(db, project_id, task_id, {"deleted_at": func.now()}, project_member(project_id, current_user.id, UserRole.admin))
 
-    if not project_user:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only project admin can delete tasks"
-        )
-
-    task = db.query(Task).filter(
-        Task.id == task_id,
-        Task.project_id == project_id
-    ).first()
-    
     if not task:
+        role, task_exists, _ = await task_access(db, project_id, task_id, current_user.id)
+        if role != UserRole.admin.value:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only project admin can delete tasks"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
 
-    db.delete(task)
-    db.commit()
-    return {"message": "Task deleted successfully"}
\ No newline at end of file
+    await db.commit()
+    await project_events.publish(project_id, "task.deleted", task.id, task.version)
+    return {"message": "Task deleted successfully"}
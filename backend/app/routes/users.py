@@ -1,10 +1,20 @@
-from fastapi import APIRouter,Depends,HTTPException,status
-from sqlalchemy.orm import Session
-from db.models import User,StripeSubscription,SubscriptionStatus
-from config.security import get_current_user
+from fastapi import APIRouter,Depends,HTTPException,status,Query,Response
+from sqlalchemy import select,func,union
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import User
+from config.entitlements import get_entitlement
+from config.security import get_current_user,CurrentUser,invalidate_principal
 from db.database import get_db
-from config.security import hash_password
+from config.hashing import password_hasher
+from db.pagination import paginate,decode_cursor,MAX_PAGE_SIZE
+from db.versioning import bump_user_project_versions
 from schemas.user_schema import UserOut,UserUpdate
+from schemas.page_schema import Page
+from config.cache import TTLCache
+from monitoring.prometheus import register_cache
+from typing import List,Optional
+from uuid import UUID
+import os
 
 
 #Comentarios
@@ -13,49 +23,78 @@ from schemas.user_schema import UserOut,UserUpdate
 
 router = APIRouter()
 
+USER_LOOKUP_MAX_RESULTS = 20
+USER_LOOKUP_MAX_NAME_WORDS = 4
+USER_LOOKUP_CACHE_TTL_SECONDS = float(os.getenv("USER_LOOKUP_CACHE_TTL_SECONDS","30"))
+USER_LOOKUP_CACHE_MAX_SIZE = int(os.getenv("USER_LOOKUP_CACHE_MAX_SIZE","10000"))
+
+# (normalized prefix, limit) -> matching users; typeahead sends the same short prefixes over and over
+user_lookup_cache = TTLCache(USER_LOOKUP_CACHE_MAX_SIZE,USER_LOOKUP_CACHE_TTL_SECONDS)
+register_cache("user_lookup",user_lookup_cache)
+
+def invalidate_user_lookup(user:User) -> None:
+  """Drops the cached lookups a newly created user now belongs in."""
+  names = [" ".join(value.lower().split()) for value in (user.email,user.first_name or "",user.last_name or "")]
+  names.append(f"{names[1]} {names[2]}")
+  user_lookup_cache.invalidate_matching(lambda key: any(name.startswith(key[0]) for name in names))
+
 # Se implementaron rutas de perfil para editar perfil borrar perfil y actualizar perfil que no se encuentran en el frontend por falta de tiempo pero se les considero la funcionalidad
 
 
 @router.get('/profile',response_model=UserOut,tags=['users'])
-async def get_profile(user:User= Depends(get_current_user)):
+async def get_profile(user:CurrentUser= Depends(get_current_user)):
   return user
 
 
 @router.put('/profile',response_model=UserOut,tags=['users'])
 async def update_user(
   user_update:UserUpdate,
-  current_user:User=Depends(get_current_user),
-  db:Session=Depends(get_db)
+  current_user:CurrentUser=Depends(get_current_user),
+  db:AsyncSession=Depends(get_db)
 ):
+  user = await db.get(User,current_user.id)
   if user_update.email:
-    existing_user = db.query(User).filter(User.email == user_update.email).first()
-    if existing_user and existing_user.id != current_user.id:
+    existing_user = await db.scalar(select(User).filter(User.email == user_update.email))
+    if existing_user and existing_user.id != user.id:
       raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Email already exists")
     
-    current_user.email = user_update.email
-    current_user.first_name = user_update.first_name
-    current_user.last_name = user_update.last_name
+    user.email = user_update.email
+    user.first_name = user_update.first_name
+    user.last_name = user_update.last_name
+    await bump_user_project_versions(db,user.id)
   if user_update.password:
-    current_user.hashed_password = hash_password(user_update.password)
-  db.commit()
-  db.refresh(current_user)
-  return current_user
+    user.password = await password_hasher.hash(user_update.password)
+  await db.commit()
+  await db.refresh(user)
+  invalidate_principal(current_user.email)
+  invalidate_principal(user.email)
+  user_lookup_cache.clear()
+  return user
 
-@router.get("/users",response_model=list[UserOut],tags=['users'])
-async def get_users(skip:int=0,limit:int=10,db:Session=Depends(get_db)):
+@router.get("/users",response_model=Page[UserOut],tags=['users'])
+async def get_users(cursor:Optional[str]=None,limit:int=Query(10,ge=1,le=MAX_PAGE_SIZE),db:AsyncSession=Depends(get_db)):
   
-  return db.query(User).offset(skip).limit(limit).all()
+  return await paginate(
+    db,
+    select(User),
+    (User.id,),
+    decode_cursor(cursor,UUID) if cursor else None,
+    limit,
+    lambda user: (user.id,)
+  )
 
 
 @router.delete('/profile',tags=["users"])
 async def delete_user(
-  current_user:User=Depends(get_current_user),
-  db:Session=Depends(get_db)
+  current_user:CurrentUser=Depends(get_current_user),
+  db:AsyncSession=Depends(get_db)
 
 ):
   try:
-    db.delete(current_user)
-    db.commit()
+    await db.delete(await db.get(User,current_user.id))
+    await db.commit()
+    invalidate_principal(current_user.email)
+    user_lookup_cache.clear()
     return {"message": "User deleted successfully"}
   except Exception as e:
     raise HTTPException(
@@ -63,13 +102,57 @@ async def delete_user(
       detail = "Error deleting user"
     )
 
+def like_prefix(value:str) -> str:
+  return value.replace("\\","\\\\").replace("%","\\%").replace("_","\\_") + "%"
+
+@router.get('/users/lookup',response_model=List[UserOut],tags=['users'])
+async def lookup_users(
+  response:Response,
+  q:str = Query(...,min_length=1,max_length=100),
+  limit:int = Query(10,ge=1,le=USER_LOOKUP_MAX_RESULTS),
+  current_user:CurrentUser=Depends(get_current_user),
+  db:AsyncSession=Depends(get_db)
+):
+  prefix = " ".join(q.lower().split())
+  response.headers["Cache-Control"] = f"private, max-age={int(USER_LOOKUP_CACHE_TTL_SECONDS)}"
+  users = user_lookup_cache.get((prefix,limit))
+  if users is not None:
+    return users
+
+  # Cada rama recorre su indice en orden y se detiene en `limit` filas
+  email,first_name,last_name = (func.lower(column).collate("C") for column in (User.email,User.first_name,User.last_name))
+  pattern = like_prefix(prefix)
+  branches = [
+    select(User.id).filter(email.like(pattern)).order_by(email).limit(limit),
+    select(User.id).filter(first_name.like(pattern)).order_by(first_name,last_name).limit(limit),
+    select(User.id).filter(last_name.like(pattern)).order_by(last_name).limit(limit),
+  ]
+  # "ana gar" -> first_name 'ana' and last_name 'gar%', trying every space as the split
+  words = prefix.split(" ")
+  for split in range(1,min(len(words),USER_LOOKUP_MAX_NAME_WORDS)):
+    branches.append(
+      select(User.id)
+      .filter(first_name == " ".join(words[:split]),last_name.like(like_prefix(" ".join(words[split:]))))
+      .order_by(last_name)
+      .limit(limit)
+    )
+  matches = union(*branches).subquery()
+  users = [
+    UserOut.model_validate(user)
+    for user in (await db.scalars(
+      select(User).filter(User.id.in_(select(matches.c.id))).order_by(email).limit(limit)
+    )).all()
+  ]
+  user_lookup_cache.set((prefix,limit),users)
+  return users
+
 @router.get('/users/search', response_model=UserOut, tags=['users'])
 async def search_user(
     email: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).filter(User.email == email))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,14 +162,12 @@ async def search_user(
 
 @router.get('/subscription-status', tags=['users'])
 async def get_subscription_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    subscription = db.query(StripeSubscription).filter(
-        StripeSubscription.user_id == current_user.id
-    ).first()
-    
+    entitlement = await get_entitlement(current_user.id, db)
     return {
-        "status": subscription.status if subscription else SubscriptionStatus.inactive.value
+        "status": entitlement.status,
+        "is_active": entitlement.is_active
     }
   
\ No newline at end of file
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from uuid import UUID
+from typing import Literal
+
+class SearchHit(BaseModel):
+  type:Literal["task","project"]
+  id:UUID
+  project_id:UUID
+  title:str
+  # HTML-escaped, with the matched words wrapped in <mark>
+  title_highlight:str
+  snippet:str
+  rank:float
@@ -1,8 +1,15 @@
-from pydantic import BaseModel
+from pydantic import BaseModel,Field,field_validator
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime,timezone
 from schemas.user_schema import UserOut
-from typing import Optional
+from typing import Annotated,Dict,List,Literal,Optional,Union
+
+
+def to_naive_utc(v:Optional[datetime]) -> Optional[datetime]:
+  # tasks.due_date is a naive timestamp column and asyncpg rejects aware datetimes for it
+  if v is not None and v.tzinfo is not None:
+    return v.astimezone(timezone.utc).replace(tzinfo=None)
+  return v
 
 
 class TaskBase(BaseModel):
@@ -10,6 +17,9 @@ class TaskBase(BaseModel):
   description:str
   due_date:datetime
   assignee_id: Optional[UUID] = None
+  @field_validator('due_date')
+  def validate_due_date(cls, v):
+    return to_naive_utc(v)
 
 class TaskCreate(TaskBase):
   pass
@@ -20,12 +30,77 @@ class TaskUpdate(BaseModel):
   due_date: Optional[datetime] = None
   assignee_id: Optional[UUID] = None
   status: Optional[str] = None
+  @field_validator('due_date')
+  def validate_due_date(cls, v):
+    return to_naive_utc(v)
 
 class TaskOut(TaskBase):
   id:UUID
+  due_date: Optional[datetime] = None
   project_id:UUID
   status:str
   assignee:Optional[UserOut] = None
 
   class Config:
-    from_attributes = True
\ No newline at end of file
+    from_attributes = True
+
+
+class TaskChange(BaseModel):
+  id:UUID
+  deleted:bool
+  # None for deleted tasks
+  task:Optional[TaskOut] = None
+
+class TaskChanges(BaseModel):
+  changes:List[TaskChange]
+  # pass back as ?since= to get the next changes
+  cursor:str
+  has_more:bool
+
+
+class AssigneeWorkload(BaseModel):
+  # None for the unassigned tasks
+  assignee:Optional[UserOut] = None
+  total:int
+  open:int
+  overdue:int
+
+class ProjectStats(BaseModel):
+  total:int
+  by_status:Dict[str,int]
+  # open tasks past their due date / due within the next 7 days
+  overdue:int
+  due_this_week:int
+  workload:List[AssigneeWorkload]
+
+
+MAX_BATCH_OPERATIONS = 500
+
+class TaskBatchCreate(TaskCreate):
+  op: Literal["create"]
+
+class TaskBatchUpdate(TaskUpdate):
+  op: Literal["update"]
+  id: UUID
+
+class TaskBatchDelete(BaseModel):
+  op: Literal["delete"]
+  id: UUID
+
+TaskBatchOperation = Annotated[Union[TaskBatchCreate,TaskBatchUpdate,TaskBatchDelete],Field(discriminator="op")]
+
+class TaskBatchRequest(BaseModel):
+  operations: List[TaskBatchOperation] = Field(min_length=1,max_length=MAX_BATCH_OPERATIONS)
+  # all or nothing: if any operation fails, none is applied
+  atomic: bool = False
+
+class TaskBatchItemResult(BaseModel):
+  index: int
+  op: str
+  id: Optional[UUID] = None
+  status: int
+  error: Optional[str] = None
+
+class TaskBatchResult(BaseModel):
+  applied: bool
+  results: List[TaskBatchItemResult]
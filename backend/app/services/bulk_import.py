@@ -0,0 +1,266 @@
+"""Bulk import of tasks and project members from CSV or NDJSON.
+
+Rows are read and validated one chunk at a time, assignee/member emails are
+resolved with one query per chunk, and tasks are loaded with PostgreSQL COPY
+(multi-row INSERT for members, which need ON CONFLICT). Invalid rows are
+skipped and reported; everything else is committed in one transaction.
+
+Task columns: title, description, status, due_date, assignee_email.
+Member columns: email, role.
+
+    cd backend/app
+    python -m services.bulk_import --project <project_id> --kind tasks tasks.csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import logging
+import time
+from dataclasses import dataclass,field
+from datetime import datetime
+from itertools import islice
+from typing import Callable,Iterable,Iterator,Optional,TextIO
+from uuid import UUID,uuid4
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models import ProjectUser,Task,TaskStatus,User,UserRole
+from config.permissions import set_project_role
+from db.versioning import bump_project_version
+from schemas.task_schema import to_naive_utc
+
+IMPORT_CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+TASK_COLUMNS = ("id","title","description","status","due_date","project_id","assignee_id","version")
+TASK_STATUSES = {task_status.value for task_status in TaskStatus}
+MEMBER_ROLES = {role.value for role in UserRole}
+
+logger = logging.getLogger("bulk_import")
+
+
+@dataclass
+class ImportReport:
+  processed: int = 0
+  imported: int = 0
+  skipped: int = 0
+  failed: int = 0
+  errors: list = field(default_factory=list)
+  started_at: float = field(default_factory=time.perf_counter)
+
+  def error(self,line:int,message:str) -> None:
+    self.failed += 1
+    if len(self.errors) < MAX_REPORTED_ERRORS:
+      self.errors.append({"line":line,"error":message})
+
+  def as_dict(self) -> dict:
+    elapsed = time.perf_counter() - self.started_at
+    return {
+      "processed":self.processed,
+      "imported":self.imported,
+      "skipped":self.skipped,
+      "failed":self.failed,
+      "errors":self.errors,
+      "elapsed_s":round(elapsed,3),
+      "rows_per_second":round(self.processed / elapsed) if elapsed else None,
+    }
+
+
+def read_rows(file:TextIO,format:str) -> Iterator[tuple]:
+  """Yields (line number, row dict or ValueError) without reading the whole file."""
+  if format == "csv":
+    reader = csv.DictReader(file)
+    try:
+      for row in reader:
+        yield reader.line_num,row
+    except csv.Error as e:
+      # e.g. an unclosed quote running into the field size limit; the rows after it can't be trusted
+      yield reader.reader.line_num,ValueError(f"Invalid CSV, import stopped here: {e}")
+    return
+  for line_number,line in enumerate(file,1):
+    if not line.strip():
+      continue
+    try:
+      row = json.loads(line)
+      yield line_number,row if isinstance(row,dict) else ValueError("Each line must be a JSON object")
+    except ValueError:
+      yield line_number,ValueError("Invalid JSON")
+
+def chunked(rows:Iterable,size:int) -> Iterator[list]:
+  rows = iter(rows)
+  while chunk := list(islice(rows,size)):
+    yield chunk
+
+def text(value) -> Optional[str]:
+  if value is None:
+    return None
+  value = str(value).strip()
+  if "\x00" in value:
+    raise ValueError("Text cannot contain NUL characters")
+  return value or None
+
+
+def parse_task(row:dict) -> tuple:
+  title = text(row.get("title"))
+  if not title:
+    raise ValueError("title is required")
+  status = text(row.get("status")) or TaskStatus.pending.value
+  if status not in TASK_STATUSES:
+    raise ValueError("Invalid status")
+  due_date = text(row.get("due_date"))
+  if due_date:
+    try:
+      due_date = to_naive_utc(datetime.fromisoformat(due_date))
+    except ValueError:
+      raise ValueError("Invalid due_date")
+  return title,text(row.get("description")) or "",status,due_date,text(row.get("assignee_email"))
+
+def parse_member(row:dict) -> tuple:
+  email = text(row.get("email"))
+  if not email:
+    raise ValueError("email is required")
+  role = text(row.get("role")) or UserRole.user.value
+  if role not in MEMBER_ROLES:
+    raise ValueError("Invalid role")
+  return email,role
+
+
+def parse_chunk(chunk:list,parse:Callable,report:ImportReport) -> list:
+  parsed = []
+  for line,row in chunk:
+    try:
+      if isinstance(row,ValueError):
+        raise row
+      parsed.append((line,parse(row)))
+    except ValueError as e:
+      report.error(line,str(e))
+  return parsed
+
+async def resolve_emails(db:AsyncSession,emails:set,project_id:Optional[UUID] = None) -> dict:
+  query = select(User.email,User.id).filter(User.email.in_(emails))
+  if project_id is not None:
+    query = query.join(ProjectUser,ProjectUser.user_id == User.id).filter(ProjectUser.project_id == project_id)
+  return dict((await db.execute(query)).all())
+
+async def copy_tasks(db:AsyncSession,records:list) -> None:
+  connection = await db.connection()
+  raw = await connection.get_raw_connection()
+  await raw.driver_connection.copy_records_to_table(Task.__tablename__,records=records,columns=TASK_COLUMNS)
+
+
+async def import_tasks(
+  db:AsyncSession,
+  project_id:UUID,
+  rows:Iterable[tuple],
+  on_progress:Optional[Callable[[ImportReport],None]] = None,
+  chunk_size:int = IMPORT_CHUNK_SIZE
+) -> ImportReport:
+  report = ImportReport()
+  assignees = {}
+  version = None
+  for chunk in chunked(rows,chunk_size):
+    parsed = parse_chunk(chunk,parse_task,report)
+    if parsed and version is None:
+      version = await bump_project_version(db,project_id)
+    emails = {task[4] for _,task in parsed if task[4] and task[4] not in assignees}
+    if emails:
+      found = await resolve_emails(db,emails,project_id)
+      assignees.update({email:found.get(email) for email in emails})
+
+    records = []
+    for line,(title,description,status,due_date,email) in parsed:
+      assignee_id = assignees[email] if email else None
+      if email and assignee_id is None:
+        report.error(line,"Assignee must be a project member")
+        continue
+      records.append((uuid4(),title,description,status,due_date,project_id,assignee_id,version))
+    if records:
+      await copy_tasks(db,records)
+    report.processed += len(chunk)
+    report.imported += len(records)
+    if on_progress:
+      on_progress(report)
+  await db.commit()
+  logger.info("project %s: imported %d tasks, %d failed",project_id,report.imported,report.failed)
+  return report
+
+
+async def import_members(
+  db:AsyncSession,
+  project_id:UUID,
+  rows:Iterable[tuple],
+  on_progress:Optional[Callable[[ImportReport],None]] = None,
+  chunk_size:int = IMPORT_CHUNK_SIZE
+) -> ImportReport:
+  report = ImportReport()
+  imported = {}
+  version = None
+  for chunk in chunked(rows,chunk_size):
+    parsed = parse_chunk(chunk,parse_member,report)
+    users = await resolve_emails(db,{email for _,(email,_) in parsed}) if parsed else {}
+
+    values = {}
+    for line,(email,role) in parsed:
+      if email not in users:
+        report.error(line,"User not found")
+      elif users[email] in values:
+        report.error(line,"User appears more than once in the file")
+      else:
+        values[users[email]] = role
+    if values:
+      if version is None:
+        version = await bump_project_version(db,project_id)
+      inserted = (await db.scalars(
+        insert(ProjectUser)
+        .values([{"project_id":project_id,"user_id":user_id,"role":role,"version":version} for user_id,role in values.items()])
+        .on_conflict_do_nothing(index_elements=[ProjectUser.project_id,ProjectUser.user_id])
+        .returning(ProjectUser.user_id)
+      )).all()
+      imported.update({user_id:values[user_id] for user_id in inserted})
+      report.imported += len(inserted)
+      report.skipped += len(values) - len(inserted)
+    report.processed += len(chunk)
+    if on_progress:
+      on_progress(report)
+  await db.commit()
+  logger.info("project %s: imported %d members, %d failed",project_id,report.imported,report.failed)
+  # la cache de membresias solo se actualiza una vez confirmada la transaccion
+  for user_id,role in imported.items():
+    set_project_role(project_id,user_id,role)
+  return report
+
+
+IMPORTERS = {"tasks":import_tasks,"members":import_members}
+
+def detect_format(filename:Optional[str]) -> str:
+  return "ndjson" if filename and filename.lower().endswith((".ndjson",".jsonl")) else "csv"
+
+def text_stream(binary) -> TextIO:
+  # utf-8-sig drops the BOM spreadsheet exports add; newline="" is what csv expects
+  return io.TextIOWrapper(binary,encoding="utf-8-sig",newline="")
+
+
+async def main(args):
+  from db.database import AsyncSessionLocal,async_engine
+
+  def progress(report:ImportReport):
+    stats = report.as_dict()
+    print(f"processed {stats['processed']:>9}  imported {stats['imported']:>9}  failed {stats['failed']:>6}  {stats['rows_per_second']:>8} rows/s")
+
+  format = args.format or detect_format(args.path)
+  with open(args.path,"rb") as binary:
+    async with AsyncSessionLocal() as db:
+      report = await IMPORTERS[args.kind](db,args.project,read_rows(text_stream(binary),format),progress,args.chunk_size)
+  await async_engine.dispose()
+  print(json.dumps(report.as_dict(),indent=2))
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("path")
+  parser.add_argument("--project",type=UUID,required=True)
+  parser.add_argument("--kind",choices=IMPORTERS,default="tasks")
+  parser.add_argument("--format",choices=["csv","ndjson"],help="defaults to the file extension")
+  parser.add_argument("--chunk-size",type=int,default=IMPORT_CHUNK_SIZE)
+  asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any,Dict,Optional,Set
+from uuid import UUID
+
+EVENTS_BROKER = os.getenv("EVENTS_BROKER","memory")
+REDIS_URL = os.getenv("REDIS_URL","redis://localhost:6379/0")
+EVENTS_REDIS_CHANNEL = os.getenv("EVENTS_REDIS_CHANNEL","project-events")
+# distinct tasks/members a slow client may have pending before it is told to resync
+EVENTS_SUBSCRIBER_BUFFER = int(os.getenv("EVENTS_SUBSCRIBER_BUFFER","256"))
+
+logger = logging.getLogger("project_events")
+RESYNC = ("resync",None)
+
+
+def event_key(event:dict) -> tuple:
+  """Events with the same key supersede each other while a client has not received them yet."""
+  kind = event["type"].split(".")[0]
+  return (kind,event.get("id"))
+
+
+class Subscription:
+  """Pending events of one connection, coalesced per task/member and bounded.
+
+  Publishers never wait on a client: a newer event for the same task or member
+  replaces the queued one, and once more than ``max_pending`` entities are
+  pending the queue is dropped and replaced by a single ``resync`` event, after
+  which the client catches up through ``/tasks/changes``.
+
+  Events that end the subscription (the project is deleted, or the subscribed
+  user is removed from it) are never folded: they are kept apart and ``get()``
+  returns only them from then on.
+  """
+
+  def __init__(self,project_id:UUID,max_pending:int,user_id:Optional[UUID] = None):
+    self.project_id = project_id
+    self.max_pending = max_pending
+    self.user_id = user_id
+    self._pending:OrderedDict = OrderedDict()
+    self._closing:Optional[dict] = None
+    self._lock = threading.Lock()
+    self._ready = asyncio.Event()
+    self._loop = asyncio.get_running_loop()
+
+  def closes(self,event:dict) -> bool:
+    if event["type"] == "project.deleted":
+      return True
+    return event["type"] == "member.removed" and self.user_id is not None and event.get("id") == str(self.user_id)
+
+  def put(self,event:dict) -> None:
+    with self._lock:
+      resync = self._pending.get(RESYNC)
+      if self._closing is not None:
+        return
+      if self.closes(event):
+        # nothing else is delivered to a client that lost access
+        self._closing = event
+        self._pending.clear()
+      elif resync is not None:
+        resync["version"] = event.get("version")
+      else:
+        key = event_key(event)
+        if key in self._pending:
+          self._pending[key] = coalesce(self._pending[key],event)
+        elif len(self._pending) < self.max_pending:
+          self._pending[key] = event
+        else:
+          self._pending.clear()
+          self._pending[RESYNC] = {"type":"resync","project_id":event["project_id"],"version":event.get("version")}
+    self._wake()
+
+  def resync(self) -> None:
+    with self._lock:
+      self._pending.clear()
+      self._pending[RESYNC] = {"type":"resync","project_id":str(self.project_id),"version":None}
+    self._wake()
+
+  def _wake(self) -> None:
+    # publishers may run on another loop or thread than the connection
+    try:
+      same_loop = asyncio.get_running_loop() is self._loop
+    except RuntimeError:
+      same_loop = False
+    if same_loop:
+      self._ready.set()
+    elif not self._loop.is_closed():
+      self._loop.call_soon_threadsafe(self._ready.set)
+
+  async def get(self) -> list:
+    """Waits for events and returns everything pending, oldest first."""
+    while True:
+      if self._closing is None:
+        await self._ready.wait()
+      self._ready.clear()
+      with self._lock:
+        if self._closing is not None:
+          return [self._closing]
+        events = list(self._pending.values())
+        self._pending.clear()
+      if events:
+        return events
+
+
+def coalesce(queued:dict,event:dict) -> dict:
+  # a task created and changed before the client saw it is still new to the client
+  if queued["type"].endswith(".created") and event["type"].endswith(".updated"):
+    return {**event,"type":queued["type"]}
+  return event
+
+
+class MemoryBroker:
+  """Fan-out to the connections of this process."""
+
+  def __init__(self,max_pending:int = EVENTS_SUBSCRIBER_BUFFER):
+    self.max_pending = max_pending
+    self._subscriptions:Dict[UUID,Set[Subscription]] = {}
+    self._lock = threading.Lock()
+
+  async def start(self) -> None:
+    pass
+
+  async def stop(self) -> None:
+    pass
+
+  def subscribe(self,project_id:UUID,user_id:Optional[UUID] = None) -> Subscription:
+    subscription = Subscription(project_id,self.max_pending,user_id)
+    with self._lock:
+      self._subscriptions.setdefault(project_id,set()).add(subscription)
+    return subscription
+
+  def unsubscribe(self,subscription:Subscription) -> None:
+    with self._lock:
+      subscriptions = self._subscriptions.get(subscription.project_id,set())
+      subscriptions.discard(subscription)
+      if not subscriptions:
+        self._subscriptions.pop(subscription.project_id,None)
+
+  def deliver(self,event:dict) -> None:
+    with self._lock:
+      subscriptions = list(self._subscriptions.get(UUID(event["project_id"]),()))
+    for subscription in subscriptions:
+      subscription.put(event)
+
+  def resync_all(self) -> None:
+    with self._lock:
+      subscriptions = [subscription for project in self._subscriptions.values() for subscription in project]
+    for subscription in subscriptions:
+      subscription.resync()
+
+  async def publish(self,event:dict) -> None:
+    self.deliver(event)
+
+
+class RedisBroker(MemoryBroker):
+  """Relays events through Redis pub/sub so every worker process sees them.
+
+  Needs the ``redis`` package; any server speaking the Redis protocol works.
+  """
+
+  def __init__(self,url:str = REDIS_URL,channel:str = EVENTS_REDIS_CHANNEL,max_pending:int = EVENTS_SUBSCRIBER_BUFFER):
+    super().__init__(max_pending)
+    import redis.asyncio as redis
+    self.redis = redis.from_url(url)
+    self.channel = channel
+    self._reader:Optional[asyncio.Task] = None
+
+  async def start(self) -> None:
+    self._reader = asyncio.create_task(self._read())
+
+  async def _read(self) -> None:
+    connected_before = False
+    while True:
+      try:
+        async with self.redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+          await pubsub.subscribe(self.channel)
+          if connected_before:
+            # events published while disconnected are lost
+            self.resync_all()
+          connected_before = True
+          async for message in pubsub.listen():
+            self.deliver(json.loads(message["data"]))
+      except asyncio.CancelledError:
+        raise
+      except Exception:
+        logger.exception("redis event relay failed, reconnecting")
+        await asyncio.sleep(1)
+
+  async def stop(self) -> None:
+    if self._reader is not None:
+      self._reader.cancel()
+      await asyncio.gather(self._reader,return_exceptions=True)
+      self._reader = None
+    await self.redis.aclose()
+
+  async def publish(self,event:dict) -> None:
+    await self.redis.publish(self.channel,json.dumps(event))
+
+
+def build_broker(name:str = EVENTS_BROKER) -> MemoryBroker:
+  if name == "redis":
+    return RedisBroker()
+  return MemoryBroker()
+
+broker = build_broker()
+
+
+async def publish(project_id:UUID,type:str,id:Any = None,version:Optional[int] = None,**data:Any) -> None:
+  """Sends an event to the project's subscribers; call it after the change is committed."""
+  event = {"type":type,"project_id":str(project_id),"id":None if id is None else str(id),"version":version,**data}
+  try:
+    await broker.publish(event)
+  except Exception:
+    # a lost notification only delays clients until their next sync
+    logger.exception("could not publish %s for project %s",type,project_id)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import Future,ThreadPoolExecutor
+from threading import Lock
+from typing import Callable,Optional
+from services.stripe_client import list_products
+
+PRODUCT_CATALOG_TTL_SECONDS = float(os.getenv("PRODUCT_CATALOG_TTL_SECONDS","300"))
+PRODUCT_CATALOG_STALE_SECONDS = float(os.getenv("PRODUCT_CATALOG_STALE_SECONDS","3600"))
+
+logger = logging.getLogger("stripe_catalog")
+
+
+def fetch_products() -> list:
+  return [{
+    'id': product.id,
+    'name': product.name,
+    'description': product.description,
+    'price': product.default_price.unit_amount / 100 if product.default_price else None,
+    'price_id': product.default_price.id if product.default_price else None
+  } for product in list_products()]
+
+
+class StaleWhileRevalidate:
+  """Caches the result of a blocking ``fetch`` and refreshes it on a background thread.
+
+  Fresh for ``ttl`` seconds; after that the cached value keeps being served for
+  up to ``stale_ttl`` more seconds while a single refresh runs. Only a cold (or
+  too stale) cache makes the caller wait, and concurrent callers share that
+  one fetch. A failed refresh keeps the previous value.
+  """
+
+  def __init__(self,fetch:Callable[[],object],ttl:float,stale_ttl:float):
+    self.fetch = fetch
+    self.ttl = ttl
+    self.stale_ttl = stale_ttl
+    self._value = None
+    self._fetched_at:Optional[float] = None
+    self._invalidated_at = float("-inf")
+    self._inflight:Optional[Future] = None
+    self._lock = Lock()
+    self._executor = ThreadPoolExecutor(max_workers=1,thread_name_prefix="catalog-refresh")
+
+  def _load(self,started_at:float):
+    value = self.fetch()
+    with self._lock:
+      # fetched_at is when the fetch started, so an invalidation that arrives mid-fetch still marks it stale
+      self._value = value
+      self._fetched_at = started_at
+    return value
+
+  def _finished(self,future:Future) -> None:
+    with self._lock:
+      if self._inflight is future:
+        self._inflight = None
+    if future.exception() is not None:
+      logger.warning("catalog refresh failed: %s",future.exception())
+
+  def _refresh(self) -> Future:
+    with self._lock:
+      if self._inflight is None:
+        self._inflight = self._executor.submit(self._load,time.monotonic())
+        self._inflight.add_done_callback(self._finished)
+      return self._inflight
+
+  def _age(self) -> Optional[float]:
+    if self._fetched_at is None:
+      return None
+    if self._fetched_at <= self._invalidated_at:
+      return float("inf") if self._value is None else self.ttl
+    return time.monotonic() - self._fetched_at
+
+  async def get(self):
+    with self._lock:
+      value,age = self._value,self._age()
+    if age is not None and age < self.ttl:
+      return value
+    if age is not None and age < self.ttl + self.stale_ttl:
+      self._refresh()
+      return value
+    try:
+      return await asyncio.wrap_future(self._refresh())
+    except Exception:
+      if value is None:
+        raise
+      return value
+
+  async def refresh(self):
+    return await asyncio.wrap_future(self._refresh())
+
+  def invalidate(self) -> None:
+    """Marks the cached value stale and starts a refresh; readers keep getting it until the refresh lands."""
+    with self._lock:
+      self._invalidated_at = time.monotonic()
+      warm = self._value is not None
+    if warm:
+      self._refresh()
+
+  def clear(self) -> None:
+    with self._lock:
+      self._value = None
+      self._fetched_at = None
+
+
+product_catalog = StaleWhileRevalidate(fetch_products,PRODUCT_CATALOG_TTL_SECONDS,PRODUCT_CATALOG_STALE_SECONDS)
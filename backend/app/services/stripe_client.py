@@ -0,0 +1,73 @@
+import asyncio
+import os
+from threading import Lock
+from typing import Optional
+from weakref import WeakKeyDictionary
+import stripe
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+# Points the client at another server, e.g. benchmarks/stripe_stub.py for offline runs
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
+STRIPE_TIMEOUT_SECONDS = float(os.getenv("STRIPE_TIMEOUT_SECONDS","10"))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv("STRIPE_MAX_NETWORK_RETRIES","2"))
+
+
+class StripeApi:
+  """StripeClients on httpx, so calls reuse pooled connections and never block the event loop.
+
+  httpx async pools belong to the event loop that opened them, so there is one
+  client per running loop (one in a normal uvicorn worker) and a separate one
+  with sync methods for code running on worker threads.
+  """
+
+  def __init__(self,api_key:Optional[str],api_base:Optional[str],timeout:float,max_network_retries:int):
+    self.api_key = api_key
+    self.api_base = api_base
+    self.timeout = timeout
+    self.max_network_retries = max_network_retries
+    self._async_clients = WeakKeyDictionary()
+    self._sync_client:Optional[stripe.StripeClient] = None
+    self._lock = Lock()
+
+  def _build(self,allow_sync_methods:bool) -> stripe.StripeClient:
+    return stripe.StripeClient(
+      self.api_key or "",
+      base_addresses={"api":self.api_base} if self.api_base else {},
+      max_network_retries=self.max_network_retries,
+      http_client=stripe.HTTPXClient(timeout=self.timeout,allow_sync_methods=allow_sync_methods),
+    )
+
+  @property
+  def client(self) -> stripe.StripeClient:
+    loop = asyncio.get_running_loop()
+    client = self._async_clients.get(loop)
+    if client is None:
+      client = self._async_clients[loop] = self._build(allow_sync_methods=False)
+    return client
+
+  @property
+  def sync_client(self) -> stripe.StripeClient:
+    with self._lock:
+      if self._sync_client is None:
+        self._sync_client = self._build(allow_sync_methods=True)
+      return self._sync_client
+
+
+stripe_api = StripeApi(STRIPE_SECRET_KEY,STRIPE_API_BASE,STRIPE_TIMEOUT_SECONDS,STRIPE_MAX_NETWORK_RETRIES)
+
+
+async def create_customer(name:str,email:str,idempotency_key:str) -> str:
+  customer = await stripe_api.client.customers.create_async(
+    params={"name":name,"email":email},
+    options={"idempotency_key":idempotency_key},
+  )
+  return customer.id
+
+async def create_checkout_session(params:dict) -> stripe.checkout.Session:
+  return await stripe_api.client.checkout.sessions.create_async(params=params)
+
+def list_products() -> list:
+  return stripe_api.sync_client.products.list(params={"active":True,"expand":["data.default_price"]}).data
@@ -0,0 +1,230 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import uuid
+from typing import Awaitable,Callable,Dict,Optional
+import stripe
+from sqlalchemy import select,update,or_,func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.database import AsyncSessionLocal
+from db.models import StripeSubscription,StripeWebhookEvent,SubscriptionStatus,User,WebhookEventStatus
+from monitoring.prometheus import WEBHOOK_EVENTS
+from services.stripe_catalog import product_catalog
+from config.entitlements import invalidate_entitlement
+
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS","2"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS","8"))
+WEBHOOK_POLL_SECONDS = float(os.getenv("WEBHOOK_POLL_SECONDS","1"))
+WEBHOOK_LEASE_SECONDS = float(os.getenv("WEBHOOK_LEASE_SECONDS","60"))
+
+logger = logging.getLogger("stripe_webhooks")
+
+Handler = Callable[[AsyncSession,stripe.Event],Awaitable[None]]
+handlers:Dict[str,Handler] = {}
+
+def on_commit(db:AsyncSession,callback:Callable[[],None]) -> None:
+  """Runs ``callback`` once the event's transaction commits, e.g. to drop caches of what it changed."""
+  db.info.setdefault("on_commit",[]).append(callback)
+
+def handles(*event_types:str):
+  def register(handler:Handler) -> Handler:
+    for event_type in event_types:
+      handlers[event_type] = handler
+    return handler
+  return register
+
+
+# Handlers run inside the transaction that marks the event processed, so a
+# failure rolls back both; they must also be safe to run again after a crash.
+
+@handles("checkout.session.completed")
+async def checkout_session_completed(db:AsyncSession,event:stripe.Event) -> None:
+  subscription_id = event.data.object.get("subscription")
+  user_id = event.data.object.get("metadata",{}).get("user_id")
+  if not user_id:
+    return
+  await activate_subscription(db,user_id,subscription_id)
+
+@handles("invoice.payment_succeeded")
+async def invoice_payment_succeeded(db:AsyncSession,event:stripe.Event) -> None:
+  subscription_id = event.data.object.get("subscription")
+  customer_email = event.data.object.get("customer_email")
+  if not customer_email:
+    logger.info("invoice %s has no customer email",event.data.object.get("id"))
+    return
+  user_id = await db.scalar(select(User.id).filter(User.email == customer_email))
+  if user_id:
+    await activate_subscription(db,user_id,subscription_id)
+
+@handles(
+  "product.created","product.updated","product.deleted",
+  "price.created","price.updated","price.deleted",
+)
+async def catalog_changed(db:AsyncSession,event:stripe.Event) -> None:
+  product_catalog.invalidate()
+
+async def activate_subscription(db:AsyncSession,user_id,subscription_id:Optional[str]) -> None:
+  user_id = uuid.UUID(str(user_id))
+  on_commit(db,lambda: invalidate_entitlement(user_id))
+  existing_subscription = await db.scalar(select(StripeSubscription).filter(StripeSubscription.user_id == user_id))
+  if existing_subscription:
+    existing_subscription.subscription_id = subscription_id
+    existing_subscription.status = SubscriptionStatus.active.value
+    existing_subscription.current_period_start = datetime.datetime.now()
+  else:
+    db.add(StripeSubscription(
+      user_id=user_id,
+      subscription_id=subscription_id,
+      status=SubscriptionStatus.active.value,
+      current_period_start=datetime.datetime.now()
+    ))
+
+
+async def store_event(db:AsyncSession,event:stripe.Event,payload:bytes) -> bool:
+  """Saves a verified event with its raw payload to the inbox; False if this event id was already received."""
+  stored = await db.scalar(
+    insert(StripeWebhookEvent)
+    .values(id=event.id,type=event.type,payload=json.loads(payload),status=WebhookEventStatus.pending.value,attempts=0)
+    .on_conflict_do_nothing(index_elements=[StripeWebhookEvent.id])
+    .returning(StripeWebhookEvent.id)
+  )
+  await db.commit()
+  WEBHOOK_EVENTS.labels(event.type,"received" if stored else "duplicate").inc()
+  return stored is not None
+
+
+async def claim_events(db:AsyncSession,limit:int) -> list:
+  """Leases up to ``limit`` due events, skipping rows other workers hold, in arrival order."""
+  due = (
+    select(StripeWebhookEvent.id)
+    .filter(
+      or_(
+        StripeWebhookEvent.status == WebhookEventStatus.pending.value,
+        StripeWebhookEvent.status == WebhookEventStatus.processing.value,
+      ),
+      StripeWebhookEvent.next_attempt_at <= func.now(),
+    )
+    .order_by(StripeWebhookEvent.received_at)
+    .limit(limit)
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()
+  )
+  # plain rows rather than ORM objects: a rollback while processing one event must not expire the others
+  events = (await db.execute(
+    update(StripeWebhookEvent)
+    .filter(StripeWebhookEvent.id.in_(due))
+    .values(
+      status=WebhookEventStatus.processing.value,
+      attempts=StripeWebhookEvent.attempts + 1,
+      next_attempt_at=func.now() + datetime.timedelta(seconds=WEBHOOK_LEASE_SECONDS),
+    )
+    .returning(StripeWebhookEvent.id,StripeWebhookEvent.type,StripeWebhookEvent.payload,StripeWebhookEvent.attempts)
+    .execution_options(synchronize_session=False)
+  )).all()
+  await db.commit()
+  return events
+
+
+def retry_delay(attempts:int) -> datetime.timedelta:
+  return datetime.timedelta(seconds=min(2 ** attempts,3600))
+
+
+async def process_event(db:AsyncSession,inbox_event) -> None:
+  event = stripe.Event.construct_from(inbox_event.payload,stripe.api_key)
+  handler = handlers.get(inbox_event.type)
+  try:
+    if handler is not None:
+      await handler(db,event)
+    await db.execute(
+      update(StripeWebhookEvent)
+      .filter(StripeWebhookEvent.id == inbox_event.id)
+      .values(status=WebhookEventStatus.processed.value,processed_at=func.now(),last_error=None)
+      .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    for callback in db.info.pop("on_commit",[]):
+      callback()
+    WEBHOOK_EVENTS.labels(inbox_event.type,"processed" if handler else "ignored").inc()
+  except Exception as e:
+    db.info.pop("on_commit",None)
+    await db.rollback()
+    dead = inbox_event.attempts >= WEBHOOK_MAX_ATTEMPTS
+    logger.warning("webhook %s (%s) attempt %d failed: %r",inbox_event.id,inbox_event.type,inbox_event.attempts,e)
+    await db.execute(
+      update(StripeWebhookEvent)
+      .filter(StripeWebhookEvent.id == inbox_event.id)
+      .values(
+        status=WebhookEventStatus.dead.value if dead else WebhookEventStatus.pending.value,
+        next_attempt_at=func.now() + retry_delay(inbox_event.attempts),
+        last_error=repr(e)[:2000],
+      )
+      .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    WEBHOOK_EVENTS.labels(inbox_event.type,"dead" if dead else "retry").inc()
+
+
+async def process_due_events(db:AsyncSession,limit:int = 10) -> int:
+  events = await claim_events(db,limit)
+  for inbox_event in events:
+    await process_event(db,inbox_event)
+  return len(events)
+
+
+async def requeue_dead_events(db:AsyncSession) -> int:
+  result = await db.execute(
+    update(StripeWebhookEvent)
+    .filter(StripeWebhookEvent.status == WebhookEventStatus.dead.value)
+    .values(status=WebhookEventStatus.pending.value,attempts=0,next_attempt_at=func.now())
+  )
+  await db.commit()
+  return result.rowcount
+
+
+class WebhookWorkerPool:
+  """Background tasks on the app's event loop that drain the inbox.
+
+  Workers poll every ``poll_seconds`` and are woken early by ``notify`` when
+  the webhook endpoint stores a new event.
+  """
+
+  def __init__(self,workers:int,poll_seconds:float):
+    self.workers = workers
+    self.poll_seconds = poll_seconds
+    self._tasks = []
+    self._wakeup:Optional[asyncio.Event] = None
+
+  def start(self) -> None:
+    self._wakeup = asyncio.Event()
+    self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+  def notify(self) -> None:
+    if self._wakeup is not None:
+      self._wakeup.set()
+
+  async def _run(self) -> None:
+    while True:
+      try:
+        async with AsyncSessionLocal() as db:
+          if await process_due_events(db):
+            continue
+      except Exception:
+        logger.exception("webhook worker failed")
+      try:
+        await asyncio.wait_for(self._wakeup.wait(),self.poll_seconds)
+        self._wakeup.clear()
+      except asyncio.TimeoutError:
+        pass
+
+  async def stop(self) -> None:
+    for task in self._tasks:
+      task.cancel()
+    await asyncio.gather(*self._tasks,return_exceptions=True)
+    self._tasks = []
+    self._wakeup = None
+
+
+webhook_workers = WebhookWorkerPool(WEBHOOK_WORKERS,WEBHOOK_POLL_SECONDS)
@@ -1,11 +1,21 @@
+import asyncio
 import pytest
+from contextlib import contextmanager
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine,event
 from sqlalchemy.orm import sessionmaker
-from db.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine,async_sessionmaker
+from db.database import Base, get_db, get_session_factory, get_async_url
 from main import app
 from db.models import User,StripeSubscription
-from config.security import hash_password
+from config.security import hash_password,principal_cache
+from config.permissions import membership_cache
+from monitoring import query_metrics
+from services.stripe_catalog import product_catalog
+from routes.stripe_subscription import customer_cache
+from config.entitlements import entitlement_cache
+from routes.users import user_lookup_cache
 from uuid import uuid4
 from dotenv import load_dotenv
 import os
@@ -17,6 +27,11 @@ TEST_DB = os.getenv('SQLALCHEMY_TEST_DATABASE_URL')
 engine = create_engine(TEST_DB)
 TestingSessionLocal = sessionmaker(autocommit=False,autoflush=False,bind=engine)
 
+# TestClient runs every request on a fresh event loop, so asyncpg connections can't be pooled across requests
+async_engine = create_async_engine(get_async_url(TEST_DB),poolclass=NullPool)
+query_metrics.instrument_engine(async_engine.sync_engine)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine,autoflush=False,expire_on_commit=False)
+
 @pytest.fixture(scope='function')
 def db():
   Base.metadata.create_all(bind=engine)
@@ -29,15 +44,47 @@ def db():
 
 @pytest.fixture(scope='function')
 def client(db):
-  def override_get_db():
-    try:
-      yield db
-    finally:
-      db.close()
+  async def override_get_db():
+    async with TestingAsyncSessionLocal() as session:
+      yield session
   app.dependency_overrides[get_db] = override_get_db
+  app.dependency_overrides[get_session_factory] = lambda: TestingAsyncSessionLocal
+  principal_cache.clear()
+  membership_cache.clear()
+  query_metrics.reset()
+  product_catalog.clear()
+  customer_cache.clear()
+  entitlement_cache.clear()
+  user_lookup_cache.clear()
   yield TestClient(app)
   app.dependency_overrides.clear()
 
+@pytest.fixture(scope='function')
+def run_with_session():
+  # For code that runs outside a request, such as background workers
+  def run(fn):
+    async def main():
+      async with TestingAsyncSessionLocal() as session:
+        return await fn(session)
+    return asyncio.run(main())
+  return run
+
+@pytest.fixture(scope='function')
+def assert_max_queries():
+  # Counts statements the app sends through the async engine, so eager loading regressions fail
+  @contextmanager
+  def assert_max(limit:int):
+    statements = []
+    def record(conn,cursor,statement,parameters,context,executemany):
+      statements.append(statement)
+    event.listen(async_engine.sync_engine,"before_cursor_execute",record)
+    try:
+      yield statements
+    finally:
+      event.remove(async_engine.sync_engine,"before_cursor_execute",record)
+    assert len(statements) <= limit, f"expected at most {limit} queries, got {len(statements)}:\n" + "\n".join(statements)
+  return assert_max
+
 @pytest.fixture(scope='function')
 def test_user(db):
   user = User(
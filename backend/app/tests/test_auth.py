@@ -83,3 +83,25 @@ def test_login_empty_fields(client):
     assert response.status_code == 422
     assert "Username and password cannot be empty" in response.json()["detail"]
 
+
+def test_login_rehashes_password_when_cost_changes(client,db):
+  from db.models import User
+  from config.hashing import get_context,PASSWORD_HASH_ROUNDS
+  user = User(email="legacy@test.com",first_name="Legacy",last_name="User",password=get_context(4).hash("Password123"))
+  db.add(user)
+  db.commit()
+
+  response = client.post('/login',data={"username":"legacy@test.com","password":"Password123"})
+  assert response.status_code == 200
+
+  db.refresh(user)
+  assert user.password.startswith(f"$2b${PASSWORD_HASH_ROUNDS:02d}$")
+  assert client.post('/login',data={"username":"legacy@test.com","password":"Password123"}).status_code == 200
+
+def test_login_rejected_when_hashing_pool_is_saturated(client,test_user,monkeypatch):
+  from config.hashing import password_hasher
+  monkeypatch.setattr(password_hasher,"max_pending",0)
+
+  response = client.post('/login',data={"username":test_user.email,"password":"Password123"})
+  assert response.status_code == 429
+  assert response.headers["retry-after"] == "1"
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from uuid import uuid4
+from starlette.websockets import WebSocketDisconnect
+
+
+def create_project(db, user, role="admin"):
+    from db.models import Project, ProjectUser
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=user.id, role=role))
+    db.commit()
+    return project
+
+def test_project_events_socket(client, test_user, auth_headers, db):
+    from db.models import User
+    project = create_project(db, test_user)
+    member = User(id=uuid4(), email="member@test.com", first_name="Member", last_name="User", password="String123")
+    db.add(member)
+    db.commit()
+    token = auth_headers["Authorization"].split()[1]
+
+    with client.websocket_connect(f"/ws/projects/{project.id}?token={token}") as websocket:
+        hello = websocket.receive_json()
+        assert hello["type"] == "subscribed" and hello["version"] == 0
+
+        task = client.post(f'/api/projects/{project.id}/tasks', json={"title": "Task 1", "description": "Test Description", "due_date": "2026-01-01T00:00:00"}, headers=auth_headers).json()
+        event = websocket.receive_json()
+        assert (event["type"], event["id"], event["version"]) == ("task.created", task["id"], 1)
+        assert event["task"]["title"] == "Task 1"
+
+        client.delete(f'/api/projects/{project.id}/tasks/{task["id"]}', headers=auth_headers)
+        assert websocket.receive_json()["type"] == "task.deleted"
+
+        client.post(f'/api/projects/{project.id}/members/{member.id}', headers=auth_headers)
+        event = websocket.receive_json()
+        assert (event["type"], event["id"], event["role"]) == ("member.added", str(member.id), "user")
+
+        # the changes feed picks up from the cursor of the first message
+        changes = client.get(f'/api/projects/{project.id}/tasks/changes?since={hello["cursor"]}', headers=auth_headers).json()
+        assert [change["deleted"] for change in changes["changes"]] == [True]
+
+def test_project_events_socket_requires_membership(client, test_user, auth_headers, db):
+    project = create_project(db, test_user)
+    token = auth_headers["Authorization"].split()[1]
+    for url in [f"/ws/projects/{uuid4()}?token={token}", f"/ws/projects/{project.id}", f"/ws/projects/{project.id}?token=invalid"]:
+        with pytest.raises(WebSocketDisconnect) as error:
+            with client.websocket_connect(url) as websocket:
+                websocket.receive_json()
+        assert error.value.code == 1008
+
+    with client.websocket_connect(f"/ws/projects/{project.id}", headers=auth_headers) as websocket:
+        assert websocket.receive_json()["type"] == "subscribed"
+
+def test_subscription_coalesces_and_resyncs():
+    from services.project_events import MemoryBroker
+
+    async def scenario():
+        broker = MemoryBroker(max_pending=2)
+        project_id = uuid4()
+        subscription = broker.subscribe(project_id)
+        event = lambda type, id, version: {"type": type, "project_id": str(project_id), "id": id, "version": version}
+
+        await broker.publish(event("task.created", "a", 1))
+        await broker.publish(event("task.updated", "a", 2))
+        await broker.publish(event("member.added", "a", 3))
+        assert [(e["type"], e["version"]) for e in await subscription.get()] == [("task.created", 2), ("member.added", 3)]
+
+        for version, id in enumerate("bcd", 4):
+            await broker.publish(event("task.updated", id, version))
+        await broker.publish(event("task.deleted", "e", 8))
+        assert await subscription.get() == [{"type": "resync", "project_id": str(project_id), "version": 8}]
+
+        broker.unsubscribe(subscription)
+        await broker.publish(event("task.deleted", "e", 9))
+        assert broker._subscriptions == {}
+
+    asyncio.run(scenario())
+
+def test_project_events_socket_closes_for_removed_member(client, test_user, auth_headers, db):
+    from db.models import User, ProjectUser
+    from config.security import create_access_token
+    project = create_project(db, test_user)
+    member = User(id=uuid4(), email="member@test.com", first_name="Member", last_name="User", password="String123")
+    db.add(member)
+    db.add(ProjectUser(project_id=project.id, user_id=member.id, role="user"))
+    db.commit()
+
+    token = create_access_token({"sub": member.email})
+    with client.websocket_connect(f"/ws/projects/{project.id}?token={token}") as websocket:
+        websocket.receive_json()
+        client.delete(f'/api/projects/{project.id}/members/{member.id}', headers=auth_headers)
+        assert websocket.receive_json()["type"] == "member.removed"
+        with pytest.raises(WebSocketDisconnect) as error:
+            websocket.receive_json()
+        assert error.value.code == 1008
+
+def test_subscription_removal_bypasses_resync():
+    from services.project_events import MemoryBroker
+
+    async def scenario():
+        broker = MemoryBroker(max_pending=1)
+        project_id, user_id = uuid4(), uuid4()
+        subscription = broker.subscribe(project_id, user_id)
+        event = lambda type, id, version: {"type": type, "project_id": str(project_id), "id": id, "version": version}
+
+        await broker.publish(event("task.updated", "a", 1))
+        await broker.publish(event("task.updated", "b", 2))
+        await broker.publish(event("member.removed", str(uuid4()), 3))
+        await broker.publish(event("member.removed", str(user_id), 4))
+        await broker.publish(event("task.updated", "c", 5))
+        assert await subscription.get() == [event("member.removed", str(user_id), 4)]
+        assert subscription.closes((await subscription.get())[0])
+
+    asyncio.run(scenario())
+
+def test_project_events_socket_closes_when_project_is_deleted(client, test_user, auth_headers, db):
+    project = create_project(db, test_user)
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/ws/projects/{project.id}?token={token}") as websocket:
+        websocket.receive_json()
+        assert client.delete(f'/api/projects/{project.id}', headers=auth_headers).status_code == 200
+        assert websocket.receive_json()["type"] == "project.deleted"
+        with pytest.raises(WebSocketDisconnect) as error:
+            websocket.receive_json()
+        assert error.value.code == 1008
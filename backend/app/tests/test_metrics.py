@@ -0,0 +1,41 @@
+
+
+def test_db_metrics_per_route(client,auth_headers):
+  client.get('/api/projects',headers=auth_headers)
+  client.get('/api/projects',headers=auth_headers)
+
+  response = client.get('/metrics/db')
+  assert response.status_code == 200
+  route = response.json()["routes"]["GET /api/projects"]
+  assert route["requests"] == 2
+  assert route["queries"] >= 2
+  assert route["db_time_ms"] > 0
+
+def test_slow_query_log_redacts_parameters(client,test_user,auth_headers,caplog,monkeypatch):
+  from monitoring import query_metrics
+  monkeypatch.setattr(query_metrics,"SLOW_QUERY_THRESHOLD_MS",0)
+
+  with caplog.at_level("WARNING",logger="slow_query"):
+    client.get('/api/profile',headers=auth_headers)
+
+  messages = [record.getMessage() for record in caplog.records if record.name == "slow_query"]
+  assert any("FROM users" in message for message in messages)
+  assert all(test_user.email not in message for message in messages)
+  assert client.get('/metrics/db').json()["slow_queries"] >= 1
+
+def test_prometheus_exposition(client,test_user,auth_headers):
+  client.post('/login',data={"username":test_user.email,"password":"Password123","grant_type":"password"})
+  project = client.post('/api/projects',json={"title":"Metrics","description":"Project"},headers=auth_headers).json()
+  client.get(f'/api/projects/{project["id"]}/tasks',headers=auth_headers)
+
+  response = client.get('/metrics')
+  assert response.status_code == 200
+  assert response.headers["content-type"].startswith("text/plain")
+  body = response.text
+  assert 'http_requests_total{method="GET",route="/api/projects/{project_id}/tasks",status="200"}' in body
+  assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/api/projects/{project_id}/tasks"}' in body
+  assert 'http_requests_in_flight{method="GET",route="/api/projects/{project_id}/tasks"} 0.0' in body
+  assert 'password_hash_duration_seconds_count{operation="verify"}' in body
+  assert 'db_queries_total{method="GET",route="/api/projects/{project_id}/tasks"}' in body
+  assert 'db_pool_checked_out{engine="async"}' in body
+  assert 'cache_hits_total{cache="principal"}' in body
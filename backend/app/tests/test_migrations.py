@@ -0,0 +1,31 @@
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine,inspect,text
+
+TEST_DB = os.getenv('SQLALCHEMY_TEST_DATABASE_URL')
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic_config():
+  config = Config(os.path.join(APP_DIR,"alembic.ini"))
+  config.set_main_option("script_location",os.path.join(APP_DIR,"migrations"))
+  config.set_main_option("sqlalchemy.url",TEST_DB.replace("%","%%"))
+  return config
+
+def test_migrations_upgrade_and_downgrade():
+  config = alembic_config()
+  engine = create_engine(TEST_DB)
+  try:
+    command.upgrade(config,"head")
+    command.check(config)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("tasks")}
+    assert "ix_tasks_project_id_due_date_id" in indexes
+    assert "ix_tasks_assignee_id_due_date_id" in indexes
+
+    command.downgrade(config,"base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+  finally:
+    with engine.begin() as conn:
+      conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    engine.dispose()
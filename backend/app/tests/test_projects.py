@@ -68,8 +68,9 @@ def test_get_projects(client,test_user,auth_headers,db):
   response = client.get('/api/projects',headers=auth_headers)
   assert response.status_code == 200
   data = response.json()
-  assert len(data) == 1
-  assert data[0]['title'] == 'Test Project'
+  assert len(data['items']) == 1
+  assert data['items'][0]['title'] == 'Test Project'
+  assert data['next_cursor'] is None
 
 def test_get_project_by_id(client,test_user,auth_headers,db):
   from db.models import Project,ProjectUser,UserRole
@@ -220,6 +221,65 @@ def test_add_team_member(client, test_user, auth_headers, db):
     assert member is not None
     assert member.role == UserRole.user.value
 
+def test_import_team_members(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, User
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    users = [User(id=uuid4(), email=f"member{i}@test.com", first_name="Member", last_name=str(i), password="String123") for i in range(3)]
+    db.add_all(users)
+    db.commit()
+
+    csv_file = (
+        "email,role\n"
+        "member0@test.com,admin\n"
+        "member1@test.com,\n"
+        "member1@test.com,user\n"
+        "nobody@test.com,user\n"
+        "member2@test.com,owner\n"
+        f"{test_user.email},user\n"
+    )
+    response = client.post(f'/api/projects/{project.id}/members:import', headers=auth_headers,
+                           files={"file": ("members.csv", csv_file, "text/csv")})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["skipped"], report["failed"]) == (2, 1, 3)
+    assert [error["error"] for error in report["errors"]] == ["Invalid role", "User appears more than once in the file", "User not found"]
+
+    roles = dict(db.query(ProjectUser.user_id, ProjectUser.role).filter(ProjectUser.project_id == project.id))
+    assert roles == {test_user.id: "admin", users[0].id: "admin", users[1].id: "user"}
+
+def test_get_project_conditional(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, User
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    member = User(id=uuid4(), email="member@test.com", first_name="Member", last_name="User", password="String123")
+    db.add(member)
+    db.commit()
+
+    project_etag = client.get(f'/api/projects/{project.id}', headers=auth_headers).headers["etag"]
+    members_etag = client.get(f'/api/projects/{project.id}/members', headers=auth_headers).headers["etag"]
+    assert client.get(f'/api/projects/{project.id}', headers={**auth_headers, "If-None-Match": project_etag}).status_code == 304
+    assert client.get(f'/api/projects/{project.id}/members', headers={**auth_headers, "If-None-Match": f'"other", {members_etag}'}).status_code == 304
+
+    client.post(f'/api/projects/{project.id}/members/{member.id}', headers=auth_headers)
+    response = client.get(f'/api/projects/{project.id}/members', headers={**auth_headers, "If-None-Match": members_etag})
+    assert response.status_code == 200 and len(response.json()["items"]) == 2
+    members_etag = response.headers["etag"]
+
+    # a member renaming themselves changes the member list of their projects
+    client.put('/api/profile', json={"email": test_user.email, "first_name": "Renamed", "last_name": "User"}, headers=auth_headers)
+    assert client.get(f'/api/projects/{project.id}/members', headers={**auth_headers, "If-None-Match": members_etag}).status_code == 200
+
+    client.put(f'/api/projects/{project.id}', json={"title": "Renamed"}, headers=auth_headers)
+    response = client.get(f'/api/projects/{project.id}', headers={**auth_headers, "If-None-Match": project_etag})
+    assert response.status_code == 200 and response.json()["title"] == "Renamed"
+
 def test_remove_team_member(client, test_user, auth_headers, db):
     from db.models import Project, ProjectUser, UserRole, User, StripeSubscription
     from uuid import uuid4
@@ -280,4 +340,66 @@ def test_remove_team_member(client, test_user, auth_headers, db):
         ProjectUser.project_id == project.id,
         ProjectUser.user_id == member_user_id
     ).first()
-    assert member is None
\ No newline at end of file
+    assert member is None
+
+
+def test_get_project_members_uses_membership_cache(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole
+    from config.permissions import membership_cache
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.commit()
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    client.get(f'/api/projects/{project.id}/members', headers=auth_headers)
+    hits = membership_cache.hits
+    response = client.get(f'/api/projects/{project.id}/members', headers=auth_headers)
+    assert response.status_code == 200
+    assert membership_cache.hits == hits + 1
+
+def test_delete_project_invalidates_membership_cache(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.commit()
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    response = client.get(f'/api/projects/{project.id}/members', headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.delete(f'/api/projects/{project.id}', headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.get(f'/api/projects/{project.id}/members', headers=auth_headers)
+    assert response.status_code == 403
+
+def test_get_projects_query_count(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole
+    from uuid import uuid4
+
+    for i in range(20):
+        project = Project(id=uuid4(), title=f"Project {i}", description="Test Description")
+        db.add(project)
+        db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    with assert_max_queries(2):
+        response = client.get('/api/projects?limit=20', headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.json()['items']) == 20
+
+def test_create_project_requires_active_subscription(client,test_user,auth_headers,db):
+    from db.models import StripeSubscription,SubscriptionStatus
+    subscription = db.query(StripeSubscription).filter(StripeSubscription.user_id == test_user.id).one()
+    subscription.status = SubscriptionStatus.inactive.value
+    db.commit()
+
+    response = client.post('/api/projects',json={"title":"Project","description":"Description"},headers=auth_headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "User is not subscribed"
@@ -0,0 +1,41 @@
+def test_search(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+    from datetime import datetime
+
+    project = Project(id=uuid4(), title="Website redesign", description="New marketing site & blog")
+    other = Project(id=uuid4(), title="Design system", description="Not shared with the user")
+    db.add_all([project, other])
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+    db.add_all([
+        Task(id=uuid4(), title="Design review", description="Review the <b>homepage</b> designs", project_id=project.id),
+        Task(id=uuid4(), title="Write copy", description="Copy for the design pages", project_id=project.id),
+        Task(id=uuid4(), title="Design deleted", description="", project_id=project.id, deleted_at=datetime.utcnow()),
+        Task(id=uuid4(), title="Design elsewhere", description="", project_id=other.id),
+        Task(id=uuid4(), title="Unrelated", description="Nothing to see", project_id=project.id),
+    ])
+    db.commit()
+
+    response = client.get('/api/search?q=desi', headers=auth_headers)
+    assert response.status_code == 200
+    hits = response.json()["items"]
+    # a match in the title ranks above one in the description
+    assert [hit["title"] for hit in hits] == ["Design review", "Write copy"]
+    review = hits[0]
+    assert review["type"] == "task" and review["project_id"] == str(project.id)
+    assert review["title_highlight"] == "<mark>Design</mark> review"
+    # ts_headline drops markup from the text; whatever is left is escaped
+    assert "homepage  <mark>designs</mark>" in review["snippet"] and "<b>" not in review["snippet"]
+
+    hits = client.get('/api/search?q=website+redes', headers=auth_headers).json()["items"]
+    assert [(hit["type"], hit["id"]) for hit in hits] == [("project", str(project.id))]
+    assert hits[0]["snippet"] == "New marketing site &amp; blog"
+
+    first = client.get('/api/search?q=design&limit=1', headers=auth_headers).json()
+    second = client.get(f'/api/search?q=design&limit=1&cursor={first["next_cursor"]}', headers=auth_headers).json()
+    assert [hit["title"] for hit in first["items"] + second["items"]] == ["Design review", "Write copy"]
+    assert second["next_cursor"] is None
+
+    assert client.get('/api/search?q=%3F%21', headers=auth_headers).status_code == 400
+    assert client.get('/api/search?q=design').status_code == 401
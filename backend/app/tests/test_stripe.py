@@ -0,0 +1,141 @@
+import datetime
+import json
+import threading
+import stripe
+import pytest
+from services.webhook_inbox import process_due_events
+
+
+class FakeProducts:
+  def __init__(self):
+    self.calls = 0
+    self.name = "Basic"
+    self.gate = threading.Event()
+    self.gate.set()
+
+  def list(self):
+    self.gate.wait(5)
+    self.calls += 1
+    return [stripe.Product.construct_from({
+      "id":"prod_1","object":"product","name":self.name,"description":"Plan",
+      "default_price":{"id":"price_1","object":"price","unit_amount":1500}
+    },"sk_test")]
+
+@pytest.fixture
+def fake_products(monkeypatch):
+  products = FakeProducts()
+  monkeypatch.setattr("services.stripe_catalog.list_products",products.list)
+  return products
+
+def send_event(client,monkeypatch,event_type,data_object,event_id="evt_1"):
+  payload = json.dumps({"id":event_id,"object":"event","type":event_type,"data":{"object":data_object}})
+  monkeypatch.setattr(stripe.Webhook,"construct_event",lambda payload,**kwargs: stripe.Event.construct_from(json.loads(payload),"sk_test"))
+  return client.post('/api/webhook',content=payload,headers={"stripe-signature":"t=1,v1=x"})
+
+
+
+def test_products_served_from_cache(client,auth_headers,fake_products):
+  first = client.get('/api/products',headers=auth_headers)
+  second = client.get('/api/products',headers=auth_headers)
+
+  assert first.status_code == 200
+  assert first.json() == [{"id":"prod_1","name":"Basic","description":"Plan","price":15.0,"price_id":"price_1"}]
+  assert second.json() == first.json()
+  assert fake_products.calls == 1
+
+def test_product_webhook_revalidates_in_background(client,auth_headers,fake_products,monkeypatch,run_with_session):
+  from services.stripe_catalog import product_catalog
+  client.get('/api/products',headers=auth_headers)
+
+  fake_products.name = "Pro"
+  fake_products.gate.clear()
+  assert send_event(client,monkeypatch,"product.updated",{"id":"prod_1"}).status_code == 200
+  assert run_with_session(process_due_events) == 1
+
+  # while Stripe is slow the stale catalog is still served without waiting
+  assert client.get('/api/products',headers=auth_headers).json()[0]["name"] == "Basic"
+
+  pending = product_catalog._refresh()
+  fake_products.gate.set()
+  pending.result(5)
+  assert client.get('/api/products',headers=auth_headers).json()[0]["name"] == "Pro"
+  assert fake_products.calls == 2
+
+
+def test_webhook_is_stored_once_and_processed_later(client,test_user,db,monkeypatch,run_with_session):
+  from db.models import StripeSubscription,StripeWebhookEvent
+  session = {"id":"cs_1","subscription":"sub_new","metadata":{"user_id":str(test_user.id)}}
+
+  first = send_event(client,monkeypatch,"checkout.session.completed",session)
+  second = send_event(client,monkeypatch,"checkout.session.completed",session)
+  assert first.json() == {"status":"received","type":"checkout.session.completed","duplicate":False}
+  assert second.json()["duplicate"] is True
+  assert db.query(StripeWebhookEvent).count() == 1
+
+  subscription = db.query(StripeSubscription).filter(StripeSubscription.user_id == test_user.id).one()
+  assert subscription.subscription_id == "sub_123"
+
+  assert run_with_session(process_due_events) == 1
+  assert run_with_session(process_due_events) == 0
+  db.expire_all()
+  assert subscription.subscription_id == "sub_new"
+  assert db.get(StripeWebhookEvent,"evt_1").status == "processed"
+
+def test_failing_webhook_is_retried_then_dead_lettered(client,db,monkeypatch,run_with_session):
+  from db.models import StripeWebhookEvent
+  from services import webhook_inbox
+  def fail(db,event):
+    raise RuntimeError("boom")
+  monkeypatch.setitem(webhook_inbox.handlers,"invoice.payment_succeeded",fail)
+  monkeypatch.setattr(webhook_inbox,"WEBHOOK_MAX_ATTEMPTS",2)
+  monkeypatch.setattr(webhook_inbox,"retry_delay",lambda attempts: datetime.timedelta(0))
+  send_event(client,monkeypatch,"invoice.payment_succeeded",{"id":"in_1","customer_email":"x@example.com"})
+
+  run_with_session(process_due_events)
+  event = db.get(StripeWebhookEvent,"evt_1")
+  assert (event.status,event.attempts) == ("pending",1)
+  assert "boom" in event.last_error
+
+  run_with_session(process_due_events)
+  db.expire_all()
+  assert (event.status,event.attempts) == ("dead",2)
+  assert run_with_session(process_due_events) == 0
+
+
+def test_checkout_reuses_stripe_customer(client,test_user,auth_headers,db,monkeypatch):
+  from db.models import StripeSubscription
+  from sqlalchemy import text
+  customers = []
+  sessions = []
+  async def create_customer(name,email,idempotency_key):
+    customers.append(idempotency_key)
+    # no transaction of the app is left open while waiting on Stripe
+    assert db.scalar(text("SELECT count(*) FROM pg_stat_activity WHERE state = 'idle in transaction' AND pid <> pg_backend_pid()")) == 0
+    return "cus_1"
+  async def create_checkout_session(params):
+    sessions.append(params)
+    return {"id":f"cs_{len(sessions)}","url":"https://checkout.test"}
+  monkeypatch.setattr("routes.stripe_subscription.create_customer",create_customer)
+  monkeypatch.setattr("routes.stripe_subscription.create_checkout_session_on_stripe",create_checkout_session)
+
+  first = client.post('/api/create-checkout-session',json={"price_id":"price_1"},headers=auth_headers)
+  second = client.post('/api/create-checkout-session',json={"price_id":"price_1"},headers=auth_headers)
+
+  assert first.status_code == 200
+  assert second.json()["id"] == "cs_2"
+  assert customers == [f"customer-{test_user.id}"]
+  assert [params["customer"] for params in sessions] == ["cus_1","cus_1"]
+  assert db.query(StripeSubscription).filter(StripeSubscription.user_id == test_user.id).one().customer_id == "cus_1"
+
+def test_payment_webhook_invalidates_entitlement(client,test_user,auth_headers,db,monkeypatch,run_with_session):
+  from db.models import StripeSubscription,SubscriptionStatus
+  subscription = db.query(StripeSubscription).filter(StripeSubscription.user_id == test_user.id).one()
+  subscription.status = SubscriptionStatus.inactive.value
+  db.commit()
+  assert client.get('/api/subscription-status',headers=auth_headers).json()["is_active"] is False
+
+  send_event(client,monkeypatch,"invoice.payment_succeeded",{"id":"in_1","subscription":"sub_456","customer_email":test_user.email})
+  assert client.get('/api/subscription-status',headers=auth_headers).json()["is_active"] is False
+
+  run_with_session(process_due_events)
+  assert client.get('/api/subscription-status',headers=auth_headers).json() == {"status":"active","is_active":True}
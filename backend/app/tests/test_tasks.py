@@ -80,8 +80,8 @@ def test_get_tasks(client, test_user, auth_headers, db):
     response = client.get(f'/api/projects/{project.id}/tasks', headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
-    assert len(data) == 1
-    assert data[0]['title'] == task.title
+    assert len(data['items']) == 1
+    assert data['items'][0]['title'] == task.title
 
 def test_update_task(client, test_user, auth_headers, db):
     from db.models import Project, ProjectUser, UserRole, Task
@@ -158,7 +158,480 @@ def test_delete_task(client, test_user, auth_headers, db):
 
     response = client.delete(f'/api/projects/{project.id}/tasks/{task.id}', headers=auth_headers)
     assert response.status_code == 200
-    task_exists = db.query(Task).filter(Task.id == task.id).first()
-    assert task_exists is None
+    # the row stays as a tombstone for /tasks/changes
+    db.expire_all()
+    assert db.get(Task, task.id).deleted_at is not None
+    assert client.get(f'/api/projects/{project.id}/tasks/{task.id}', headers=auth_headers).status_code == 404
+    assert client.delete(f'/api/projects/{project.id}/tasks/{task.id}', headers=auth_headers).status_code == 404
 
 
+
+def test_get_tasks_query_count(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole, Task, User
+    from uuid import uuid4
+    from datetime import datetime, timedelta
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    for i in range(10):
+        assignee = User(id=uuid4(), email=f"assignee{i}@test.com", first_name="Assignee", last_name="User", password="String123")
+        db.add(assignee)
+        db.add(ProjectUser(project_id=project.id, user_id=assignee.id, role=UserRole.user.value))
+        for j in range(5):
+            db.add(Task(
+                id=uuid4(),
+                title=f"Task {i}-{j}",
+                description="Test Description",
+                project_id=project.id,
+                assignee_id=assignee.id,
+                due_date=datetime.utcnow() + timedelta(days=1)
+            ))
+    db.commit()
+
+    # the page query plus the project version lookup behind the ETag
+    with assert_max_queries(4):
+        response = client.get(f'/api/projects/{project.id}/tasks?limit=50', headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()['items']
+    assert len(data) == 50
+    assert all(task['assignee'] is not None for task in data)
+
+def test_get_tasks_cursor_pagination(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+    from datetime import datetime, timedelta
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    now = datetime.utcnow()
+    for i in range(5):
+        db.add(Task(id=uuid4(), title=f"Task {i}", description="Test Description", project_id=project.id, due_date=now + timedelta(days=i)))
+    db.add(Task(id=uuid4(), title="No due date", description="Test Description", project_id=project.id))
+    db.add(Task(id=uuid4(), title="Same day", description="Test Description", project_id=project.id, due_date=now + timedelta(days=2)))
+    db.commit()
+
+    titles = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f'/api/projects/{project.id}/tasks', params=params, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        titles += [task['title'] for task in page['items']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert len(titles) == 7
+    assert len(set(titles)) == 7
+    assert titles[:2] == ["Task 0", "Task 1"]
+    assert titles[-1] == "No due date"
+
+def test_get_tasks_invalid_cursor(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    response = client.get(f'/api/projects/{project.id}/tasks?cursor=not-a-cursor', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_batch_tasks(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole, Task, User
+    from uuid import uuid4
+    from datetime import datetime, timedelta
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    member = User(id=uuid4(), email="member@test.com", first_name="Member", last_name="User", password="String123")
+    outsider = User(id=uuid4(), email="outsider@test.com", first_name="Outsider", last_name="User", password="String123")
+    db.add_all([project, member, outsider])
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.add(ProjectUser(project_id=project.id, user_id=member.id, role=UserRole.user.value))
+    tasks = [Task(id=uuid4(), title=f"Task {i}", description="Test Description", project_id=project.id) for i in range(20)]
+    db.add_all(tasks)
+    db.commit()
+
+    due_date = (datetime.utcnow() + timedelta(days=1)).isoformat()
+    operations = [
+        {"op": "create", "title": "New", "description": "Created in batch", "due_date": due_date, "assignee_id": str(member.id)},
+        {"op": "create", "title": "Bad", "description": "Outsider", "due_date": due_date, "assignee_id": str(outsider.id)},
+        *({"op": "update", "id": str(task.id), "status": "completed"} for task in tasks[:15]),
+        {"op": "update", "id": str(tasks[15].id), "status": "done"},
+        {"op": "update", "id": str(tasks[17].id), "status": None},
+        {"op": "update", "id": str(uuid4()), "status": "completed"},
+        {"op": "delete", "id": str(tasks[16].id)},
+        {"op": "delete", "id": str(tasks[16].id)},
+    ]
+    with assert_max_queries(8):
+        response = client.post(f'/api/projects/{project.id}/tasks:batch', json={"operations": operations}, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["applied"] is True
+    statuses = [result["status"] for result in data["results"]]
+    assert statuses == [201, 400] + [200] * 15 + [400, 400, 404, 200, 409]
+    assert data["results"][1]["error"] == "Assignee must be a project member"
+
+    task_ids = [task.id for task in tasks]
+    db.expire_all()
+    created = db.get(Task, data["results"][0]["id"])
+    assert created.assignee_id == member.id and created.status == "pending"
+    assert all(db.get(Task, task_id).status == "completed" for task_id in task_ids[:15])
+    assert db.get(Task, task_ids[15]).status == "pending"
+    assert db.get(Task, task_ids[17]).status == "pending"
+    assert db.get(Task, task_ids[16]).deleted_at is not None
+
+def test_batch_tasks_atomic(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    task = Task(id=uuid4(), title="Task", description="Test Description", project_id=project.id)
+    db.add(task)
+    db.commit()
+
+    response = client.post(f'/api/projects/{project.id}/tasks:batch', json={"atomic": True, "operations": [
+        {"op": "update", "id": str(task.id), "status": "completed"},
+        {"op": "delete", "id": str(uuid4())},
+    ]}, headers=auth_headers)
+    data = response.json()
+    assert data["applied"] is False
+    assert [result["status"] for result in data["results"]] == [424, 404]
+    db.expire_all()
+    assert db.get(Task, task.id).status == "pending"
+
+def test_export_tasks(client, test_user, auth_headers, db, monkeypatch):
+    import csv
+    import io
+    import json
+    from routes import tasks as task_routes
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+    from datetime import datetime, timedelta
+
+    monkeypatch.setattr(task_routes, "EXPORT_BATCH_SIZE", 2)
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    now = datetime.utcnow()
+    for i in range(5):
+        db.add(Task(id=uuid4(), title=f"Task {i}", description="Line one,\nline two", project_id=project.id,
+                    assignee_id=test_user.id if i % 2 else None, due_date=now + timedelta(days=i)))
+    db.commit()
+
+    response = client.get(f'/api/projects/{project.id}/tasks/export?format=csv', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == [f"Task {i}" for i in range(5)]
+    assert rows[0]["description"] == "Line one,\nline two"
+    assert rows[1]["assignee_email"] == test_user.email and rows[0]["assignee_email"] == ""
+
+    response = client.get(f'/api/projects/{project.id}/tasks/export', headers=auth_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 5
+    assert lines[1]["assignee_id"] == str(test_user.id)
+
+    assert client.get(f'/api/projects/{project.id}/tasks/export?format=xml', headers=auth_headers).status_code == 422
+
+def test_export_tasks_requires_membership(client, auth_headers):
+    from uuid import uuid4
+    assert client.get(f'/api/projects/{uuid4()}/tasks/export', headers=auth_headers).status_code == 403
+
+def test_import_tasks(client, test_user, auth_headers, db, monkeypatch):
+    import json
+    from services import bulk_import
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+
+    monkeypatch.setattr(bulk_import, "IMPORT_CHUNK_SIZE", 2)
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    csv_file = (
+        "title,description,status,due_date,assignee_email\n"
+        f"Task 1,\"Line one,\nline two\",pending,2026-01-01T10:00:00Z,{test_user.email}\n"
+        "Task 2,,completed,,\n"
+        ",missing title,pending,,\n"
+        "Task 4,,unknown,,\n"
+        "Task 5,,pending,,stranger@test.com\n"
+    )
+    response = client.post(f'/api/projects/{project.id}/tasks:import', headers=auth_headers,
+                           files={"file": ("tasks.csv", csv_file, "text/csv")})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["processed"], report["imported"], report["failed"]) == (5, 2, 3)
+    assert [error["line"] for error in report["errors"]] == [5, 6, 7]
+    assert report["errors"][2]["error"] == "Assignee must be a project member"
+
+    tasks = {task.title: task for task in db.query(Task).filter(Task.project_id == project.id)}
+    assert set(tasks) == {"Task 1", "Task 2"}
+    assert tasks["Task 1"].description == "Line one,\nline two"
+    assert tasks["Task 1"].assignee_id == test_user.id
+    assert tasks["Task 1"].due_date.isoformat() == "2026-01-01T10:00:00"
+    assert tasks["Task 2"].status == "completed"
+
+    ndjson_file = json.dumps({"title": "Task 6"}) + "\n\nnot json\n[1]\n"
+    report = client.post(f'/api/projects/{project.id}/tasks:import', headers=auth_headers,
+                         files={"file": ("tasks.ndjson", ndjson_file)}).json()
+    assert (report["imported"], report["failed"]) == (1, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+
+def test_import_tasks_malformed_csv(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+
+    # a NUL byte fails its row; an unclosed quote overflowing the field limit ends the import
+    csv_file = "title\nTask 1\nTa\x00sk 2\n\"Task 3" + "x" * 200000 + "\nTask 4\n"
+    response = client.post(f'/api/projects/{project.id}/tasks:import', headers=auth_headers,
+                           files={"file": ("tasks.csv", csv_file, "text/csv")})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (1, 2)
+    assert [error["line"] for error in report["errors"]] == [3, 4]
+    assert report["errors"][1]["error"].startswith("Invalid CSV")
+    assert [task.title for task in db.query(Task).filter(Task.project_id == project.id)] == ["Task 1"]
+
+def test_import_tasks_requires_admin(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.user.value))
+    db.commit()
+    response = client.post(f'/api/projects/{project.id}/tasks:import', headers=auth_headers,
+                           files={"file": ("tasks.csv", "title\nTask 1\n")})
+    assert response.status_code == 403
+
+def test_get_tasks_conditional(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.add(Task(id=uuid4(), title="Task 1", description="Test Description", project_id=project.id))
+    db.commit()
+
+    url = f'/api/projects/{project.id}/tasks?limit=10'
+    response = client.get(url, headers=auth_headers)
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    with assert_max_queries(2):
+        response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag and response.content == b""
+    assert client.get(f'/api/projects/{project.id}/tasks?limit=5', headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+
+    response = client.post(f'/api/projects/{project.id}/tasks', json={"title": "Task 2", "description": "Test Description", "due_date": "2026-01-01T00:00:00"}, headers=auth_headers)
+    task_id = response.json()["id"]
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200 and len(response.json()["items"]) == 2
+    etag = response.headers["etag"]
+
+    client.put(f'/api/projects/{project.id}/tasks/{task_id}', json={"status": "completed"}, headers=auth_headers)
+    response = client.get(url, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    client.delete(f'/api/projects/{project.id}/tasks/{task_id}', headers=auth_headers)
+    assert client.get(url, headers={**auth_headers, "If-None-Match": etag}).status_code == 200
+
+def test_get_task_changes(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    db.commit()
+    url = f'/api/projects/{project.id}/tasks'
+
+    data = client.get(f'{url}/changes', headers=auth_headers).json()
+    assert data["changes"] == [] and data["has_more"] is False
+    cursor = data["cursor"]
+
+    ids = [client.post(url, json={"title": f"Task {i}", "description": "Test Description", "due_date": "2026-01-01T00:00:00"}, headers=auth_headers).json()["id"] for i in range(3)]
+    data = client.get(f'{url}/changes?since={cursor}&limit=2', headers=auth_headers).json()
+    assert [change["id"] for change in data["changes"]] == ids[:2] and data["has_more"] is True
+    data = client.get(f'{url}/changes?since={data["cursor"]}&limit=2', headers=auth_headers).json()
+    assert [change["id"] for change in data["changes"]] == ids[2:] and data["has_more"] is False
+    cursor = data["cursor"]
+
+    client.put(f'{url}/{ids[0]}', json={"status": "completed"}, headers=auth_headers)
+    client.delete(f'{url}/{ids[1]}', headers=auth_headers)
+    data = client.get(f'{url}/changes?since={cursor}', headers=auth_headers).json()
+    assert [(change["id"], change["deleted"]) for change in data["changes"]] == [(ids[0], False), (ids[1], True)]
+    assert data["changes"][0]["task"]["status"] == "completed" and data["changes"][1]["task"] is None
+    assert client.get(f'{url}/changes?since={data["cursor"]}', headers=auth_headers).json()["changes"] == []
+
+    # a full sync skips tombstones
+    data = client.get(f'{url}/changes', headers=auth_headers).json()
+    assert sorted(change["id"] for change in data["changes"]) == sorted([ids[0], ids[2]])
+    assert client.get(f'{url}/changes?since=bogus', headers=auth_headers).status_code == 400
+
+def test_get_project_stats(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole, Task, User
+    from uuid import uuid4
+    from datetime import datetime, timedelta
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    db.add(project)
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value))
+    member = User(id=uuid4(), email="member@test.com", first_name="Member", last_name="User", password="String123")
+    db.add(member)
+    db.add(ProjectUser(project_id=project.id, user_id=member.id, role=UserRole.user.value))
+    now = datetime.utcnow()
+    for status, due_in, assignee_id in [
+        ("pending", -1, test_user.id),
+        ("in_progress", 2, test_user.id),
+        ("completed", -3, test_user.id),
+        ("pending", 10, member.id),
+        ("pending", None, None),
+    ]:
+        db.add(Task(id=uuid4(), title="Task", description="Test Description", project_id=project.id, status=status,
+                    assignee_id=assignee_id, due_date=None if due_in is None else now + timedelta(days=due_in)))
+    db.add(Task(id=uuid4(), title="Deleted", description="Test Description", project_id=project.id, status="pending",
+                due_date=now - timedelta(days=1), deleted_at=now))
+    db.commit()
+
+    with assert_max_queries(3):
+        response = client.get(f'/api/projects/{project.id}/stats', headers=auth_headers)
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["total"] == 5
+    assert stats["by_status"] == {"pending": 3, "in_progress": 1, "completed": 1}
+    assert (stats["overdue"], stats["due_this_week"]) == (1, 1)
+    assert [(load["assignee"] and load["assignee"]["email"], load["total"], load["open"], load["overdue"]) for load in stats["workload"]] == [
+        (test_user.email, 3, 2, 1),
+        ("member@test.com", 1, 1, 0),
+        (None, 1, 1, 0),
+    ]
+
+def test_get_my_tasks(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+    from datetime import datetime, timedelta
+
+    now = datetime.utcnow()
+    projects = [Project(id=uuid4(), title=f"Project {i}", description="Test Description") for i in range(3)]
+    db.add_all(projects)
+    # no longer a member of the last project
+    db.add_all([ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.user.value) for project in projects[:2]])
+    tasks = []
+    for i in range(6):
+        tasks.append(Task(id=uuid4(), title=f"Task {i}", description="Test Description", project_id=projects[i % 3].id,
+                          assignee_id=test_user.id, status="completed" if i == 4 else "pending",
+                          due_date=None if i == 0 else now + timedelta(days=i)))
+    tasks.append(Task(id=uuid4(), title="Unassigned", description="Test Description", project_id=projects[0].id, due_date=now))
+    tasks.append(Task(id=uuid4(), title="Deleted", description="Test Description", project_id=projects[0].id,
+                      assignee_id=test_user.id, due_date=now, deleted_at=now))
+    db.add_all(tasks)
+    db.commit()
+
+    with assert_max_queries(2):
+        response = client.get('/api/me/tasks?limit=2', headers=auth_headers)
+    page = response.json()
+    assert [task["title"] for task in page["items"]] == ["Task 1", "Task 3"]
+    page = client.get(f'/api/me/tasks?limit=2&cursor={page["next_cursor"]}', headers=auth_headers).json()
+    assert [task["title"] for task in page["items"]] == ["Task 4", "Task 0"] and page["next_cursor"] is None
+
+    page = client.get('/api/me/tasks?status=pending&status=in_progress', headers=auth_headers).json()
+    assert [task["title"] for task in page["items"]] == ["Task 1", "Task 3", "Task 0"]
+    due_from, due_to = (now + timedelta(days=2)).isoformat(), (now + timedelta(days=5)).isoformat()
+    page = client.get(f'/api/me/tasks?due_from={due_from}&due_to={due_to}', headers=auth_headers).json()
+    assert [task["title"] for task in page["items"]] == ["Task 3", "Task 4"]
+    page = client.get(f'/api/me/tasks?project_id={projects[1].id}&project_id={projects[2].id}', headers=auth_headers).json()
+    assert [task["title"] for task in page["items"]] == ["Task 1", "Task 4"]
+    assert client.get('/api/me/tasks?status=unknown', headers=auth_headers).status_code == 422
+
+def test_task_routes_authorize_and_load_in_one_query(client, test_user, auth_headers, db, assert_max_queries):
+    from db.models import Project, ProjectUser, UserRole, Task, User
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    assignee = User(id=uuid4(), email="assignee@test.com", first_name="Assignee", last_name="User", password="String123")
+    db.add_all([project, assignee])
+    db.add_all([
+        ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.admin.value),
+        ProjectUser(project_id=project.id, user_id=assignee.id, role=UserRole.user.value),
+    ])
+    task = Task(id=uuid4(), title="Test Task", description="Test Description", project_id=project.id)
+    db.add(task)
+    db.commit()
+    url = f'/api/projects/{project.id}/tasks/{task.id}'
+    client.get('/api/profile', headers=auth_headers)
+
+    with assert_max_queries(1):
+        response = client.get(url, headers=auth_headers)
+    assert response.json()["title"] == "Test Task"
+
+    with assert_max_queries(1):
+        response = client.put(url, json={"title": "Updated", "assignee_id": str(assignee.id)}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated"
+    assert response.json()["assignee"]["email"] == "assignee@test.com"
+    db.expire_all()
+    assert db.get(Task, task.id).version == db.get(Project, project.id).version == 1
+
+    with assert_max_queries(1):
+        assert client.delete(url, headers=auth_headers).status_code == 200
+    db.expire_all()
+    assert db.get(Task, task.id).version == db.get(Project, project.id).version == 2
+
+def test_task_routes_errors(client, test_user, auth_headers, db):
+    from db.models import Project, ProjectUser, UserRole, Task
+    from uuid import uuid4
+
+    project = Project(id=uuid4(), title="Test Project", description="Test Description")
+    other = Project(id=uuid4(), title="Other Project", description="Test Description")
+    db.add_all([project, other])
+    db.add(ProjectUser(project_id=project.id, user_id=test_user.id, role=UserRole.user.value))
+    task = Task(id=uuid4(), title="Test Task", description="Test Description", project_id=project.id)
+    other_task = Task(id=uuid4(), title="Other Task", description="Test Description", project_id=other.id)
+    db.add_all([task, other_task])
+    db.commit()
+    url = f'/api/projects/{project.id}/tasks/{task.id}'
+
+    other_url = f'/api/projects/{other.id}/tasks/{other_task.id}'
+    assert client.get(other_url, headers=auth_headers).status_code == 403
+    assert client.put(other_url, json={"title": "Updated"}, headers=auth_headers).status_code == 403
+    missing_url = f'/api/projects/{project.id}/tasks/{uuid4()}'
+    assert client.get(missing_url, headers=auth_headers).status_code == 404
+    assert client.put(missing_url, json={"status": "unknown"}, headers=auth_headers).status_code == 404
+
+    response = client.put(url, json={"status": "unknown"}, headers=auth_headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid status"
+    response = client.put(url, json={"status": None}, headers=auth_headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid status"
+    response = client.put(url, json={"assignee_id": str(uuid4())}, headers=auth_headers)
+    assert response.status_code == 400 and response.json()["detail"] == "Assignee must be a project member"
+    response = client.delete(url, headers=auth_headers)
+    assert response.status_code == 403 and response.json()["detail"] == "Only project admin can delete tasks"
+
+    # nothing was written by the rejected requests
+    db.expire_all()
+    assert db.get(Project, project.id).version == 0
+    assert db.get(Task, task.id).title == "Test Task" and db.get(Task, task.id).deleted_at is None
@@ -87,3 +87,104 @@ def test_update_profile_password_only(client,test_user,auth_headers,db):
   assert updated_user.email == original_email
   assert updated_user.first_name == original_first_name
   assert updated_user.last_name == original_last_name
+
+  login = client.post('/login',data={"username":original_email,"password":"NewPassword123"})
+  assert login.status_code == 200
+
+def test_get_profile_uses_principal_cache(client,auth_headers):
+  from config.security import principal_cache
+  client.get('/api/profile',headers=auth_headers)
+  hits = principal_cache.hits
+  response = client.get('/api/profile',headers=auth_headers)
+  assert response.status_code == 200
+  assert principal_cache.hits == hits + 1
+
+def test_update_profile_invalidates_principal_cache(client,test_user,auth_headers):
+  client.get('/api/profile',headers=auth_headers)
+  update_data = {
+    "email":test_user.email,
+    "first_name":"Cached",
+    "last_name":"Name"
+  }
+  response = client.put('/api/profile',json=update_data,headers=auth_headers)
+  assert response.status_code == 200
+
+  response = client.get('/api/profile',headers=auth_headers)
+  assert response.json()["first_name"] == "Cached"
+
+def test_delete_profile_invalidates_principal_cache(client,auth_headers):
+  client.get('/api/profile',headers=auth_headers)
+  response = client.delete('/api/profile',headers=auth_headers)
+  assert response.status_code == 200
+
+  response = client.get('/api/profile',headers=auth_headers)
+  assert response.status_code == 401
+
+def test_subscription_status_uses_entitlement_cache(client,auth_headers,assert_max_queries):
+  from config.entitlements import entitlement_cache
+  assert client.get('/api/subscription-status',headers=auth_headers).json() == {"status":"active","is_active":True}
+
+  with assert_max_queries(0):
+    response = client.get('/api/subscription-status',headers=auth_headers)
+  assert response.json()["is_active"] is True
+  assert entitlement_cache.stats()["hits"] >= 1
+
+def add_lookup_users(db):
+  from db.models import User
+  from config.security import hash_password
+  from uuid import uuid4
+  for email,first_name,last_name in [
+    ("ana.garcia@example.com","Ana","Garcia"),
+    ("andres@example.com","Andres","Lopez"),
+    ("carla@example.com","Carla","Anaya"),
+    ("a_b@example.com","Bruno","Diaz"),
+  ]:
+    db.add(User(id=uuid4(),email=email,first_name=first_name,last_name=last_name,password=hash_password("Password123")))
+  db.commit()
+
+def test_lookup_users_matches_email_and_name_prefix(client,auth_headers,db):
+  add_lookup_users(db)
+  response = client.get('/api/users/lookup?q=An',headers=auth_headers)
+  assert response.status_code == 200
+  assert [user["email"] for user in response.json()] == ["ana.garcia@example.com","andres@example.com","carla@example.com"]
+
+  response = client.get('/api/users/lookup?q=ana%20gar',headers=auth_headers)
+  assert [user["email"] for user in response.json()] == ["ana.garcia@example.com"]
+
+def test_lookup_users_escapes_like_wildcards(client,auth_headers,db):
+  add_lookup_users(db)
+  response = client.get('/api/users/lookup?q=a_',headers=auth_headers)
+  assert [user["email"] for user in response.json()] == ["a_b@example.com"]
+  assert client.get('/api/users/lookup?q=%25',headers=auth_headers).json() == []
+
+def test_lookup_users_caps_results(client,auth_headers,db):
+  add_lookup_users(db)
+  response = client.get('/api/users/lookup?q=a&limit=2',headers=auth_headers)
+  assert len(response.json()) == 2
+  assert client.get('/api/users/lookup?q=a&limit=21',headers=auth_headers).status_code == 422
+  assert client.get('/api/users/lookup?q=',headers=auth_headers).status_code == 422
+
+def test_lookup_users_is_cached(client,auth_headers,db,assert_max_queries):
+  add_lookup_users(db)
+  first = client.get('/api/users/lookup?q=and',headers=auth_headers)
+  assert first.headers["cache-control"].startswith("private, max-age=")
+
+  with assert_max_queries(0):
+    second = client.get('/api/users/lookup?q=AND ',headers=auth_headers)
+  assert second.json() == first.json()
+
+def test_lookup_users_sees_new_registrations(client,auth_headers,db):
+  from routes.users import user_lookup_cache
+  add_lookup_users(db)
+  assert [user["email"] for user in client.get('/api/users/lookup?q=carl',headers=auth_headers).json()] == ["carla@example.com"]
+  client.get('/api/users/lookup?q=and',headers=auth_headers)
+
+  response = client.post('/register',json={"email":"carlos@example.com","password":"Password123","first_name":"Carlos","last_name":"Ruiz"})
+  assert response.status_code == 200
+  response = client.get('/api/users/lookup?q=carl',headers=auth_headers)
+  assert [user["email"] for user in response.json()] == ["carla@example.com","carlos@example.com"]
+  # lookups the new user doesn't match stay cached
+  assert user_lookup_cache.get(("and",10)) is not None
+
+def test_lookup_users_unauthorized(client):
+  assert client.get('/api/users/lookup?q=a').status_code == 401
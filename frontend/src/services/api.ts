@@ -4,9 +4,11 @@ import {
   CreateProjectData,
   CreateTaskData,
   LoginResponse,
+  Page,
   Project,
   RegisterData,
   Task,
+  User,
 } from "../types/models";
 
 const api = axios.create({
@@ -16,6 +18,19 @@ const api = axios.create({
   },
 });
 
+const getAllPages = async <T>(url: string): Promise<T[]> => {
+  const items: T[] = [];
+  let cursor: string | null = null;
+  do {
+    const response: { data: Page<T> } = await api.get(url, {
+      params: { limit: 100, ...(cursor ? { cursor } : {}) },
+    });
+    items.push(...response.data.items);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return items;
+};
+
 export const authApi = {
   register: async (data: RegisterData) => {
     try {
@@ -45,8 +60,7 @@ export const authApi = {
 export const projectApi = {
   getProjects: async () => {
     try {
-      const response = await api.get("/api/projects");
-      return response.data;
+      return await getAllPages<Project>("/api/projects");
     } catch (error) {
       throw error;
     }
@@ -100,8 +114,7 @@ api.interceptors.request.use((config) => {
 export const taskApi = {
   getTasks: async (projectId: string) => {
     try {
-      const response = await api.get(`/api/projects/${projectId}/tasks`);
-      return response.data;
+      return await getAllPages<Task>(`/api/projects/${projectId}/tasks`);
     } catch (error) {
       throw error;
     }
@@ -147,8 +160,7 @@ export const taskApi = {
 export const projectMemberApi = {
   getProjectMembers: async (projectId: string) => {
     try {
-      const response = await api.get(`/api/projects/${projectId}/members`);
-      return response.data;
+      return await getAllPages<User>(`/api/projects/${projectId}/members`);
     } catch (error) {
       throw error;
     }
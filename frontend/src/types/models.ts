@@ -8,6 +8,11 @@ export interface User {
 
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface Project {
   id: string;
   title: string;